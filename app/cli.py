@@ -0,0 +1,126 @@
+"""Operational commands: ``python -m app.cli <command>``"""
+import argparse
+import sys
+
+def cmd_migrate(args) -> int:
+    from app.database import shard_router
+    from app.migrations import migrate
+    
+    for number, shard in enumerate(shard_router.engines):
+        version = migrate(shard, number)
+        print(f"Shard {number}: schema is at version {version}")
+    return 0
+
+def cmd_schema_version(args) -> int:
+    from app.database import shard_router
+    from app.migrations import SCHEMA_VERSION, current_version
+    
+    status = 0
+    for number, shard in enumerate(shard_router.engines):
+        version = current_version(shard)
+        print(f"Shard {number}: {version if version is not None else 'unmanaged'}, code: {SCHEMA_VERSION}")
+        status = status or int(version != SCHEMA_VERSION)
+    return status
+
+def cmd_reconcile_summaries(args) -> int:
+    from sqlmodel import Session
+    from app.database import shard_router
+    from app.services.summaries import reconcile_task_summaries
+    
+    for number, shard in enumerate(shard_router.engines):
+        with Session(shard) as session:
+            repaired = reconcile_task_summaries(session, batch_size=args.batch_size)
+            session.commit()
+        print(f"Shard {number}: repaired {repaired} task summaries")
+    return 0
+
+def cmd_backfill_analytics(args) -> int:
+    from sqlmodel import Session
+    from app.database import shard_router
+    from app.services.analytics import backfill_analytics
+    
+    for number, shard in enumerate(shard_router.engines):
+        with Session(shard) as session:
+            replayed = backfill_analytics(session, batch_size=args.batch_size)
+        print(f"Shard {number}: rebuilt analytics from {replayed} activity rows")
+    return 0
+
+def cmd_purge_deleted(args) -> int:
+    from app.database import shard_router
+    from app.services.purge import purge_pending
+    
+    for number, shard in enumerate(shard_router.engines):
+        print(f"Shard {number}: purged {purge_pending(shard, args.chunk_size)} tasks deleted in the background")
+    return 0
+
+def cmd_backup(args) -> int:
+    from app.database import shard_router
+    from app.services.backup import BackupError, BackupThrottle, health_latency, take_backup
+    
+    if not 0 <= args.shard < len(shard_router.engines):
+        print(f"No shard {args.shard}", file=sys.stderr)
+        return 1
+    throttle = BackupThrottle.from_env(health_latency(args.health_url) if args.health_url else None)
+    if args.budget_ms:
+        throttle.budget = args.budget_ms / 1000
+    try:
+        result = take_backup(shard_router.engines[args.shard], target=args.output, throttle=throttle)
+    except BackupError as exc:
+        print(f"Backup failed: {exc}", file=sys.stderr)
+        return 1
+    print(f"Wrote {result['path']} ({result['bytes']} bytes in {result['seconds']}s)")
+    return 0
+
+def cmd_rebalance(args) -> int:
+    import logging
+    from app.database import WORKSPACE_PATTERN, shard_router
+    from app.services.rebalance import RebalanceError, move_workspace
+    
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if not WORKSPACE_PATTERN.match(args.workspace):
+        print(f"Invalid workspace {args.workspace!r}", file=sys.stderr)
+        return 1
+    try:
+        result = move_workspace(shard_router, args.workspace, args.shard, batch_size=args.batch_size)
+    except RebalanceError as exc:
+        print(f"Move failed: {exc}", file=sys.stderr)
+        return 1
+    print(f"Moved {result['tasks']} tasks of {args.workspace} from shard {result['from_shard']} to {result['to_shard']}")
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Task Management API operations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    commands.add_parser("migrate", help="Create or upgrade the database schema").set_defaults(func=cmd_migrate)
+    commands.add_parser("schema-version", help="Compare the database schema version with the code").set_defaults(func=cmd_schema_version)
+    reconcile = commands.add_parser("reconcile-summaries", help="Recompute denormalized task summary columns")
+    reconcile.add_argument("--batch-size", type=int, default=1000)
+    reconcile.set_defaults(func=cmd_reconcile_summaries)
+    backfill = commands.add_parser("backfill-analytics", help="Rebuild the analytics rollups from the activity log")
+    backfill.add_argument("--batch-size", type=int, default=5000)
+    backfill.set_defaults(func=cmd_backfill_analytics)
+    purge = commands.add_parser("purge-deleted", help="Finish background task deletions a stopped worker left unfinished")
+    purge.add_argument("--chunk-size", type=int, default=1000)
+    purge.set_defaults(func=cmd_purge_deleted)
+    
+    backup = commands.add_parser("backup", help="Snapshot the live database without stopping the API")
+    backup.add_argument("--output", help="Target file (default: BACKUP_DIR/task_management-<timestamp>)")
+    backup.add_argument("--health-url", help="Throttle against this running API's /health latency, e.g. http://localhost:8000/health")
+    backup.add_argument("--budget-ms", type=float, help="Request latency to stay within while copying (default: BACKUP_LATENCY_BUDGET_MS or 200)")
+    backup.add_argument("--shard", type=int, default=0, help="Shard to snapshot (0 is DATABASE_URL)")
+    backup.set_defaults(func=cmd_backup)
+    
+    rebalance = commands.add_parser("rebalance", help="Move a workspace to another shard while the API keeps serving it")
+    rebalance.add_argument("workspace")
+    rebalance.add_argument("shard", type=int, help="Target shard (0 is DATABASE_URL, then SHARD_DATABASE_URLS in order)")
+    rebalance.add_argument("--batch-size", type=int, default=500)
+    rebalance.set_defaults(func=cmd_rebalance)
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
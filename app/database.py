@@ -1,31 +1,255 @@
-from sqlmodel import SQLModel, create_engine, Session
-from typing import Generator
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from fastapi import Depends, Header, HTTPException, Request
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine, make_url
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import create_engine, Session, select
+from typing import Callable, Dict, Generator, List, Optional, Tuple
 import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+from app.models import Task, WorkspaceShard
 
 # Get database URL from environment variable or use SQLite as fallback
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./task_management.db")
 
-# Fix for Render PostgreSQL URL (uses postgres:// instead of postgresql://)
-if DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+def _normalize_url(url: str) -> str:
+    # Fix for Render PostgreSQL URL (uses postgres:// instead of postgresql://)
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql://", 1)
+    return url
+
+DATABASE_URL = _normalize_url(DATABASE_URL)
+
+# Extra shards for workspace sharding, comma separated; DATABASE_URL is shard 0
+SHARD_DATABASE_URLS = [_normalize_url(url.strip()) for url in os.getenv("SHARD_DATABASE_URLS", "").split(",") if url.strip()]
+
+@event.listens_for(Engine, "connect")
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """SQLite ignores FOREIGN KEY/ON DELETE CASCADE unless enabled per connection"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+def install_query_timer(on_query: Callable[[str, float], None]) -> None:
+    """Report ``(statement, seconds)`` for every cursor execution on any engine.
+
+    Listeners are only attached when called, so unprofiled deployments pay
+    nothing per query.
+    """
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started_at"] = time.perf_counter()
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_started_at", None)
+        if started is not None:
+            on_query(statement, time.perf_counter() - started)
+
+# WAL lets readers, and online backups, work from a snapshot while writes continue
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "wal")
+
+def _is_sqlite_file(url: str) -> bool:
+    parsed = make_url(url)
+    database = parsed.database or ""
+    return (
+        parsed.get_backend_name() == "sqlite"
+        and database not in ("", ":memory:")
+        and parsed.query.get("mode") != "memory"
+    )
+
+def _create_engine(url: str) -> Engine:
+    created = create_engine(
+        url,
+        echo=False,  # Set to False in production for better performance
+        connect_args={"check_same_thread": False} if url.startswith("sqlite") else {},
+        pool_pre_ping=True  # Verify connections before using them
+    )
+    if _is_sqlite_file(url):
+        # In-memory databases cannot use WAL, so only file databases get it
+        @event.listens_for(created, "connect")
+        def _set_journal_mode(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+            cursor.close()
+    return created
+
+engine = _create_engine(DATABASE_URL)
+
+DEFAULT_WORKSPACE = "default"
+WORKSPACE_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+@dataclass(frozen=True)
+class Placement:
+    shard: int
+    state: str = "active"
+    version: int = 1
+
+class ShardRouter:
+    """Maps each workspace to one of N shard engines.
 
-# Create engine with appropriate settings
-connect_args = {}
-if DATABASE_URL.startswith("sqlite"):
-    connect_args = {"check_same_thread": False}  # Only for SQLite
+    Placements live in the ``workspace_shards`` table on the first shard.
+    A workspace seen for the first time is pinned to a shard picked by a
+    stable hash, so adding shards later never strands existing data; moves
+    go through :func:`app.services.rebalance.move_workspace`. Each process
+    caches placements for ``ttl`` seconds, which bounds how long a move
+    takes to be noticed everywhere. When a reloaded placement's version
+    shows the workspace moved, ``on_move(engine, workspace, previous)``
+    lets the process rebuild its in-memory state for it.
+    """
 
-engine = create_engine(
-    DATABASE_URL,
-    echo=False,  # Set to False in production for better performance
-    connect_args=connect_args,
-    pool_pre_ping=True  # Verify connections before using them
+    def __init__(
+        self,
+        engines: List[Engine],
+        ttl: float = 5.0,
+        on_move: Optional[Callable[[Engine, str, List[Engine]], None]] = None
+    ):
+        self.engines = engines
+        self.directory = engines[0]
+        self.ttl = ttl
+        self.on_move = on_move
+        self._placements: Dict[str, Tuple[Placement, float]] = {}
+        # Placement version this process last rebuilt its state for, per workspace
+        self._acted_on: Dict[str, Placement] = {}
+        self._lock = threading.Lock()
+
+    def _hash_shard(self, workspace: str) -> int:
+        return zlib.crc32(workspace.encode()) % len(self.engines)
+
+    def placement(self, workspace: str) -> Placement:
+        cached = self._placements.get(workspace)
+        if cached and time.monotonic() - cached[1] < self.ttl:
+            return cached[0]
+        if len(self.engines) == 1:
+            # Nothing to route; placements only matter once there are shards
+            placement = Placement(0)
+        else:
+            placement = self._load(workspace)
+            self._notice_move(workspace, placement)
+        with self._lock:
+            self._placements[workspace] = (placement, time.monotonic())
+        return placement
+
+    def _notice_move(self, workspace: str, placement: Placement) -> None:
+        with self._lock:
+            previous = self._acted_on.get(workspace)
+            if placement.state != "active" or (previous or Placement(placement.shard)).version == placement.version:
+                return
+            self._acted_on[workspace] = placement
+        if previous is not None and previous.shard == placement.shard:
+            return
+        if self.on_move is not None:
+            # Without an earlier placement, any other shard may still hold stale state
+            stale = [previous.shard] if previous is not None else [n for n in range(len(self.engines)) if n != placement.shard]
+            self.on_move(self.engines[placement.shard], workspace, [self.engines[n] for n in stale])
+
+    def _load(self, workspace: str) -> Placement:
+        with Session(self.directory) as session:
+            row = session.get(WorkspaceShard, workspace)
+            if row is None:
+                # Workspaces from before sharding keep their data on the first shard
+                existing = session.exec(select(Task.id).where(Task.workspace == workspace).limit(1)).first()
+                shard = 0 if existing is not None else self._hash_shard(workspace)
+                session.add(WorkspaceShard(workspace=workspace, shard=shard))
+                try:
+                    session.commit()
+                except IntegrityError:  # Pinned concurrently by another worker
+                    session.rollback()
+                row = session.get(WorkspaceShard, workspace)
+            return Placement(row.shard, row.state, row.version)
+
+    def set_placement(self, workspace: str, shard: int, state: str = "active") -> None:
+        """Record where a workspace lives (used while moving it); bumps the placement version"""
+        with Session(self.directory) as session:
+            row = session.get(WorkspaceShard, workspace) or WorkspaceShard(workspace=workspace, shard=shard)
+            row.shard = shard
+            row.state = state
+            row.updated_at = datetime.now(timezone.utc)
+            session.add(row)
+            session.commit()
+            placement = Placement(row.shard, row.state, row.version)
+        with self._lock:
+            self._placements.pop(workspace, None)
+            # This process moved the data itself and rebuilds its own state
+            self._acted_on[workspace] = placement
+
+    def engine_for(self, workspace: str) -> Engine:
+        return self.engines[self.placement(workspace).shard]
+
+def _rebuild_moved_workspace(engine: Engine, workspace: str, previous: List[Engine]) -> None:
+    from app.services.local_state import reload_workspace
+    reload_workspace(engine, workspace, previous)
+
+shard_router = ShardRouter(
+    [engine] + [_create_engine(url) for url in SHARD_DATABASE_URLS],
+    on_move=_rebuild_moved_workspace
 )
 
-def create_db_and_tables():
-    """Create all database tables"""
-    SQLModel.metadata.create_all(engine)
+def pool_status() -> dict:
+    """Connection pool occupancy, for health reporting and admission limits"""
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return {}
+    return {
+        "size": pool.size(),
+        "max_overflow": max(getattr(pool, "_max_overflow", 0), 0),
+        "checked_out": pool.checkedout()
+    }
+
+def pool_capacity(default: int = 15) -> int:
+    """How many connections the pool can hand out at once"""
+    status = pool_status()
+    return status["size"] + status["max_overflow"] if status else default
+
+def get_workspace(x_workspace: Optional[str] = Header(None, description="Workspace the request acts on")) -> str:
+    """Dependency for the request's workspace, from the ``X-Workspace`` header"""
+    workspace = x_workspace or DEFAULT_WORKSPACE
+    if not WORKSPACE_PATTERN.match(workspace):
+        raise HTTPException(status_code=400, detail="Invalid X-Workspace; use 1-64 letters, digits, '-' or '_'")
+    return workspace
+
+# ASGI scope key under which POST /batch hands its session to sub-requests
+BATCH_SESSION = "app.batch_session"
 
-def get_session() -> Generator[Session, None, None]:
-    """Dependency for getting database sessions"""
-    with Session(engine) as session:
+def nestable_connection(session: Session) -> Connection:
+    """The session's connection, inside a transaction that savepoints can nest in"""
+    connection = session.connection()
+    dbapi_connection = connection.connection.dbapi_connection
+    if isinstance(dbapi_connection, sqlite3.Connection) and not dbapi_connection.in_transaction:
+        # pysqlite only opens its transaction before DML, so releasing the first
+        # SAVEPOINT would otherwise commit for good
+        connection.exec_driver_sql("BEGIN")
+    return connection
+
+def get_session(request: Request, workspace: str = Depends(get_workspace)) -> Generator[Session, None, None]:
+    """Dependency for getting a session on the shard holding the request's workspace"""
+    batch_session = request.scope.get(BATCH_SESSION)
+    if batch_session is not None:
+        # Sub-request of POST /batch: share its session (and transaction)
+        yield batch_session
+        return
+    placement = shard_router.placement(workspace)
+    if placement.state == "frozen" and request.method not in ("GET", "HEAD", "OPTIONS"):
+        raise HTTPException(
+            status_code=503,
+            detail="Workspace is moving between shards; retry shortly",
+            headers={"Retry-After": "1"}
+        )
+    with Session(shard_router.engines[placement.shard]) as session:
         yield session
+
+def get_bind(workspace: str = Depends(get_workspace)) -> Engine:
+    """Dependency for the engine of the workspace's shard.
+
+    For long-lived responses such as event streams, which open short
+    sessions themselves instead of holding one (and its pooled connection)
+    for as long as the client stays connected.
+    """
+    return shard_router.engine_for(workspace)
@@ -1,16 +1,33 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from app.database import create_db_and_tables
-from app.routers import tasks, comments, labels, activity_logs
+from app.database import pool_capacity, pool_status, shard_router
+from app.middleware.admission import AdmissionController, AdmissionControlMiddleware
+from app.middleware.idempotency import IdempotencyMiddleware, store_from_env
+from app.middleware.profiling import ProfilingMiddleware
+from app.migrations import ensure_schema
+from app.routers import tasks, comments, labels, activity_logs, events, admin, batch, analytics
+from app.services.reminders import get_reminder_scheduler
+from app.services.task_index import get_task_index
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifespan events"""
-    # Startup: Initialize database
-    create_db_and_tables()
+    schedulers = []
+    for number, shard in enumerate(shard_router.engines):
+        # Startup: one cheap schema-version query instead of create_all per worker
+        ensure_schema(shard, number)
+        # Warm the in-memory label/status/priority bitmap index
+        get_task_index(shard)
+        # Load upcoming due dates and start emitting overdue reminders
+        reminders = get_reminder_scheduler(shard)
+        reminders.start()
+        schedulers.append(reminders)
     yield
     # Shutdown: Cleanup if needed
+    for reminders in schedulers:
+        reminders.stop()
 
 app = FastAPI(
     title="Task Management API",
@@ -19,13 +36,27 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# CORS middleware
+# On-demand request profiling, mounted only when explicitly enabled
+if ProfilingMiddleware.enabled():
+    app.add_middleware(ProfilingMiddleware, **ProfilingMiddleware.options_from_env())
+
+# Replay stored responses for retried POSTs carrying an Idempotency-Key;
+# IDEMPOTENCY_STORE=database shares the keys between workers
+app.add_middleware(IdempotencyMiddleware, store=store_from_env(shard_router.directory))
+
+# Admission control: bound concurrency to the pool and shed load early
+admission = AdmissionController.from_env(pool_capacity())
+app.add_middleware(AdmissionControlMiddleware, controller=admission)
+app.state.admission = admission
+
+# CORS middleware, added last so it is outermost and 429/503 responses carry CORS headers
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Configure appropriately for production
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Total-Count-Approximate", "X-Next-Cursor", "X-Profile-Id", "Server-Timing", "ETag", "Retry-After"],
 )
 
 # Include routers
@@ -33,6 +64,10 @@ app.include_router(tasks.router)
 app.include_router(comments.router)
 app.include_router(labels.router)
 app.include_router(activity_logs.router)
+app.include_router(events.router)
+app.include_router(admin.router)
+app.include_router(batch.router)
+app.include_router(analytics.router)
 
 @app.get("/", tags=["Root"])
 def read_root():
@@ -46,5 +81,14 @@ def read_root():
 
 @app.get("/health", tags=["Health"])
 def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy"}
+    """Health check endpoint; 503 while the API is shedding load"""
+    pool = pool_status()
+    overloaded = admission.is_shedding() or (
+        pool and pool["checked_out"] >= pool["size"] + pool["max_overflow"] and admission.queued > 0
+    )
+    body = {
+        "status": "overloaded" if overloaded else "healthy",
+        "admission": admission.status(),
+        "pool": pool
+    }
+    return JSONResponse(body, status_code=503 if overloaded else 200)
@@ -0,0 +1,254 @@
+from collections import deque
+from dataclasses import dataclass
+from starlette.routing import Match
+from typing import Deque, Dict, Optional, Tuple
+import asyncio
+import json
+import math
+import os
+import time
+
+@dataclass(frozen=True)
+class PriorityClass:
+    name: str
+    priority: int  # Lower is served first
+    limit: int  # Concurrent requests this class may hold
+    min_wait: float  # Queue deadline bounds, in seconds
+    max_wait: float
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, retry_after: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.detail = detail
+
+class AdmissionController:
+    """Bounds concurrent requests to what the connection pool can serve.
+
+    Requests beyond the limit wait in per-class FIFO queues; freed slots go
+    to the highest-priority class first. A request is turned away at once
+    (503) when the wait it would face, estimated from observed service
+    time, exceeds its class deadline, and with 429 when the queue is full.
+    Routes listed in ``route_limits`` (``"METHOD /path/template"``) may also
+    have at most that many requests queued or running at once.
+    Only used from the event loop, so it needs no locking.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        classes: Tuple[PriorityClass, ...],
+        max_queue: int = 100,
+        route_limits: Optional[Dict[str, int]] = None
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.route_limits = dict(route_limits or {})
+        self.route_active: Dict[str, int] = {}
+        self.classes = {c.name: c for c in classes}
+        self.active_total = 0
+        self.active: Dict[str, int] = {c.name: 0 for c in classes}
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {c.name: deque() for c in classes}
+        self._order = sorted(classes, key=lambda c: c.priority)
+        # Exponentially weighted service time of interactive (non-bulk) requests, and per class
+        self.service_time = 0.05
+        self.class_latency: Dict[str, float] = {c.name: 0.05 for c in classes}
+        self.rejected = 0
+        self.last_rejection_at: Optional[float] = None
+
+    @classmethod
+    def from_env(cls, default_concurrency: int) -> "AdmissionController":
+        limit = int(os.getenv("ADMISSION_MAX_CONCURRENCY", default_concurrency))
+        return cls(
+            max_concurrency=limit,
+            max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", limit * 8)),
+            route_limits=parse_route_limits(os.getenv("ADMISSION_ROUTE_LIMITS", "")),
+            classes=(
+                PriorityClass("read", 0, limit, 0.25, 2.0),
+                PriorityClass("write", 1, limit, 0.25, 2.0),
+                PriorityClass("bulk", 2, max(1, limit // 4), 0.1, 1.0),
+            )
+        )
+
+    @property
+    def queued(self) -> int:
+        return sum(len(q) for q in self._waiters.values())
+
+    def queue_deadline(self, name: str) -> float:
+        """How long a request of this class may wait, scaled to its observed latency"""
+        klass = self.classes[name]
+        return min(klass.max_wait, max(klass.min_wait, 4 * self.class_latency[name]))
+
+    def _backlog(self, priority: int) -> float:
+        # Seconds of work queued at or above ``priority``, by each class's own latency
+        return sum(len(self._waiters[c.name]) * self.class_latency[c.name] for c in self._order if c.priority <= priority)
+
+    def _has_capacity(self, name: str) -> bool:
+        return self.active_total < self.max_concurrency and self.active[name] < self.classes[name].limit
+
+    def _admit(self, name: str) -> None:
+        self.active_total += 1
+        self.active[name] += 1
+
+    def _reject(self, status_code: int, retry_after: float, detail: str) -> AdmissionRejected:
+        self.rejected += 1
+        self.last_rejection_at = time.monotonic()
+        return AdmissionRejected(status_code, max(1, math.ceil(retry_after)), detail)
+
+    async def acquire(self, name: str, route: Optional[str] = None) -> None:
+        if route not in self.route_limits:
+            return await self._acquire_class(name)
+        if self.route_active.get(route, 0) >= self.route_limits[route]:
+            raise self._reject(429, self.class_latency[name], "Too many concurrent requests for this route")
+        self.route_active[route] = self.route_active.get(route, 0) + 1
+        try:
+            await self._acquire_class(name)
+        except BaseException:
+            self._free_route(route)
+            raise
+
+    async def _acquire_class(self, name: str) -> None:
+        klass = self.classes[name]
+        ahead = sum(len(self._waiters[c.name]) for c in self._order if c.priority <= klass.priority)
+        if ahead == 0 and self._has_capacity(name):
+            self._admit(name)
+            return
+        if self.queued >= self.max_queue:
+            raise self._reject(429, self._backlog(len(self._order)) / self.max_concurrency, "Too many queued requests")
+        deadline = self.queue_deadline(name)
+        # Long bulk requests ahead count at their own latency, not at the interactive one
+        estimate = (self._backlog(klass.priority) + self.class_latency[name]) / self.max_concurrency
+        if estimate > deadline:
+            raise self._reject(503, estimate, "Server is overloaded")
+        
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[name].append(waiter)
+        try:
+            await asyncio.wait({waiter}, timeout=deadline)
+        except asyncio.CancelledError:
+            # Client went away while queued; never keep the slot or the queue entry
+            self._abandon(name, waiter)
+            raise
+        if waiter.done() and not waiter.cancelled():
+            return  # Slot was handed over by release()
+        self._abandon(name, waiter)
+        raise self._reject(503, deadline, "Timed out waiting for capacity")
+
+    def _abandon(self, name: str, waiter: asyncio.Future) -> None:
+        if waiter.done() and not waiter.cancelled():
+            # The slot was handed over just as the wait ended: pass it on
+            self._free(name)
+            return
+        waiter.cancel()
+        try:
+            self._waiters[name].remove(waiter)
+        except ValueError:
+            pass
+
+    def _free(self, name: str) -> None:
+        self.active_total -= 1
+        self.active[name] -= 1
+        self._dispatch()
+
+    def _free_route(self, route: str) -> None:
+        self.route_active[route] -= 1
+        if not self.route_active[route]:
+            del self.route_active[route]
+
+    def release(self, name: str, elapsed: float, route: Optional[str] = None) -> None:
+        if name != "bulk":
+            self.service_time = 0.8 * self.service_time + 0.2 * elapsed
+        self.class_latency[name] = 0.8 * self.class_latency[name] + 0.2 * elapsed
+        if route in self.route_limits:
+            self._free_route(route)
+        self._free(name)
+
+    def _dispatch(self) -> None:
+        for klass in self._order:
+            queue = self._waiters[klass.name]
+            while queue and self._has_capacity(klass.name):
+                waiter = queue.popleft()
+                if waiter.done():
+                    continue
+                self._admit(klass.name)
+                waiter.set_result(True)
+
+    def is_shedding(self, window: float = 5.0) -> bool:
+        return self.last_rejection_at is not None and time.monotonic() - self.last_rejection_at < window
+
+    def interactive_latency(self) -> float:
+        """Observed latency of ordinary reads and writes, excluding bulk work"""
+        return max(self.class_latency["read"], self.class_latency["write"])
+
+    def status(self) -> Dict[str, object]:
+        return {
+            "active": self.active_total,
+            "max_concurrency": self.max_concurrency,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "service_time_ms": round(self.service_time * 1000, 2),
+            "interactive_latency_ms": round(self.interactive_latency() * 1000, 2)
+        }
+
+BULK_PATH_MARKERS = ("/bulk", "/import", "/export", "/batch", "/admin")
+EXEMPT_PATHS = ("/health", "/events", "/docs", "/redoc", "/openapi.json")
+
+def parse_route_limits(spec: str) -> Dict[str, int]:
+    """Parse ``"POST /tasks/import=2,GET /admin/export=1"`` into route limits"""
+    limits = {}
+    for item in spec.split(","):
+        if item.strip():
+            route, _, limit = item.rpartition("=")
+            limits[" ".join(route.split())] = int(limit)
+    return limits
+
+def route_key(scope) -> Optional[str]:
+    """``"METHOD /path/template"`` of the route that will serve this request"""
+    app = scope.get("app")
+    for route in getattr(getattr(app, "router", None), "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return f"{scope['method']} {route.path}"
+    return None
+
+def classify(method: str, path: str) -> str:
+    """Map a request to its priority class: cheap reads first, bulk work last"""
+    if any(marker in path for marker in BULK_PATH_MARKERS):
+        return "bulk"
+    if method in ("GET", "HEAD", "OPTIONS"):
+        return "read"
+    return "write"
+
+class AdmissionControlMiddleware:
+    """Sheds load with fast 429/503 + ``Retry-After`` instead of queueing on the pool"""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/" or scope["path"].startswith(EXEMPT_PATHS):
+            return await self.app(scope, receive, send)
+        name = classify(scope["method"], scope["path"])
+        route = route_key(scope) if self.controller.route_limits else None
+        try:
+            await self.controller.acquire(name, route)
+        except AdmissionRejected as rejection:
+            body = json.dumps({"detail": rejection.detail}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": rejection.status_code,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(rejection.retry_after).encode())
+                ]
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name, time.perf_counter() - started, route)
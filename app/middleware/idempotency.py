@@ -0,0 +1,295 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+from app.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+WORKSPACE_HEADER = b"x-workspace"
+MAX_KEY_LENGTH = 255
+
+@dataclass
+class StoredResponse:
+    fingerprint: str
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    expires_at: float
+
+Key = Tuple[str, str, str]  # (workspace, path, Idempotency-Key)
+
+class IdempotencyStore:
+    """Bounded, TTL-evicted store of first responses per idempotency key.
+
+    Process-local: with several workers, use :class:`DatabaseIdempotencyStore`.
+    Only touched from the event loop, so it needs no locking. Keys that are
+    still being processed are tracked separately so concurrent duplicates
+    wait for the first request instead of running the write path again.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 86400):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._responses: "OrderedDict[Key, StoredResponse]" = OrderedDict()
+        self._in_flight: Dict[Key, Tuple[str, asyncio.Event]] = {}
+
+    def get(self, key: Key) -> Optional[StoredResponse]:
+        stored = self._responses.get(key)
+        if stored is None:
+            return None
+        if stored.expires_at <= time.monotonic():
+            del self._responses[key]
+            return None
+        self._responses.move_to_end(key)
+        return stored
+
+    async def claim(self, key: Key, fingerprint: str) -> Optional[Tuple[str, Optional[StoredResponse]]]:
+        """Claim ``key`` for this request, or return the fingerprint and response
+        (``None`` while still in flight) of the request that holds it"""
+        stored = self.get(key)
+        if stored is not None:
+            return stored.fingerprint, stored
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            return pending[0], None
+        self._in_flight[key] = (fingerprint, asyncio.Event())
+        return None
+
+    async def wait(self, key: Key, timeout: float) -> bool:
+        """Wait for the request holding ``key`` to finish; False on timeout"""
+        pending = self._in_flight.get(key)
+        if pending is None:
+            return True
+        try:
+            await asyncio.wait_for(pending[1].wait(), max(timeout, 0))
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def complete(self, key: Key, fingerprint: str, status: int, headers, body: bytes) -> None:
+        self._responses[key] = StoredResponse(fingerprint, status, headers, body, time.monotonic() + self.ttl_seconds)
+        self._responses.move_to_end(key)
+        while len(self._responses) > self.max_entries:
+            self._responses.popitem(last=False)
+        self._release(key)
+
+    async def abandon(self, key: Key) -> None:
+        """Give the key up without a response, so a retry runs again"""
+        self._release(key)
+
+    def _release(self, key: Key) -> None:
+        entry = self._in_flight.pop(key, None)
+        if entry is not None:
+            entry[1].set()
+
+class DatabaseIdempotencyStore:
+    """Idempotency keys in the ``idempotency_keys`` table, shared by every worker.
+
+    A request claims its key by inserting the row; the primary key makes
+    exactly one worker win. Duplicates poll the row until the first request
+    stores its response. A claim whose worker died is taken over once its
+    lease runs out.
+    """
+
+    def __init__(self, engine: Engine, ttl_seconds: float = 86400, lease_seconds: float = 60, poll_seconds: float = 0.05):
+        self.engine = engine
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self._purged_at = 0.0
+
+    def _claim(self, key: Key, fingerprint: str) -> Optional[Tuple[str, Optional[StoredResponse]]]:
+        now = _utcnow()
+        with Session(self.engine) as session:
+            if time.monotonic() - self._purged_at > self.lease_seconds:
+                self._purged_at = time.monotonic()
+                session.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= now))
+                session.commit()
+            while True:
+                row = session.get(IdempotencyKey, key)
+                if row is not None and row.expires_at > now:
+                    return row.fingerprint, _stored(row)
+                if row is not None:
+                    session.delete(row)
+                    session.flush()
+                session.add(IdempotencyKey(
+                    workspace=key[0], path=key[1], key=key[2], fingerprint=fingerprint,
+                    expires_at=now + timedelta(seconds=self.lease_seconds)
+                ))
+                try:
+                    session.commit()
+                    return None
+                except IntegrityError:  # Claimed concurrently by another worker
+                    session.rollback()
+
+    def _read(self, key: Key) -> Optional[StoredResponse]:
+        with Session(self.engine) as session:
+            row = session.get(IdempotencyKey, key)
+            if row is None or row.expires_at <= _utcnow():
+                return None
+            return _stored(row) or _PENDING
+
+    def _finish(self, key: Key, status: Optional[int], headers, body: bytes) -> None:
+        match = (IdempotencyKey.workspace == key[0], IdempotencyKey.path == key[1], IdempotencyKey.key == key[2])
+        with Session(self.engine) as session:
+            if status is None:
+                session.execute(delete(IdempotencyKey).where(*match, IdempotencyKey.status.is_(None)))
+            else:
+                session.execute(update(IdempotencyKey).where(*match).values(
+                    status=status,
+                    headers=json.dumps([[name.decode("latin-1"), value.decode("latin-1")] for name, value in headers]),
+                    body=body,
+                    expires_at=_utcnow() + timedelta(seconds=self.ttl_seconds)
+                ))
+            session.commit()
+
+    async def claim(self, key: Key, fingerprint: str) -> Optional[Tuple[str, Optional[StoredResponse]]]:
+        return await run_in_threadpool(self._claim, key, fingerprint)
+
+    async def wait(self, key: Key, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while await run_in_threadpool(self._read, key) is _PENDING:
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(self.poll_seconds)
+        return True
+
+    async def complete(self, key: Key, fingerprint: str, status: int, headers, body: bytes) -> None:
+        await run_in_threadpool(self._finish, key, status, headers, body)
+
+    async def abandon(self, key: Key) -> None:
+        await run_in_threadpool(self._finish, key, None, [], b"")
+
+# Stand-in returned by DatabaseIdempotencyStore._read while a key is in flight
+_PENDING = StoredResponse("", 0, [], b"", 0.0)
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _stored(row) -> Optional[StoredResponse]:
+    if row.status is None:
+        return None
+    headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in json.loads(row.headers or "[]")]
+    return StoredResponse(row.fingerprint, row.status, headers, row.body or b"", 0.0)
+
+def store_from_env(engine: Engine):
+    """The process-local store, or the shared table with ``IDEMPOTENCY_STORE=database``"""
+    ttl_seconds = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    if os.getenv("IDEMPOTENCY_STORE", "memory") == "database":
+        return DatabaseIdempotencyStore(engine, ttl_seconds=ttl_seconds)
+    return IdempotencyStore(max_entries=int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000")), ttl_seconds=ttl_seconds)
+
+class IdempotencyMiddleware:
+    """Replays the stored response for POSTs repeated with the same ``Idempotency-Key``.
+
+    Keys are scoped to the request's ``X-Workspace`` and path. The first
+    request with a key runs normally and its response is stored (unless it
+    is a redirect or a 5xx, which retries should re-run). A retry with the
+    same key and body gets the stored response without touching the write
+    path; reusing a key for a different body is rejected with 422.
+    """
+
+    def __init__(self, app, paths=("/tasks", "/tasks/", "/comments", "/comments/"), store=None, wait_seconds: float = 30):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.store = store or IdempotencyStore(
+            max_entries=int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000")),
+            ttl_seconds=float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+        )
+        self.wait_seconds = wait_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        idempotency_key = headers.get(IDEMPOTENCY_HEADER)
+        if not idempotency_key:
+            return await self.app(scope, receive, send)
+        if len(idempotency_key) > MAX_KEY_LENGTH:
+            return await _send_json(send, 400, f"Idempotency-Key is longer than {MAX_KEY_LENGTH} characters")
+        
+        body = await _read_body(receive)
+        fingerprint = hashlib.sha256(body).hexdigest()
+        # An invalid workspace is rejected by the route before anything is stored
+        workspace = headers.get(WORKSPACE_HEADER, b"default").decode("latin-1")
+        key = (workspace, scope["path"], idempotency_key.decode("latin-1"))
+        
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            holder = await self.store.claim(key, fingerprint)
+            if holder is None:
+                break
+            if holder[0] != fingerprint:
+                return await _send_json(send, 422, "Idempotency-Key was already used with a different request body")
+            if holder[1] is not None:
+                return await _replay(send, holder[1])
+            # In flight: wait for it, then replay its response or, if it stored none, run this one
+            if not await self.store.wait(key, deadline - time.monotonic()):
+                return await _send_json(send, 409, "A request with this Idempotency-Key is still in progress")
+        
+        captured = {"status": 500, "headers": [], "body": []}
+        
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                captured["status"] = message["status"]
+                captured["headers"] = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                captured["body"].append(message.get("body", b""))
+            await send(message)
+        
+        stored = False
+        try:
+            await self.app(scope, _replay_body(body, receive), capture_send)
+            status = captured["status"]
+            if status < 300 or 400 <= status < 500:
+                await self.store.complete(key, fingerprint, status, captured["headers"], b"".join(captured["body"]))
+                stored = True
+        finally:
+            if not stored:
+                await self.store.abandon(key)
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+def _replay_body(body: bytes, receive):
+    sent = False
+    
+    async def replay_receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Body already consumed; defer to the connection for disconnects
+        return await receive()
+    return replay_receive
+
+async def _replay(send, stored: StoredResponse) -> None:
+    headers = [h for h in stored.headers if h[0].lower() != b"content-length"]
+    headers += [(b"content-length", str(len(stored.body)).encode()), (b"idempotent-replayed", b"true")]
+    await send({"type": "http.response.start", "status": stored.status, "headers": headers})
+    await send({"type": "http.response.body", "body": stored.body})
+
+async def _send_json(send, status: int, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    })
+    await send({"type": "http.response.body", "body": body})
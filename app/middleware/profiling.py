@@ -0,0 +1,145 @@
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Set
+import hmac
+import os
+import re
+import sys
+import threading
+import uuid
+
+from app.database import install_query_timer
+
+_active: ContextVar[Optional["RequestProfile"]] = ContextVar("active_profile", default=None)
+_timer_installed = False
+
+def _frame_label(code) -> str:
+    # Collapsed-stack format reserves ';' and ' ', so keep labels free of both
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})".replace(" ", "_").replace(";", ",")
+
+def _statement_label(statement: str) -> str:
+    return re.sub(r"\s+", "_", statement.strip())[:80].replace(";", ",")
+
+class RequestProfile:
+    """Stack samples and SQL timings collected for one request.
+
+    Samples and SQL entries are weighted in microseconds, so the collapsed
+    output loads into speedscope or flamegraph.pl as a time-weighted graph.
+    Threads join the profile when they run the request: the event loop
+    thread up front, and threadpool workers when they issue SQL under the
+    request's context.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.threads: Set[int] = {threading.get_ident()}
+        self.stacks: Counter = Counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._sampler.join()
+
+    def record_query(self, statement: str, seconds: float) -> None:
+        self.threads.add(threading.get_ident())
+        self.sql_count += 1
+        self.sql_time += seconds
+        self.stacks[f"[sql];{_statement_label(statement)}"] += int(seconds * 1_000_000)
+
+    def _sample(self) -> None:
+        weight = int(self.interval * 1_000_000)
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in tuple(self.threads):
+                frame = frames.get(thread_id)
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                if labels:
+                    self.stacks[";".join(reversed(labels))] += weight
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {weight}\n" for stack, weight in self.stacks.most_common())
+
+    def server_timing(self) -> str:
+        return f'sql;dur={self.sql_time * 1000:.2f};desc="{self.sql_count} queries"'
+
+def _on_query(statement: str, seconds: float) -> None:
+    profile = _active.get()
+    if profile is not None:
+        profile.record_query(statement, seconds)
+
+class ProfilingMiddleware:
+    """Profiles requests that carry ``X-Profile: 1`` and a valid ``X-Admin-Token``.
+
+    The profile is written as collapsed stacks to ``output_dir`` and named in
+    the ``X-Profile-Id`` response header, with SQL totals in
+    ``Server-Timing``. Only mounted when ``PROFILING_ENABLED=1`` and
+    ``ADMIN_TOKEN`` are set, so disabled deployments carry no middleware and
+    no query listeners. Other requests running concurrently in a worker
+    thread that joined the profile can leak into its samples.
+    """
+
+    def __init__(self, app, token: str, output_dir: str = "profiles", interval: float = 0.001):
+        global _timer_installed
+        self.app = app
+        self.token = token.encode()
+        self.output_dir = Path(output_dir)
+        self.interval = interval
+        if not _timer_installed:
+            install_query_timer(_on_query)
+            _timer_installed = True
+
+    @staticmethod
+    def enabled() -> bool:
+        return os.getenv("PROFILING_ENABLED") == "1" and bool(os.getenv("ADMIN_TOKEN"))
+
+    @classmethod
+    def options_from_env(cls) -> dict:
+        return {
+            "token": os.environ["ADMIN_TOKEN"],
+            "output_dir": os.getenv("PROFILE_DIR", "profiles"),
+            "interval": float(os.getenv("PROFILE_INTERVAL_MS", "1")) / 1000,
+        }
+
+    def _requested(self, scope) -> bool:
+        headers = dict(scope["headers"])
+        if headers.get(b"x-profile") != b"1":
+            return False
+        return hmac.compare_digest(headers.get(b"x-admin-token", b""), self.token)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        profile_id = f"{stamp}-{scope['method'].lower()}-{uuid.uuid4().hex[:8]}"
+        profile = RequestProfile(self.interval)
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile_id.encode()))
+                headers.append((b"server-timing", profile.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _active.set(profile)
+        profile.start()
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            profile.stop()
+            _active.reset(token)
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            (self.output_dir / f"{profile_id}.collapsed").write_text(profile.collapsed())
@@ -0,0 +1,234 @@
+"""Versioned schema management.
+
+Workers only run :func:`ensure_schema`, a single ``SELECT`` against the
+``schema_version`` table. DDL runs through :func:`migrate` (``python -m
+app.cli migrate``), serialised across processes with an advisory lock on
+PostgreSQL and a lock file next to the database on SQLite.
+"""
+from contextlib import contextmanager
+from sqlalchemy import Column, Integer, MetaData, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import Session, SQLModel
+from typing import Callable, Dict, Optional
+import logging
+import os
+
+from app import models  # noqa: F401  (registers every table on SQLModel.metadata)
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 12
+
+# Shard N allocates IDs from N * SHARD_ID_SPAN + 1, so rows moved between
+# shards keep their IDs without colliding. Sized for PostgreSQL's 32-bit
+# serial columns: 21 shards of 100M rows per table.
+SHARD_ID_SPAN = 100_000_000
+_SHARDED_ID_TABLES = ("tasks", "comments", "activity_logs", "task_tombstones")
+
+_version_metadata = MetaData()
+schema_version = Table(
+    "schema_version",
+    _version_metadata,
+    Column("version", Integer, nullable=False)
+)
+
+def _add_column(conn: Connection, table: str, name: str) -> None:
+    """Add a model column to an existing table, if it is not there yet"""
+    inspector = inspect(conn)
+    if not inspector.has_table(table) or name in {c["name"] for c in inspector.get_columns(table)}:
+        return  # Missing tables are created whole afterwards
+    column = SQLModel.metadata.tables[table].c[name]
+    ddl = f"ALTER TABLE {table} ADD COLUMN {name} {column.type.compile(dialect=conn.dialect)}"
+    if column.server_default is not None:
+        default = column.server_default.arg
+        ddl += f" DEFAULT '{default}'" if isinstance(default, str) else f" DEFAULT {default.text}"
+    if not column.nullable:
+        ddl += " NOT NULL"
+    conn.execute(text(ddl))
+
+def _add_task_summaries(conn: Connection) -> None:
+    from app.services.summaries import reconcile_task_summaries
+    
+    for name in ("comment_count", "last_activity_at", "label_ids"):
+        _add_column(conn, "tasks", name)
+    with Session(bind=conn) as session:
+        reconcile_task_summaries(session)
+        session.flush()
+
+def _add_workspace_columns(conn: Connection) -> None:
+    # Existing rows land in the "default" workspace through the server default
+    for table in ("tasks", "task_tombstones"):
+        _add_column(conn, table, "workspace")
+
+def _add_version_columns(conn: Connection) -> None:
+    # Existing rows start at version 1 through the server default
+    for table in ("tasks", "comments", "labels"):
+        _add_column(conn, table, "version")
+
+def _add_status_change_columns(conn: Connection) -> None:
+    # Older rows keep them empty; backfill-analytics parses their descriptions
+    for name in ("old_status", "new_status"):
+        _add_column(conn, "activity_logs", name)
+
+def _scope_labels_to_workspaces(conn: Connection) -> None:
+    """Give labels a workspace; workspaces using a shared label get their own copy"""
+    from app.models import Label, LabelDailyStats, Task, TaskLabel
+    from app.services.summaries import reconcile_task_summaries
+    
+    inspector = inspect(conn)
+    if not inspector.has_table("labels"):
+        return  # Missing tables are created whole afterwards
+    _add_column(conn, "labels", "workspace")
+    if any(index["name"] == "ix_labels_name" and index["unique"] for index in inspector.get_indexes("labels")):
+        # Recreated afterwards as a plain index; names are unique per workspace now
+        conn.execute(text("DROP INDEX ix_labels_name"))
+    if not inspector.has_table("task_labels"):
+        return
+    labels, links, tasks = Label.__table__, TaskLabel.__table__, Task.__table__
+    shared = conn.execute(
+        select(tasks.c.workspace, links.c.label_id).distinct()
+        .join(links, links.c.task_id == tasks.c.id)
+        .where(tasks.c.workspace != "default")
+    ).all()
+    has_rollups = inspector.has_table("label_daily_stats")
+    for workspace, label_id in shared:
+        name, color = conn.execute(select(labels.c.name, labels.c.color).where(labels.c.id == label_id)).one()
+        copy_id = conn.execute(labels.insert().values(workspace=workspace, name=name, color=color)).inserted_primary_key[0]
+        conn.execute(
+            links.update()
+            .where(links.c.label_id == label_id, links.c.task_id.in_(select(tasks.c.id).where(tasks.c.workspace == workspace)))
+            .values(label_id=copy_id)
+        )
+        if has_rollups:
+            rollups = LabelDailyStats.__table__
+            conn.execute(
+                rollups.update()
+                .where(rollups.c.workspace == workspace, rollups.c.label_id == label_id)
+                .values(label_id=copy_id)
+            )
+    if shared:
+        with Session(bind=conn) as session:
+            reconcile_task_summaries(session)
+            session.flush()
+
+def _reserve_id_range(conn: Connection, shard: int) -> None:
+    """Start the shard's ID sequences at its range, unless they are already past it"""
+    floor = shard * SHARD_ID_SPAN
+    if floor == 0:
+        return
+    for table in _SHARDED_ID_TABLES:
+        if conn.dialect.name == "postgresql":
+            sequence = conn.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": table}).scalar()
+            if conn.execute(text(f"SELECT last_value FROM {sequence}")).scalar() < floor:
+                conn.execute(text("SELECT setval(:sequence, :floor)"), {"sequence": sequence, "floor": floor})
+        elif conn.dialect.name == "sqlite":
+            ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :table"), {"table": table}).scalar()
+            if "AUTOINCREMENT" not in (ddl or "").upper():
+                # Plain rowid tables always continue after their largest ID
+                logger.warning("Shard %s: %s predates per-shard ID ranges; moves into it may hit ID collisions", shard, table)
+                continue
+            seq = conn.execute(text("SELECT seq FROM sqlite_sequence WHERE name = :table"), {"table": table}).scalar()
+            if seq is None:
+                conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES (:table, :floor)"), {"table": table, "floor": floor})
+            elif seq < floor:
+                conn.execute(text("UPDATE sqlite_sequence SET seq = :floor WHERE name = :table"), {"table": table, "floor": floor})
+
+# Version -> upgrade step, run in order for databases behind SCHEMA_VERSION.
+# Missing tables and indexes are created after every run, so steps only
+# need to cover what create_all cannot, such as new columns.
+MIGRATIONS: Dict[int, Callable[[Connection], None]] = {
+    1: lambda conn: None,  # Baseline: tables and indexes from the models
+    2: lambda conn: _add_column(conn, "tasks", "overdue_notified_for"),
+    3: lambda conn: None,  # Activity log (created_at, id) composite indexes
+    4: lambda conn: _add_task_summaries(conn),
+    5: lambda conn: _add_workspace_columns(conn),
+    6: lambda conn: _add_version_columns(conn),
+    7: lambda conn: None,  # Comment (task_id, created_at, id) index for the timeline
+    8: lambda conn: None,  # Analytics rollup tables; fill them with `backfill-analytics`
+    9: lambda conn: _add_column(conn, "workspace_shards", "version"),  # ID ranges are reserved by every migrate
+    10: lambda conn: None,  # Idempotency keys shared between workers (IDEMPOTENCY_STORE=database)
+    11: lambda conn: _add_status_change_columns(conn),
+    12: lambda conn: _scope_labels_to_workspaces(conn),
+}
+
+_PG_LOCK_KEY = 0x7A5C0DE
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+def current_version(engine: Engine) -> Optional[int]:
+    """The stamped schema version, or ``None`` for an unmanaged database"""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(select(schema_version.c.version)).scalar()
+    except DBAPIError:
+        return None
+
+def _create_missing(conn: Connection) -> None:
+    SQLModel.metadata.create_all(conn)
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+@contextmanager
+def _migration_lock(engine: Engine):
+    """Hold a cross-process lock so concurrent workers never race on DDL"""
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _PG_LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _PG_LOCK_KEY})
+        return
+    database = engine.url.database
+    try:
+        import fcntl
+    except ImportError:  # Windows: single-process development only
+        fcntl = None
+    if engine.dialect.name != "sqlite" or not database or database == ":memory:" or fcntl is None:
+        yield
+        return
+    with open(f"{database}.migrate.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def migrate(engine: Engine, shard: int = 0) -> int:
+    """Bring the database up to :data:`SCHEMA_VERSION`; returns the version.
+
+    ``shard`` is the database's position in the shard list, which picks the
+    range its IDs are allocated from.
+    """
+    with _migration_lock(engine), engine.begin() as conn:
+        _version_metadata.create_all(conn)
+        version = conn.execute(select(schema_version.c.version)).scalar()
+        if version is not None and version >= SCHEMA_VERSION:
+            return version
+        if version is None and not inspect(conn).has_table("tasks"):
+            # Fresh database: the models already describe the latest schema
+            _create_missing(conn)
+        else:
+            for step in range((version or 0) + 1, SCHEMA_VERSION + 1):
+                MIGRATIONS[step](conn)
+            _create_missing(conn)
+        _reserve_id_range(conn, shard)
+        conn.execute(schema_version.delete())
+        conn.execute(schema_version.insert().values(version=SCHEMA_VERSION))
+    return SCHEMA_VERSION
+
+def ensure_schema(engine: Engine, shard: int = 0) -> None:
+    """Cheap startup check; migrates only when ``AUTO_MIGRATE`` allows it"""
+    version = current_version(engine)
+    if version == SCHEMA_VERSION:
+        return
+    if version is not None and version > SCHEMA_VERSION:
+        raise SchemaOutOfDate(f"Database schema v{version} is newer than this code (v{SCHEMA_VERSION})")
+    if os.getenv("AUTO_MIGRATE", "1") == "0":
+        raise SchemaOutOfDate(
+            f"Database schema is v{version}, expected v{SCHEMA_VERSION}; run `python -m app.cli migrate`"
+        )
+    migrate(engine, shard)
@@ -2,5 +2,12 @@ from app.models.task import Task
 from app.models.comment import Comment
 from app.models.label import Label, TaskLabel
 from app.models.activity_log import ActivityLog
+from app.models.tombstone import TaskTombstone
+from app.models.workspace import WorkspaceShard
+from app.models.idempotency import IdempotencyKey
+from app.models.analytics import DailyTaskStats, LabelDailyStats, TaskCycle
 
-__all__ = ["Task", "Comment", "Label", "TaskLabel", "ActivityLog"]
+__all__ = [
+    "Task", "Comment", "Label", "TaskLabel", "ActivityLog", "TaskTombstone", "WorkspaceShard",
+    "IdempotencyKey", "DailyTaskStats", "LabelDailyStats", "TaskCycle"
+]
@@ -1,12 +1,23 @@
-from sqlmodel import SQLModel, Field, Relationship, Column, Integer, ForeignKey
+from sqlmodel import SQLModel, Field, Relationship, Column, Integer, ForeignKey, Index
 from typing import Optional, TYPE_CHECKING
 from datetime import datetime, timezone
 
+from app.models.task import TaskStatus
+
 if TYPE_CHECKING:
     from app.models.task import Task
 
 class ActivityLog(SQLModel, table=True):
     __tablename__ = "activity_logs"
+    __table_args__ = (
+        # Keyset pagination on (created_at, id), alone and behind each equality filter
+        Index("ix_activity_logs_created_at_id", "created_at", "id"),
+        Index("ix_activity_logs_task_id_created_at_id", "task_id", "created_at", "id"),
+        Index("ix_activity_logs_action_created_at_id", "action", "created_at", "id"),
+        Index("ix_activity_logs_performed_by_created_at_id", "performed_by", "created_at", "id"),
+        # Never reuse IDs; shards allocate from disjoint ranges (see app.migrations)
+        {"sqlite_autoincrement": True},
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     task_id: int = Field(
@@ -19,6 +30,9 @@ class ActivityLog(SQLModel, table=True):
     action: str = Field(max_length=50)
     description: str = Field(max_length=500)
     performed_by: str = Field(max_length=100)
+    # Set on "updated" entries that changed the status; analytics read these, not the description
+    old_status: Optional[TaskStatus] = None
+    new_status: Optional[TaskStatus] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     
     # Relationships
@@ -0,0 +1,33 @@
+from sqlmodel import SQLModel, Field, Index
+from typing import Optional
+from datetime import date, datetime
+
+class DailyTaskStats(SQLModel, table=True):
+    """Tasks created and completed per workspace and UTC day"""
+    __tablename__ = "daily_task_stats"
+    
+    workspace: str = Field(primary_key=True, max_length=64)
+    day: date = Field(primary_key=True)
+    created: int = Field(default=0)
+    completed: int = Field(default=0)
+
+class LabelDailyStats(SQLModel, table=True):
+    """Completions per label, workspace and UTC day (labels as of completion)"""
+    __tablename__ = "label_daily_stats"
+    
+    workspace: str = Field(primary_key=True, max_length=64)
+    label_id: int = Field(primary_key=True)
+    day: date = Field(primary_key=True)
+    completed: int = Field(default=0)
+
+class TaskCycle(SQLModel, table=True):
+    """When a task first went in progress and when it was last completed"""
+    __tablename__ = "task_cycles"
+    __table_args__ = (
+        Index("ix_task_cycles_workspace_completed_at", "workspace", "completed_at"),
+    )
+    
+    task_id: int = Field(primary_key=True)
+    workspace: str = Field(max_length=64)
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
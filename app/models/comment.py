@@ -1,12 +1,20 @@
-from sqlmodel import SQLModel, Field, Relationship, Column, Integer, ForeignKey
+from sqlmodel import SQLModel, Field, Relationship, Column, Integer, ForeignKey, Index
 from typing import Optional, TYPE_CHECKING
 from datetime import datetime, timezone
 
+from app.models.versioned import Versioned
+
 if TYPE_CHECKING:
     from app.models.task import Task
 
-class Comment(SQLModel, table=True):
+class Comment(Versioned, SQLModel, table=True):
     __tablename__ = "comments"
+    __table_args__ = (
+        # Keyset walks of one task's comments, e.g. the merged timeline
+        Index("ix_comments_task_id_created_at_id", "task_id", "created_at", "id"),
+        # Never reuse IDs; shards allocate from disjoint ranges (see app.migrations)
+        {"sqlite_autoincrement": True},
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     content: str = Field(max_length=1000)
@@ -20,6 +28,7 @@ class Comment(SQLModel, table=True):
     )
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
     
     # Relationships
     task: "Task" = Relationship(back_populates="comments")
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, LargeBinary
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime
+
+class IdempotencyKey(SQLModel, table=True):
+    """First response to a POST carrying an ``Idempotency-Key``, shared by every worker.
+
+    Kept on the directory (first) shard. ``status`` stays empty while the
+    first request is still running.
+    """
+    __tablename__ = "idempotency_keys"
+    
+    workspace: str = Field(primary_key=True, max_length=64)
+    path: str = Field(primary_key=True, max_length=255)
+    key: str = Field(primary_key=True, max_length=255)
+    fingerprint: str = Field(max_length=64)
+    status: Optional[int] = None
+    headers: Optional[str] = None  # JSON list of [name, value] pairs
+    body: Optional[bytes] = Field(default=None, sa_column=Column(LargeBinary))
+    expires_at: datetime = Field(index=True)
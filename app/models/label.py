@@ -1,18 +1,29 @@
-from sqlmodel import SQLModel, Field, Relationship, Column, Integer, ForeignKey
+from sqlmodel import SQLModel, Field, Relationship, Column, Integer, ForeignKey, Index
 from typing import Optional, List, TYPE_CHECKING
 
+from app.models.versioned import Versioned
+
 if TYPE_CHECKING:
     from app.models.task import Task
 
-class Label(SQLModel, table=True):
+class Label(Versioned, SQLModel, table=True):
     __tablename__ = "labels"
+    __table_args__ = (
+        # Names are unique within a workspace
+        Index("ix_labels_workspace_name", "workspace", "name", unique=True),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
-    name: str = Field(unique=True, index=True, max_length=50)
+    workspace: str = Field(default="default", max_length=64, sa_column_kwargs={"server_default": "default"})
+    name: str = Field(index=True, max_length=50)
     color: str = Field(default="#808080", max_length=7)
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
     
     # Relationships
-    task_labels: List["TaskLabel"] = Relationship(back_populates="label")
+    task_labels: List["TaskLabel"] = Relationship(
+        back_populates="label",
+        sa_relationship_kwargs={"cascade": "all, delete-orphan", "passive_deletes": True}
+    )
 
 class TaskLabel(SQLModel, table=True):
     __tablename__ = "task_labels"
@@ -1,8 +1,10 @@
-from sqlmodel import SQLModel, Field, Relationship
+from sqlmodel import SQLModel, Field, Relationship, Index, Column, JSON, text
 from typing import Optional, List, TYPE_CHECKING
 from datetime import datetime, timezone
 from enum import Enum
 
+from app.models.versioned import Versioned
+
 if TYPE_CHECKING:
     from app.models.comment import Comment
     from app.models.label import TaskLabel
@@ -18,28 +20,53 @@ class TaskPriority(str, Enum):
     MEDIUM = "medium"
     HIGH = "high"
 
-class Task(SQLModel, table=True):
+class Task(Versioned, SQLModel, table=True):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Partial index for overdue/upcoming queries: open tasks only
+        Index(
+            "ix_tasks_due_date_open",
+            "due_date",
+            postgresql_where=text("status != 'DONE'"),
+            sqlite_where=text("status != 'DONE'")
+        ),
+        # Never reuse IDs; shards allocate from disjoint ranges (see app.migrations)
+        {"sqlite_autoincrement": True},
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
+    # Tenant key; every task of a workspace lives on the same shard
+    workspace: str = Field(default="default", index=True, max_length=64, sa_column_kwargs={"server_default": "default"})
     title: str = Field(index=True, max_length=200)
     description: Optional[str] = None
     status: TaskStatus = Field(default=TaskStatus.TODO, index=True)
     priority: TaskPriority = Field(default=TaskPriority.MEDIUM, index=True)
     due_date: Optional[datetime] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), index=True)
+    # Due date an "overdue" reminder was last emitted for; claimed atomically
+    overdue_notified_for: Optional[datetime] = None
+    
+    # Denormalized summaries for list views, maintained by the write paths
+    comment_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    last_activity_at: Optional[datetime] = None
+    label_ids: List[int] = Field(
+        default_factory=list,
+        sa_column=Column(JSON, nullable=False, server_default=text("'[]'"))
+    )
+    # Bumped by every ORM update; clients echo it back in If-Match
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
     
     # Relationships
     comments: List["Comment"] = Relationship(
         back_populates="task",
-        sa_relationship_kwargs={"cascade": "all, delete-orphan"}
+        sa_relationship_kwargs={"cascade": "all, delete-orphan", "passive_deletes": True}
     )
     task_labels: List["TaskLabel"] = Relationship(
         back_populates="task",
-        sa_relationship_kwargs={"cascade": "all, delete-orphan"}
+        sa_relationship_kwargs={"cascade": "all, delete-orphan", "passive_deletes": True}
     )
     activity_logs: List["ActivityLog"] = Relationship(
         back_populates="task",
-        sa_relationship_kwargs={"cascade": "all, delete-orphan"}
+        sa_relationship_kwargs={"cascade": "all, delete-orphan", "passive_deletes": True}
     )
@@ -0,0 +1,14 @@
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime, timezone
+
+class TaskTombstone(SQLModel, table=True):
+    """Marker left behind by a task deletion so delta sync can report it"""
+    __tablename__ = "task_tombstones"
+    # Never reuse IDs; shards allocate from disjoint ranges (see app.migrations)
+    __table_args__ = {"sqlite_autoincrement": True}
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    task_id: int = Field(index=True)
+    workspace: str = Field(default="default", max_length=64, sa_column_kwargs={"server_default": "default"})
+    deleted_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
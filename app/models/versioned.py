@@ -0,0 +1,13 @@
+from sqlalchemy.orm import declared_attr
+
+class Versioned:
+    """Makes a table model's ``version`` column its ORM version counter.
+
+    Every ORM flush of the row then runs ``UPDATE ... WHERE id = ? AND
+    version = ?`` and bumps the counter; a row changed meanwhile matches
+    nothing and raises ``StaleDataError`` instead of being overwritten.
+    """
+
+    @declared_attr
+    def __mapper_args__(cls):
+        return {"version_id_col": cls.__table__.c.version}
@@ -0,0 +1,18 @@
+from sqlmodel import SQLModel, Field
+from datetime import datetime, timezone
+
+from app.models.versioned import Versioned
+
+class WorkspaceShard(Versioned, SQLModel, table=True):
+    """Which shard holds a workspace's data; kept on the directory (first) shard.
+
+    ``version`` goes up with every placement change, which tells workers
+    polling the row that the workspace's data may have moved.
+    """
+    __tablename__ = "workspace_shards"
+    
+    workspace: str = Field(primary_key=True, max_length=64)
+    shard: int
+    state: str = Field(default="active", max_length=16)  # "frozen" while a move finishes
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
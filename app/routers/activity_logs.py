@@ -1,43 +1,94 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlmodel import Session, select, or_, and_
 from typing import List, Optional
+from datetime import datetime
 
-from app.database import get_session
+from app.database import get_session, get_workspace
 from app.models import ActivityLog, Task
 from app.schemas import ActivityLogRead
+from app.services.counts import exact_count, get_workspace_counts, set_total_count
+from app.services.cursors import InvalidCursor, decode_cursor, encode_cursor, to_utc_naive
+from app.services.rows import fetch_dicts, json_response, lean_select
 
 router = APIRouter(prefix="/activity-logs", tags=["Activity Logs"])
 
+def _page(session: Session, query, response: Response, cursor: Optional[str], skip: int, limit: int):
+    """Newest-first page over (created_at, id); sets X-Next-Cursor when more remain"""
+    if cursor:
+        try:
+            position = decode_cursor(cursor, datetime_keys=("c",))
+            created_at, log_id = position["c"], position["i"]
+        except (InvalidCursor, KeyError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(or_(
+            ActivityLog.created_at < created_at,
+            and_(ActivityLog.created_at == created_at, ActivityLog.id < log_id)
+        ))
+    else:
+        # Legacy OFFSET paging; prefer the cursor for deep pages
+        query = query.offset(skip)
+    
+    query = query.order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc()).limit(limit)
+    logs = fetch_dicts(session, query)
+    if len(logs) == limit:
+        last = logs[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor({"c": to_utc_naive(last["created_at"]), "i": last["id"]})
+    return json_response(logs, response)
+
 @router.get("/", response_model=List[ActivityLogRead])
 def get_activity_logs(
+    response: Response,
     task_id: Optional[int] = Query(None, description="Filter by task ID"),
     action: Optional[str] = Query(None, description="Filter by action type"),
-    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    performed_by: Optional[str] = Query(None, description="Filter by who performed the action"),
+    since: Optional[datetime] = Query(None, description="Only logs created at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only logs created before this time"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    skip: int = Query(0, ge=0, description="Number of records to skip (ignored with cursor)"),
     limit: int = Query(50, ge=1, le=100, description="Maximum number of records"),
+    count: Optional[str] = Query(None, pattern="^(exact|approx)$", description="Report X-Total-Count (exact or approx)"),
+    workspace: str = Depends(get_workspace),
     session: Session = Depends(get_session)
 ):
-    """Get activity logs with optional filters and pagination"""
-    query = select(ActivityLog)
+    """Get activity logs with optional filters and keyset pagination"""
+    query = lean_select(ActivityLog, ActivityLogRead).join(Task).where(Task.workspace == workspace)
     
     # Apply filters
-    if task_id:
+    if task_id is not None:
         query = query.where(ActivityLog.task_id == task_id)
-    if action:
+    if action is not None:
         query = query.where(ActivityLog.action == action)
+    if performed_by is not None:
+        query = query.where(ActivityLog.performed_by == performed_by)
+    if since is not None:
+        query = query.where(ActivityLog.created_at >= to_utc_naive(since))
+    if until is not None:
+        query = query.where(ActivityLog.created_at < to_utc_naive(until))
     
-    # Sort by most recent first
-    query = query.order_by(ActivityLog.created_at.desc())
+    filters = (task_id, action, performed_by, since, until)
     
-    # Apply pagination
-    query = query.offset(skip).limit(limit)
+    def estimate() -> Optional[int]:
+        if any(value is not None for value in filters):
+            return None
+        return get_workspace_counts(session.get_bind()).get_or_count("activity_logs", workspace, lambda: exact_count(session, query))
     
-    logs = session.exec(query).all()
-    return logs
+    # Scoped through the task join, so table-wide planner estimates do not apply
+    set_total_count(
+        response, session, count, query,
+        key=(workspace, *filters),
+        table="activity_logs",
+        unfiltered=False,
+        estimate=estimate
+    )
+    
+    return _page(session, query, response, cursor, skip, limit)
 
 @router.get("/{log_id}", response_model=ActivityLogRead)
-def get_activity_log(log_id: int, session: Session = Depends(get_session)):
+def get_activity_log(log_id: int, workspace: str = Depends(get_workspace), session: Session = Depends(get_session)):
     """Get a single activity log by ID"""
-    log = session.get(ActivityLog, log_id)
+    log = session.exec(
+        select(ActivityLog).join(Task).where(ActivityLog.id == log_id, Task.workspace == workspace)
+    ).first()
     if not log:
         raise HTTPException(status_code=404, detail="Activity log not found")
     
@@ -46,19 +97,18 @@ def get_activity_log(log_id: int, session: Session = Depends(get_session)):
 @router.get("/task/{task_id}", response_model=List[ActivityLogRead])
 def get_task_activity_logs(
     task_id: int,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
+    workspace: str = Depends(get_workspace),
     session: Session = Depends(get_session)
 ):
     """Get all activity logs for a specific task"""
     # Verify task exists
     task = session.get(Task, task_id)
-    if not task:
+    if not task or task.workspace != workspace:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    query = select(ActivityLog).where(ActivityLog.task_id == task_id)
-    query = query.order_by(ActivityLog.created_at.desc())
-    query = query.offset(skip).limit(limit)
-    
-    logs = session.exec(query).all()
-    return logs
+    query = lean_select(ActivityLog, ActivityLogRead).where(ActivityLog.task_id == task_id)
+    return _page(session, query, response, cursor, skip, limit)
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from sqlmodel import Session
+from typing import Optional
+import hmac
+import os
+
+from app.database import get_session
+from app.services.backup import BackupError, BackupThrottle, take_backup
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Admin routes exist only when ADMIN_TOKEN is configured"""
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin_token)])
+
+@router.post("/backup")
+def create_backup(request: Request, session: Session = Depends(get_session)):
+    """Snapshot the live database into BACKUP_DIR, throttled by current API latency"""
+    admission = getattr(request.app.state, "admission", None)
+    throttle = BackupThrottle.from_env(admission.interactive_latency if admission else None)
+    try:
+        return take_backup(session.get_bind(), throttle=throttle)
+    except BackupError as exc:
+        raise HTTPException(status_code=501, detail=str(exc))
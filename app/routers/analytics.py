@@ -0,0 +1,94 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session, select, func
+from typing import List, Optional, Tuple
+from datetime import date, datetime, time, timedelta, timezone
+
+from app.database import get_session, get_workspace
+from app.models import DailyTaskStats, Label, LabelDailyStats, TaskCycle
+from app.schemas import CycleTimeSummary, DailyThroughput, LabelThroughput
+from app.services.analytics import hours_between, percentile
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+DEFAULT_RANGE_DAYS = 30
+MAX_RANGE_DAYS = 366
+
+def _days(since: Optional[date], until: Optional[date]) -> Tuple[date, date]:
+    """Inclusive UTC day range, defaulting to the last 30 days"""
+    until = until or datetime.now(timezone.utc).date()
+    since = since or until - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    if since > until:
+        raise HTTPException(status_code=400, detail="since must not be after until")
+    if (until - since).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_RANGE_DAYS} days")
+    return since, until
+
+@router.get("/throughput", response_model=List[DailyThroughput])
+def get_throughput(
+    since: Optional[date] = Query(None, description="First UTC day (default: 30 days before until)"),
+    until: Optional[date] = Query(None, description="Last UTC day, inclusive (default: today)"),
+    workspace: str = Depends(get_workspace),
+    session: Session = Depends(get_session)
+):
+    """Tasks created and completed per day, with empty days filled in"""
+    since, until = _days(since, until)
+    rows = session.exec(
+        select(DailyTaskStats.day, DailyTaskStats.created, DailyTaskStats.completed)
+        .where(DailyTaskStats.workspace == workspace, DailyTaskStats.day >= since, DailyTaskStats.day <= until)
+    ).all()
+    by_day = {day: (created, completed) for day, created, completed in rows}
+    
+    throughput = []
+    for offset in range((until - since).days + 1):
+        day = since + timedelta(days=offset)
+        created, completed = by_day.get(day, (0, 0))
+        throughput.append({"day": day, "created": created, "completed": completed})
+    return throughput
+
+@router.get("/labels", response_model=List[LabelThroughput])
+def get_label_throughput(
+    since: Optional[date] = Query(None, description="First UTC day (default: 30 days before until)"),
+    until: Optional[date] = Query(None, description="Last UTC day, inclusive (default: today)"),
+    workspace: str = Depends(get_workspace),
+    session: Session = Depends(get_session)
+):
+    """Tasks completed per label, busiest first; a task counts once for each label it had when done"""
+    since, until = _days(since, until)
+    completed = func.sum(LabelDailyStats.completed)
+    rows = session.exec(
+        select(LabelDailyStats.label_id, Label.name, completed)
+        .outerjoin(Label, Label.id == LabelDailyStats.label_id)
+        .where(LabelDailyStats.workspace == workspace, LabelDailyStats.day >= since, LabelDailyStats.day <= until)
+        .group_by(LabelDailyStats.label_id, Label.name)
+        .order_by(completed.desc(), LabelDailyStats.label_id)
+    ).all()
+    return [{"label_id": label_id, "name": name, "completed": total} for label_id, name, total in rows]
+
+@router.get("/cycle-time", response_model=CycleTimeSummary)
+def get_cycle_time(
+    since: Optional[date] = Query(None, description="First UTC day of completion (default: 30 days before until)"),
+    until: Optional[date] = Query(None, description="Last UTC day of completion, inclusive (default: today)"),
+    workspace: str = Depends(get_workspace),
+    session: Session = Depends(get_session)
+):
+    """Hours from first going in progress to done, for tasks completed in the range"""
+    since, until = _days(since, until)
+    rows = session.exec(
+        select(TaskCycle.started_at, TaskCycle.completed_at).where(
+            TaskCycle.workspace == workspace,
+            TaskCycle.started_at.is_not(None),
+            TaskCycle.completed_at >= datetime.combine(since, time.min),
+            TaskCycle.completed_at < datetime.combine(until + timedelta(days=1), time.min)
+        )
+    ).all()
+    hours = sorted(hours_between(started_at, completed_at) for started_at, completed_at in rows)
+    
+    return {
+        "since": since,
+        "until": until,
+        "tasks": len(hours),
+        "average_hours": sum(hours) / len(hours) if hours else None,
+        "p50_hours": percentile(hours, 0.5),
+        "p85_hours": percentile(hours, 0.85),
+        "max_hours": hours[-1] if hours else None,
+    }
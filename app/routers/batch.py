@@ -0,0 +1,111 @@
+from contextlib import nullcontext
+from fastapi import APIRouter, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session
+from typing import Any, Dict, List, Set
+import logging
+
+from app.database import get_session, get_workspace, nestable_connection
+from app.schemas import BatchRequest, BatchResponse, BatchResult
+from app.services.activity import publish_with
+from app.services.batch import UnresolvedReference, allowed_path, dispatch, resolve_references
+from app.services.cache import invalidate_tasks, uncommitted_writes
+from app.services.local_state import repair_tasks
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["Batch"])
+
+def _task_ids(results: List[BatchResult]) -> Set[int]:
+    # Tasks the batch created or changed, as far as its results tell
+    ids = set()
+    for result in results:
+        if isinstance(result.body, dict):
+            for key in ("id", "task_id"):
+                if isinstance(result.body.get(key), int):
+                    ids.add(result.body[key])
+            ids.update(task_id for task_id in result.body.get("task_ids") or () if isinstance(task_id, int))
+    return ids
+
+@router.post("/batch", response_model=BatchResponse)
+async def run_batch(
+    batch: BatchRequest,
+    request: Request,
+    workspace: str = Depends(get_workspace),
+    session: Session = Depends(get_session)
+):
+    """Run task, comment and label operations in order, in one request and one session.
+
+    ``"$ref.field"`` in a path, query or body is replaced with that field of
+    the result of the operation named ``ref``. With ``atomic`` every
+    operation runs in one transaction, and the first failure rolls all of
+    them back; otherwise each operation commits on its own and a failed one
+    does not stop the rest.
+    """
+    if batch.atomic:
+        # Route commits only release savepoints; the batch commits at the end
+        connection = await run_in_threadpool(nestable_connection, session)
+        operations_session = Session(bind=connection, join_transaction_mode="create_savepoint")
+        publish_with(operations_session, session)
+        tracking = uncommitted_writes(connection)
+    else:
+        operations_session = session
+        tracking = nullcontext(set())
+
+    results: List[BatchResult] = []
+    outputs: Dict[str, Any] = {}
+    failed = False
+    try:
+        with tracking as touched:
+            for operation in batch.operations:
+                if failed and batch.atomic:
+                    results.append(BatchResult(ref=operation.ref, status=424, body={"detail": "Not run: an earlier operation failed"}))
+                    continue
+                try:
+                    path = resolve_references(operation.path, outputs)
+                    query = resolve_references(operation.query, outputs)
+                    body = resolve_references(operation.body, outputs)
+                except UnresolvedReference as exc:
+                    result = BatchResult(ref=operation.ref, status=424, body={"detail": f"Cannot resolve {exc}: no such earlier result"})
+                else:
+                    if not allowed_path(path.split("?")[0]):
+                        result = BatchResult(ref=operation.ref, status=400, body={"detail": f"{path} cannot be batched"})
+                    else:
+                        # The batch's workspace applies to every operation
+                        headers = [(b"x-workspace", workspace.encode())] + [
+                            (name.lower().encode("latin-1"), value.encode("latin-1"))
+                            for name, value in operation.headers.items()
+                            if name.lower() not in ("x-workspace", "content-type", "content-length")
+                        ]
+                        try:
+                            status, response_headers, content = await dispatch(
+                                request, operations_session, operation.method, path, query, body, headers
+                            )
+                        except Exception:
+                            logger.exception("Batch operation %s %s failed", operation.method, path)
+                            status, response_headers, content = 500, {}, {"detail": "Internal Server Error"}
+                        result = BatchResult(ref=operation.ref, status=status, headers=response_headers, body=content)
+
+                if result.status >= 400:
+                    failed = True
+                    if not batch.atomic:
+                        # Drop whatever the failed operation left uncommitted
+                        await run_in_threadpool(operations_session.rollback)
+                elif operation.ref:
+                    outputs[operation.ref] = result.body
+                results.append(result)
+    finally:
+        if batch.atomic:
+            await run_in_threadpool(operations_session.close)
+
+    committed = not (batch.atomic and failed)
+    if batch.atomic:
+        await run_in_threadpool(session.commit if committed else session.rollback)
+        touched |= _task_ids(results)
+        if committed:
+            # Readers may have cached these tasks between a route's invalidation and the commit
+            invalidate_tasks(session.get_bind(), touched)
+        else:
+            # Index, reminders and caches saw the rolled-back writes as committed
+            await run_in_threadpool(repair_tasks, session.get_bind(), touched)
+    return {"committed": committed, "results": results}
@@ -1,30 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlmodel import Session, select
-from typing import List
+from typing import List, Optional
 from datetime import datetime, timezone
 
-from app.database import get_session
-from app.models import Comment, Task, ActivityLog
+from app.database import get_session, get_workspace
+from app.models import Comment, Task
 from app.schemas import CommentCreate, CommentUpdate, CommentRead
+from app.services.activity import log_activity
+from app.services.cache import invalidate_tasks
+from app.services.counts import exact_count, get_workspace_counts, set_total_count
+from app.services.rows import fetch_dicts, json_response, lean_select
+from app.services.summaries import record_comment_change
+from app.services.versions import check_version, commit_versioned, etag, if_match_version
 
 router = APIRouter(prefix="/comments", tags=["Comments"])
 
-def log_activity(session: Session, task_id: int, action: str, description: str, performed_by: str = "system"):
-    """Helper function to log task activities"""
-    activity = ActivityLog(
-        task_id=task_id,
-        action=action,
-        description=description,
-        performed_by=performed_by
-    )
-    session.add(activity)
+def _get_comment(session: Session, comment_id: int, workspace: str) -> Comment:
+    # Comments belong to the workspace of their task
+    comment = session.exec(
+        select(Comment).join(Task).where(Comment.id == comment_id, Task.workspace == workspace)
+    ).first()
+    if not comment:
+        raise HTTPException(status_code=404, detail="Comment not found")
+    return comment
 
 @router.post("/", response_model=CommentRead, status_code=201)
-def create_comment(comment_data: CommentCreate, session: Session = Depends(get_session)):
+def create_comment(
+    comment_data: CommentCreate,
+    workspace: str = Depends(get_workspace),
+    session: Session = Depends(get_session)
+):
     """Create a new comment on a task"""
     # Verify task exists
     task = session.get(Task, comment_data.task_id)
-    if not task:
+    if not task or task.workspace != workspace:
         raise HTTPException(status_code=404, detail="Task not found")
     
     # Create comment
@@ -34,41 +43,73 @@ def create_comment(comment_data: CommentCreate, session: Session = Depends(get_s
         task_id=comment_data.task_id
     )
     session.add(comment)
+    record_comment_change(session, comment_data.task_id, 1)
     session.commit()
     session.refresh(comment)
     
     # Log activity
     log_activity(session, task.id, "comment_added", f"Comment added by {comment.author}")
     session.commit()
+    invalidate_tasks(session.get_bind(), [comment.task_id])
+    get_workspace_counts(session.get_bind()).add("comments", workspace, 1)
     
     return comment
 
 @router.get("/", response_model=List[CommentRead])
-def get_comments(task_id: int = None, session: Session = Depends(get_session)):
+def get_comments(
+    response: Response,
+    task_id: int = None,
+    count: Optional[str] = Query(None, pattern="^(exact|approx)$", description="Report X-Total-Count (exact or approx)"),
+    workspace: str = Depends(get_workspace),
+    session: Session = Depends(get_session)
+):
     """Get all comments, optionally filtered by task_id"""
-    query = select(Comment)
+    query = lean_select(Comment, CommentRead).join(Task).where(Task.workspace == workspace)
     
     if task_id:
         query = query.where(Comment.task_id == task_id)
     
-    comments = session.exec(query).all()
-    return comments
+    def estimate() -> Optional[int]:
+        if task_id:
+            # The task's denormalized summary
+            return session.exec(select(Task.comment_count).where(Task.id == task_id, Task.workspace == workspace)).first()
+        return get_workspace_counts(session.get_bind()).get_or_count("comments", workspace, lambda: exact_count(session, query))
+    
+    # Scoped through the task join, so table-wide planner estimates do not apply
+    set_total_count(
+        response, session, count, query,
+        key=(workspace, task_id),
+        table="comments",
+        unfiltered=False,
+        estimate=estimate
+    )
+    
+    return json_response(fetch_dicts(session, query), response)
 
 @router.get("/{comment_id}", response_model=CommentRead)
-def get_comment(comment_id: int, session: Session = Depends(get_session)):
+def get_comment(
+    comment_id: int,
+    response: Response,
+    workspace: str = Depends(get_workspace),
+    session: Session = Depends(get_session)
+):
     """Get a single comment by ID"""
-    comment = session.get(Comment, comment_id)
-    if not comment:
-        raise HTTPException(status_code=404, detail="Comment not found")
-    
+    comment = _get_comment(session, comment_id, workspace)
+    response.headers["ETag"] = etag(comment.version)
     return comment
 
 @router.patch("/{comment_id}", response_model=CommentRead)
-def update_comment(comment_id: int, comment_data: CommentUpdate, session: Session = Depends(get_session)):
-    """Update a comment"""
-    comment = session.get(Comment, comment_id)
-    if not comment:
-        raise HTTPException(status_code=404, detail="Comment not found")
+def update_comment(
+    comment_id: int,
+    comment_data: CommentUpdate,
+    response: Response,
+    expected_version: Optional[int] = Depends(if_match_version),
+    workspace: str = Depends(get_workspace),
+    session: Session = Depends(get_session)
+):
+    """Update a comment; the write only applies to the version that was read"""
+    comment = _get_comment(session, comment_id, workspace)
+    check_version(comment, expected_version, "Comment")
     
     # Update fields
     update_data = comment_data.model_dump(exclude_unset=True)
@@ -79,30 +120,40 @@ def update_comment(comment_id: int, comment_data: CommentUpdate, session: Sessio
     comment.updated_at = datetime.now(timezone.utc)
     
     session.add(comment)
-    session.commit()
+    commit_versioned(session, "Comment")
     session.refresh(comment)
     
-    # Log activity
+    # Log activity; the task changes with its comments
+    record_comment_change(session, comment.task_id)
     log_activity(session, comment.task_id, "comment_updated", f"Comment updated by {comment.author}")
     session.commit()
+    invalidate_tasks(session.get_bind(), [comment.task_id])
     
+    response.headers["ETag"] = etag(comment.version)
     return comment
 
 @router.delete("/{comment_id}", status_code=204)
-def delete_comment(comment_id: int, session: Session = Depends(get_session)):
+def delete_comment(
+    comment_id: int,
+    expected_version: Optional[int] = Depends(if_match_version),
+    workspace: str = Depends(get_workspace),
+    session: Session = Depends(get_session)
+):
     """Delete a comment"""
-    comment = session.get(Comment, comment_id)
-    if not comment:
-        raise HTTPException(status_code=404, detail="Comment not found")
+    comment = _get_comment(session, comment_id, workspace)
+    check_version(comment, expected_version, "Comment")
     
     task_id = comment.task_id
     author = comment.author
     
     session.delete(comment)
-    session.commit()
+    record_comment_change(session, task_id, -1)
+    commit_versioned(session, "Comment")
     
     # Log activity
     log_activity(session, task_id, "comment_deleted", f"Comment deleted by {author}")
     session.commit()
+    invalidate_tasks(session.get_bind(), [task_id])
+    get_workspace_counts(session.get_bind()).add("comments", workspace, -1)
     
     return None
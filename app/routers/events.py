@@ -0,0 +1,119 @@
+from fastapi import APIRouter, Depends, Header, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+from typing import Any, AsyncIterator, Dict, List, Optional
+import json
+
+from app.database import get_bind, get_workspace
+from app.models import ActivityLog, Task
+from app.schemas import ActivityLogRead
+from app.services.events import broadcaster
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+KEEPALIVE_SECONDS = 15
+REPLAY_PAGE_SIZE = 1000
+
+def _replay(
+    bind: Engine,
+    workspace: str,
+    task_id: Optional[int],
+    after_id: Optional[int],
+    limit: int = REPLAY_PAGE_SIZE
+) -> List[Dict[str, Any]]:
+    """One page of the workspace's activity written after ``after_id``, oldest first.
+
+    Each page is read in its own short session, so a stream never holds a
+    pooled connection while it waits for live events.
+    """
+    if after_id is None:
+        return []
+    query = select(ActivityLog).join(Task).where(ActivityLog.id > after_id, Task.workspace == workspace)
+    if task_id is not None:
+        query = query.where(ActivityLog.task_id == task_id)
+    query = query.order_by(ActivityLog.id).limit(limit)
+    with Session(bind) as session:
+        return [ActivityLogRead.model_validate(log).model_dump(mode="json") for log in session.exec(query)]
+
+def _parse_event_id(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+def _format_sse(activity: Dict[str, Any]) -> str:
+    return f"id: {activity['id']}\nevent: activity\ndata: {json.dumps(activity)}\n\n"
+
+async def _activity_feed(
+    bind: Engine,
+    workspace: str,
+    task_id: Optional[int],
+    last_event_id: Optional[int]
+) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """Replay missed activity, then follow live events; yields ``None`` on idle timeouts"""
+    # Subscribe before replaying so nothing written in between is lost
+    subscription = broadcaster.subscribe(workspace, task_id)
+    try:
+        last_sent = last_event_id or 0
+        if last_event_id is not None:
+            # Page through the backlog until it meets the subscription
+            while True:
+                page = await run_in_threadpool(_replay, bind, workspace, task_id, last_sent, REPLAY_PAGE_SIZE)
+                for activity in page:
+                    last_sent = activity["id"]
+                    yield activity
+                if len(page) < REPLAY_PAGE_SIZE:
+                    break
+        while not subscription.overflowed:
+            activity = await subscription.get(timeout=KEEPALIVE_SECONDS)
+            if activity is not None and activity["id"] <= last_sent:
+                continue
+            if activity is not None:
+                last_sent = activity["id"]
+            yield activity
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    task_id: Optional[int] = Query(None, description="Only stream activity for this task"),
+    last_event_id: Optional[str] = Header(None, description="Resume after this activity log ID"),
+    workspace: str = Depends(get_workspace),
+    bind: Engine = Depends(get_bind)
+):
+    """Server-sent events feed of the workspace's activity logs as they are written"""
+    async def body():
+        yield "retry: 3000\n\n"
+        async for activity in _activity_feed(bind, workspace, task_id, _parse_event_id(last_event_id)):
+            if activity is None:
+                if await request.is_disconnected():
+                    break
+                yield ": keepalive\n\n"
+            else:
+                yield _format_sse(activity)
+    
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/ws")
+async def websocket_events(
+    websocket: WebSocket,
+    task_id: Optional[int] = Query(None),
+    last_event_id: Optional[str] = Query(None),
+    workspace: str = Depends(get_workspace),
+    bind: Engine = Depends(get_bind)
+):
+    """WebSocket variant of the activity feed"""
+    await websocket.accept()
+    try:
+        async for activity in _activity_feed(bind, workspace, task_id, _parse_event_id(last_event_id)):
+            if activity is not None:
+                await websocket.send_json(activity)
+    except WebSocketDisconnect:
+        pass
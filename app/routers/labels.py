@@ -1,80 +1,126 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
-from typing import List
+from typing import List, Optional
 
-from app.database import get_session
-from app.models import Label
+from app.database import get_session, get_workspace
+from app.models import Label, Task, TaskLabel
 from app.schemas import LabelCreate, LabelUpdate, LabelRead
+from app.services.cache import invalidate_tasks
+from app.services.label_names import get_label_directory
+from app.services.rows import fetch_dicts, json_response, lean_select
+from app.services.task_index import get_task_index
+from app.services.versions import check_version, commit_versioned, etag, if_match_version
 
 router = APIRouter(prefix="/labels", tags=["Labels"])
 
 @router.post("/", response_model=LabelRead, status_code=201)
-def create_label(label_data: LabelCreate, session: Session = Depends(get_session)):
-    """Create a new label"""
-    # Check if label with same name exists
-    existing = session.exec(select(Label).where(Label.name == label_data.name)).first()
-    if existing:
-        raise HTTPException(status_code=409, detail="Label with this name already exists")
-    
-    # Create label
+def create_label(
+    label_data: LabelCreate,
+    workspace: str = Depends(get_workspace),
+    session: Session = Depends(get_session)
+):
+    """Create a new label in the request's workspace"""
     label = Label(
         name=label_data.name,
-        color=label_data.color
+        color=label_data.color,
+        workspace=workspace
     )
     session.add(label)
-    session.commit()
+    _commit_unique_name(session)
     session.refresh(label)
+    get_label_directory(session.get_bind()).put(label.id, workspace, label.name)
     
     return label
 
+def _commit_unique_name(session: Session) -> None:
+    # The unique (workspace, name) index decides races; no SELECT-then-INSERT
+    try:
+        commit_versioned(session, "Label")
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(status_code=409, detail="Label with this name already exists")
+
+def _get_label(session: Session, label_id: int, workspace: str) -> Label:
+    label = session.get(Label, label_id)
+    if not label or label.workspace != workspace:
+        raise HTTPException(status_code=404, detail="Label not found")
+    return label
+
 @router.get("/", response_model=List[LabelRead])
-def get_labels(session: Session = Depends(get_session)):
-    """Get all labels"""
-    labels = session.exec(select(Label)).all()
-    return labels
+def get_labels(workspace: str = Depends(get_workspace), session: Session = Depends(get_session)):
+    """Get all labels of the request's workspace"""
+    return json_response(fetch_dicts(session, lean_select(Label, LabelRead).where(Label.workspace == workspace)))
 
 @router.get("/{label_id}", response_model=LabelRead)
-def get_label(label_id: int, session: Session = Depends(get_session)):
+def get_label(
+    label_id: int,
+    response: Response,
+    workspace: str = Depends(get_workspace),
+    session: Session = Depends(get_session)
+):
     """Get a single label by ID"""
-    label = session.get(Label, label_id)
-    if not label:
-        raise HTTPException(status_code=404, detail="Label not found")
+    label = _get_label(session, label_id, workspace)
     
+    response.headers["ETag"] = etag(label.version)
     return label
 
 @router.patch("/{label_id}", response_model=LabelRead)
-def update_label(label_id: int, label_data: LabelUpdate, session: Session = Depends(get_session)):
-    """Update a label"""
-    label = session.get(Label, label_id)
-    if not label:
-        raise HTTPException(status_code=404, detail="Label not found")
-    
-    # Check name uniqueness if updating name
-    update_data = label_data.model_dump(exclude_unset=True)
-    if "name" in update_data and update_data["name"] != label.name:
-        existing = session.exec(select(Label).where(Label.name == update_data["name"])).first()
-        if existing:
-            raise HTTPException(status_code=409, detail="Label with this name already exists")
+def update_label(
+    label_id: int,
+    label_data: LabelUpdate,
+    response: Response,
+    expected_version: Optional[int] = Depends(if_match_version),
+    workspace: str = Depends(get_workspace),
+    session: Session = Depends(get_session)
+):
+    """Update a label; the write only applies to the version that was read"""
+    label = _get_label(session, label_id, workspace)
+    check_version(label, expected_version, "Label")
     
     # Update fields
+    update_data = label_data.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         if value is not None:
             setattr(label, key, value)
     
     session.add(label)
-    session.commit()
+    _commit_unique_name(session)
     session.refresh(label)
+    get_label_directory(session.get_bind()).put(label.id, workspace, label.name)
     
+    # Task details embed the label
+    invalidate_tasks(session.get_bind(), get_task_index(session.get_bind()).tasks_with_label(label_id))
+    
+    response.headers["ETag"] = etag(label.version)
     return label
 
 @router.delete("/{label_id}", status_code=204)
-def delete_label(label_id: int, session: Session = Depends(get_session)):
+def delete_label(
+    label_id: int,
+    expected_version: Optional[int] = Depends(if_match_version),
+    workspace: str = Depends(get_workspace),
+    session: Session = Depends(get_session)
+):
     """Delete a label"""
-    label = session.get(Label, label_id)
-    if not label:
-        raise HTTPException(status_code=404, detail="Label not found")
+    label = _get_label(session, label_id, workspace)
+    check_version(label, expected_version, "Label")
+    
+    # Keep the denormalized label_ids of affected tasks in the same transaction;
+    # updated_at lets delta sync and other workers' indexes pick the change up
+    now = datetime.now(timezone.utc)
+    for task in session.exec(select(Task).join(TaskLabel).where(TaskLabel.label_id == label_id)):
+        task.label_ids = [other for other in task.label_ids if other != label_id]
+        task.updated_at = now
+        session.add(task)
     
     session.delete(label)
-    session.commit()
+    commit_versioned(session, "Label")
+    
+    index = get_task_index(session.get_bind())
+    invalidate_tasks(session.get_bind(), index.tasks_with_label(label_id))
+    index.remove_label(label_id)
+    get_label_directory(session.get_bind()).remove(label_id)
     
     return None
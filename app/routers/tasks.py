@@ -1,50 +1,94 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session, select
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, func, select, update, or_, and_
+from itertools import groupby
 from typing import List, Optional
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+import re
 
-from app.database import get_session
-from app.models import Task, TaskLabel, Label, ActivityLog
-from app.schemas import TaskCreate, TaskUpdate, TaskRead, TaskReadWithRelations
+from app.database import get_session, get_workspace
+from app.models import Task, TaskLabel, Label, TaskTombstone, Comment, ActivityLog
+from app.models.task import TaskStatus
+from app.schemas import (
+    TaskCreate, TaskUpdate, TaskRead, TaskReadWithRelations, TaskReadEmbedded, TaskChanges,
+    TaskBulkUpdate, TaskBulkResult, TaskImportJob, CommentRead, LabelRead, ActivityLogRead
+)
+from app.services.activity import log_activities, log_activity
+from app.services.cache import get_task_cache, invalidate_tasks, reads_uncommitted
+from app.services.counts import set_total_count
+from app.services.cursors import InvalidCursor, decode_cursor, encode_cursor, to_utc_naive
+from app.services.importer import RequestBodyReader, get_import_jobs, run_import
+from app.services.label_names import UnknownLabels, get_label_directory
+from app.services.purge import PURGING_WORKSPACE, purge_task
+from app.services.reminders import get_reminder_scheduler
+from app.services.rows import fetch_dicts, json_response, lean_select
+from app.services.task_index import get_task_index
+from app.services.timeline import TIMELINE_CHUNK_SIZE, decode_position, stream_timeline
+from app.services.versions import check_version, commit_versioned, etag, if_match_version
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
-def log_activity(session: Session, task_id: int, action: str, description: str, performed_by: str = "system"):
-    """Helper function to log task activities"""
-    activity = ActivityLog(
-        task_id=task_id,
-        action=action,
-        description=description,
-        performed_by=performed_by
-    )
-    session.add(activity)
+def _requested_label_ids(
+    session: Session,
+    workspace: str,
+    label_ids: Optional[List[int]],
+    label_names: Optional[List[str]],
+    create_labels: bool
+) -> Optional[List[int]]:
+    """Combine numeric label IDs with label names resolved through the directory"""
+    if label_ids is None and label_names is None:
+        return None
+    resolved = list(label_ids or [])
+    if label_names:
+        try:
+            resolved += get_label_directory(session.get_bind()).resolve(
+                session, workspace, label_names, create_missing=create_labels
+            )
+        except UnknownLabels as exc:
+            raise HTTPException(status_code=404, detail=str(exc))
+    return list(dict.fromkeys(resolved))
 
 @router.post("/", response_model=TaskRead, status_code=201)
-def create_task(task_data: TaskCreate, session: Session = Depends(get_session)):
+def create_task(
+    task_data: TaskCreate,
+    create_labels: bool = Query(False, description="Create labels named in label_names that do not exist yet"),
+    workspace: str = Depends(get_workspace),
+    session: Session = Depends(get_session)
+):
     """Create a new task with optional labels"""
+    label_ids = _requested_label_ids(session, workspace, task_data.label_ids, task_data.label_names, create_labels)
+    
     # Create task
     task = Task(
         title=task_data.title,
         description=task_data.description,
         status=task_data.status,
         priority=task_data.priority,
-        due_date=task_data.due_date
+        due_date=task_data.due_date,
+        workspace=workspace
     )
     session.add(task)
     session.commit()
     session.refresh(task)
     
+    index = get_task_index(session.get_bind())
+    index.set_task(task.id, task.status, task.priority, [], workspace)
+    get_reminder_scheduler(session.get_bind()).schedule(task.id, task.due_date, task.status)
+    
     # Add labels if provided
-    if task_data.label_ids:
-        for label_id in task_data.label_ids:
+    if label_ids:
+        for label_id in label_ids:
             # Verify label exists
             label = session.get(Label, label_id)
-            if not label:
+            if not label or label.workspace != workspace:
                 raise HTTPException(status_code=404, detail=f"Label with id {label_id} not found")
             
             task_label = TaskLabel(task_id=task.id, label_id=label_id)
             session.add(task_label)
+        task.label_ids = sorted(label_ids)
         session.commit()
+        index.set_task(task.id, task.status, task.priority, label_ids)
     
     # Log activity
     log_activity(session, task.id, "created", f"Task '{task.title}' created")
@@ -52,19 +96,105 @@ def create_task(task_data: TaskCreate, session: Session = Depends(get_session)):
     
     return task
 
-@router.get("/", response_model=List[TaskRead])
+EMBEDDABLE = ("comments", "labels", "latest_activity")
+
+# Above this many bitmap matches, filter label sets in SQL rather than binding every ID
+BITMAP_ID_LIST_LIMIT = 1000
+
+def _label_set_filter(query, label_all: Optional[List[int]], label_any: Optional[List[int]], label_none: Optional[List[int]]):
+    def carrying(label_ids):
+        return Task.id.in_(select(TaskLabel.task_id).where(TaskLabel.label_id.in_(label_ids)))
+    
+    for label_id in label_all or []:
+        query = query.where(carrying([label_id]))
+    if label_any:
+        query = query.where(carrying(label_any))
+    if label_none:
+        query = query.where(~carrying(label_none))
+    return query
+
+def _parse_include(include: Optional[str]) -> set:
+    requested = {part.strip() for part in (include or "").split(",") if part.strip()}
+    unknown = requested - set(EMBEDDABLE)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown include: {', '.join(sorted(unknown))}; choose from {', '.join(EMBEDDABLE)}"
+        )
+    return requested
+
+def _ranked(model, order_by, task_ids: List[int], cap: int):
+    # Newest rows per task via ROW_NUMBER, so the cap holds in one query for the whole page
+    rank = func.row_number().over(partition_by=model.task_id, order_by=order_by).label("rank")
+    ranked = select(model.id, rank).where(model.task_id.in_(task_ids)).subquery()
+    return (
+        select(model)
+        .join(ranked, ranked.c.id == model.id)
+        .where(ranked.c.rank <= cap)
+        .order_by(model.task_id, *order_by)
+    )
+
+def _embed_relations(session: Session, items: List[dict], include: set, comments_limit: int) -> List[dict]:
+    """Attach requested relations to task rows with one batched query per relation"""
+    task_ids = [item["id"] for item in items]
+    
+    if "labels" in include:
+        # label_ids is denormalized on the task, so labels need no join
+        wanted = {label_id for item in items for label_id in item["label_ids"]}
+        labels = {}
+        if wanted:
+            labels = {
+                label.id: LabelRead.model_validate(label).model_dump()
+                for label in session.exec(select(Label).where(Label.id.in_(wanted)))
+            }
+        for item in items:
+            item["labels"] = [labels[label_id] for label_id in item["label_ids"] if label_id in labels]
+    
+    if "comments" in include:
+        comments = {task_id: [] for task_id in task_ids}
+        if task_ids:
+            query = _ranked(Comment, (Comment.created_at.desc(), Comment.id.desc()), task_ids, comments_limit)
+            for comment in session.exec(query):
+                comments[comment.task_id].append(CommentRead.model_validate(comment).model_dump())
+        for item in items:
+            item["comments"] = comments[item["id"]]
+    
+    if "latest_activity" in include:
+        latest = {}
+        if task_ids:
+            query = _ranked(ActivityLog, (ActivityLog.created_at.desc(), ActivityLog.id.desc()), task_ids, 1)
+            latest = {
+                activity.task_id: ActivityLogRead.model_validate(activity).model_dump()
+                for activity in session.exec(query)
+            }
+        for item in items:
+            item["latest_activity"] = latest.get(item["id"])
+    
+    return items
+
+@router.get("/", response_model=List[TaskReadEmbedded], response_model_exclude_unset=True)
 def get_tasks(
+    response: Response,
     status: Optional[str] = Query(None, description="Filter by status"),
     priority: Optional[str] = Query(None, description="Filter by priority"),
     label_id: Optional[int] = Query(None, description="Filter by label ID"),
+    label_all: Optional[List[int]] = Query(None, description="Only tasks carrying all of these label IDs"),
+    label_any: Optional[List[int]] = Query(None, description="Only tasks carrying at least one of these label IDs"),
+    label_none: Optional[List[int]] = Query(None, description="Exclude tasks carrying any of these label IDs"),
     sort_by: Optional[str] = Query("created_at", description="Sort by field (created_at, updated_at, due_date, priority, status, title)"),
     sort_order: Optional[str] = Query("desc", description="Sort order (asc or desc)"),
     skip: int = Query(0, ge=0, description="Number of records to skip (pagination)"),
     limit: int = Query(100, ge=1, le=100, description="Maximum number of records to return"),
+    count: Optional[str] = Query(None, pattern="^(exact|approx)$", description="Report X-Total-Count (exact or approx)"),
+    include: Optional[str] = Query(None, description="Embed relations: comments, labels, latest_activity (comma separated)"),
+    comments_limit: int = Query(5, ge=1, le=50, description="Most recent comments embedded per task"),
+    workspace: str = Depends(get_workspace),
     session: Session = Depends(get_session)
 ):
     """Get all tasks with optional filters, sorting, and pagination"""
-    query = select(Task)
+    include = _parse_include(include)
+    # Lean Core select of the response columns; rows are serialized without ORM objects
+    query = lean_select(Task, TaskRead).where(Task.workspace == workspace)
     
     # Apply filters
     if status:
@@ -74,6 +204,49 @@ def get_tasks(
     if label_id:
         # Join with task_labels to filter by label
         query = query.join(TaskLabel).where(TaskLabel.label_id == label_id)
+    if label_all or label_any or label_none:
+        # Resolve label set filters against the in-memory bitmap index,
+        # after catching it up with other workers' writes
+        index = get_task_index(session.get_bind())
+        index.refresh(session)
+        task_ids = index.resolve(
+            status=status,
+            priority=priority,
+            label_all=label_all,
+            label_any=label_any,
+            label_none=label_none,
+            workspace=workspace,
+        )
+        if not task_ids:
+            if count:
+                response.headers["X-Total-Count"] = "0"
+            return []
+        if len(task_ids) > BITMAP_ID_LIST_LIMIT:
+            query = _label_set_filter(query, label_all, label_any, label_none)
+        else:
+            query = query.where(Task.id.in_(list(task_ids)))
+    
+    def estimate():
+        # The bitmap index answers any status/priority/label combination from memory
+        index = get_task_index(session.get_bind())
+        index.refresh(session)
+        return len(index.resolve(
+            status=status,
+            priority=priority,
+            label_all=(label_all or []) + ([label_id] if label_id else []),
+            label_any=label_any,
+            label_none=label_none,
+            workspace=workspace,
+        ))
+    
+    filters = (status, priority, label_id, tuple(label_all or ()), tuple(label_any or ()), tuple(label_none or ()))
+    set_total_count(
+        response, session, count, query,
+        key=(workspace, *filters),
+        table="tasks",
+        unfiltered=not any(filters),
+        estimate=estimate
+    )
     
     # Apply sorting
     sort_field = getattr(Task, sort_by, Task.created_at)
@@ -85,41 +258,306 @@ def get_tasks(
     # Apply pagination
     query = query.offset(skip).limit(limit)
     
+    tasks = fetch_dicts(session, query)
+    if include:
+        tasks = _embed_relations(session, tasks, include, comments_limit)
+    return json_response(tasks, response)
+
+@router.get("/changes", response_model=TaskChanges)
+def get_task_changes(
+    since: Optional[str] = Query(None, description="Token from a previous sync; omit for a full sync"),
+    limit: int = Query(500, ge=1, le=1000, description="Maximum number of changed tasks to return"),
+    workspace: str = Depends(get_workspace),
+    session: Session = Depends(get_session)
+):
+    """Get tasks created, updated or deleted since a sync token"""
+    try:
+        cursor = decode_cursor(since, datetime_keys=("u",)) if since else {}
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    updated_after = cursor.get("u")
+    last_task_id = cursor.get("i", 0)
+    last_tombstone_id = cursor.get("t", 0)
+    
+    # Keyset over the (updated_at, id) index
+    query = select(Task).where(Task.workspace == workspace)
+    if updated_after is not None:
+        query = query.where(or_(
+            Task.updated_at > updated_after,
+            and_(Task.updated_at == updated_after, Task.id > last_task_id)
+        ))
+    query = query.order_by(Task.updated_at, Task.id).limit(limit + 1)
     tasks = session.exec(query).all()
-    return tasks
+    has_more = len(tasks) > limit
+    tasks = tasks[:limit]
+    
+    tombstones = session.exec(
+        select(TaskTombstone.id, TaskTombstone.task_id)
+        .where(TaskTombstone.id > last_tombstone_id, TaskTombstone.workspace == workspace)
+        .order_by(TaskTombstone.id)
+        .limit(limit + 1)
+    ).all()
+    has_more = has_more or len(tombstones) > limit
+    tombstones = tombstones[:limit]
+    
+    if tasks:
+        updated_after = to_utc_naive(tasks[-1].updated_at)
+        last_task_id = tasks[-1].id
+    if tombstones:
+        last_tombstone_id = tombstones[-1][0]
+    
+    return {
+        "changed": tasks,
+        "deleted": [task_id for _, task_id in tombstones],
+        "next_token": encode_cursor({"u": updated_after, "i": last_task_id, "t": last_tombstone_id}),
+        "has_more": has_more
+    }
+
+_DURATION = re.compile(r"^(\d+)([smhdw]?)$")
+_DURATION_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+def parse_duration(value: str) -> timedelta:
+    """Parse durations like ``90m``, ``24h`` or ``7d`` (bare numbers are seconds)"""
+    match = _DURATION.match(value.strip().lower())
+    if not match:
+        raise HTTPException(status_code=400, detail="Invalid duration; use e.g. 30m, 24h or 7d")
+    return timedelta(seconds=int(match.group(1)) * _DURATION_UNITS[match.group(2)])
+
+def _open_tasks_due(session: Session, workspace: str, before: datetime, after: Optional[datetime], skip: int, limit: int):
+    # Matches the partial ix_tasks_due_date_open index predicate
+    query = select(Task).where(Task.status != TaskStatus.DONE, Task.due_date < before, Task.workspace == workspace)
+    if after is not None:
+        query = query.where(Task.due_date >= after)
+    query = query.order_by(Task.due_date.asc()).offset(skip).limit(limit)
+    return session.exec(query).all()
+
+@router.get("/overdue", response_model=List[TaskRead])
+def get_overdue_tasks(
+    skip: int = Query(0, ge=0, description="Number of records to skip (pagination)"),
+    limit: int = Query(100, ge=1, le=100, description="Maximum number of records to return"),
+    workspace: str = Depends(get_workspace),
+    session: Session = Depends(get_session)
+):
+    """Get open tasks whose due date has passed, most overdue first"""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return _open_tasks_due(session, workspace, now, None, skip, limit)
+
+@router.get("/due", response_model=List[TaskRead])
+def get_tasks_due(
+    within: str = Query("24h", description="Look-ahead window, e.g. 30m, 24h, 7d"),
+    skip: int = Query(0, ge=0, description="Number of records to skip (pagination)"),
+    limit: int = Query(100, ge=1, le=100, description="Maximum number of records to return"),
+    workspace: str = Depends(get_workspace),
+    session: Session = Depends(get_session)
+):
+    """Get open tasks falling due within the given window, soonest first"""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return _open_tasks_due(session, workspace, now + parse_duration(within), now, skip, limit)
 
 @router.get("/{task_id}", response_model=TaskReadWithRelations)
-def get_task(task_id: int, session: Session = Depends(get_session)):
+def get_task(task_id: int, workspace: str = Depends(get_workspace), session: Session = Depends(get_session)):
     """Get a single task with all relations (comments and labels)"""
+    def load() -> bytes:
+        task = session.get(Task, task_id)
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+        
+        # Manually load labels through task_labels relationship
+        labels = []
+        for task_label in task.task_labels:
+            labels.append(task_label.label)
+        
+        # Create response with relations
+        task_dict = TaskRead.model_validate(task).model_dump()
+        task_dict["comments"] = task.comments
+        task_dict["labels"] = labels
+        
+        # Owner and version travel with the cached body so hits can be checked and tagged
+        body = TaskReadWithRelations.model_validate(task_dict).model_dump_json().encode()
+        return b"\0".join((task.workspace.encode(), str(task.version).encode(), body))
+    
+    # Read-through cache of the serialized response, invalidated by every write;
+    # reads inside an atomic batch may see writes that never commit, so skip it
+    bind = session.get_bind()
+    cached = load() if reads_uncommitted(bind) else get_task_cache(bind).get_or_load(task_id, load)
+    owner, version, content = cached.split(b"\0", 2)
+    if owner.decode() != workspace:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return Response(content=content, media_type="application/json", headers={"ETag": etag(int(version))})
+
+@router.get("/{task_id}/timeline")
+def get_task_timeline(
+    task_id: int,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(500, ge=1, le=10000, description="Maximum number of entries"),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="Oldest (asc) or newest (desc) first"),
+    workspace: str = Depends(get_workspace),
+    session: Session = Depends(get_session)
+):
+    """Stream a task's comments and activity merged by time.
+
+    The body is ``{"items": [...], "next_cursor": ...}``; each item carries
+    ``type`` ("comment" or "activity") and that row's fields.
+    """
     task = session.get(Task, task_id)
-    if not task:
+    if not task or task.workspace != workspace:
         raise HTTPException(status_code=404, detail="Task not found")
+    try:
+        after = decode_position(decode_cursor(cursor, datetime_keys=("c",))) if cursor else None
+    except (InvalidCursor, KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    # The stream outlives the request session, so it reads through its own
+    body = stream_timeline(
+        session.get_bind(), task_id, after, limit,
+        descending=order == "desc",
+        chunk_size=min(TIMELINE_CHUNK_SIZE, limit + 1)
+    )
+    return StreamingResponse(body, media_type="application/json")
+
+_IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json-seq": "ndjson",
+}
+
+@router.post("/import", response_model=TaskImportJob)
+async def import_tasks(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$", description="Upload format; defaults from Content-Type"),
+    job_id: Optional[str] = Query(None, pattern="^[A-Za-z0-9_-]{1,64}$", description="Client-chosen ID to poll progress while uploading"),
+    workspace: str = Depends(get_workspace),
+    session: Session = Depends(get_session)
+):
+    """Stream a CSV or NDJSON upload into tasks, validating and loading it in batches"""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    format = format or _IMPORT_CONTENT_TYPES.get(content_type)
+    if format is None:
+        raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson, or pass ?format=")
+    try:
+        job = get_import_jobs(session.get_bind()).start(format, job_id, workspace)
+    except ValueError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    
+    # Parsing and inserts run in a worker thread that pulls the body chunk by chunk
+    body = RequestBodyReader(request.stream().__aiter__())
+    await run_in_threadpool(run_import, session, body, job)
+    return job.snapshot()
+
+@router.get("/import/{job_id}", response_model=TaskImportJob)
+def get_import_job(job_id: str, workspace: str = Depends(get_workspace), session: Session = Depends(get_session)):
+    """Get progress and row errors of a running or recent import"""
+    job = get_import_jobs(session.get_bind()).get(job_id)
+    if not job or job.workspace != workspace:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job.snapshot()
+
+@router.patch("/bulk", response_model=TaskBulkResult)
+def bulk_update_tasks(
+    bulk_data: TaskBulkUpdate,
+    workspace: str = Depends(get_workspace),
+    session: Session = Depends(get_session)
+):
+    """Move many tasks to a new status/priority with one set-based UPDATE"""
+    changes = bulk_data.changes.model_dump(exclude_none=True)
+    # Set-based updates bypass the ORM version counter, so bump it here
+    values = {**changes, "updated_at": datetime.now(timezone.utc), "version": Task.version + 1}
+    
+    # Target rows, skipping those already in the requested state
+    target = select(Task.id, Task.status, Task.priority, Task.due_date).where(
+        Task.workspace == workspace,
+        or_(*(getattr(Task, key) != value for key, value in changes.items()))
+    )
+    if bulk_data.ids is not None:
+        target = target.where(Task.id.in_(bulk_data.ids))
+    else:
+        if bulk_data.filter.status:
+            target = target.where(Task.status == bulk_data.filter.status)
+        if bulk_data.filter.priority:
+            target = target.where(Task.priority == bulk_data.filter.priority)
+        if bulk_data.filter.label_id is not None:
+            target = target.where(Task.id.in_(
+                select(TaskLabel.task_id).where(TaskLabel.label_id == bulk_data.filter.label_id)
+            ))
     
-    # Manually load labels through task_labels relationship
-    labels = []
-    for task_label in task.task_labels:
-        labels.append(task_label.label)
+    if session.get_bind().dialect.name == "postgresql":
+        # UPDATE ... FROM a locked snapshot, RETURNING the pre-update values
+        old = target.with_for_update().subquery("old")
+        rows = session.execute(
+            update(Task)
+            .where(Task.id == old.c.id)
+            .values(**values)
+            .returning(old.c.id, old.c.status, old.c.priority, old.c.due_date)
+            .execution_options(synchronize_session=False)
+        ).all()
+    else:
+        # SQLite's RETURNING cannot see old values: update per (status, priority)
+        # group, guarded on those values so concurrent changes are not misreported
+        candidates = sorted(session.execute(target).all(), key=lambda r: (r.status.value, r.priority.value))
+        rows = []
+        for (old_status, old_priority), group in groupby(candidates, key=lambda r: (r.status, r.priority)):
+            group = {row.id: row for row in group}
+            updated = session.execute(
+                update(Task)
+                .where(Task.id.in_(group), Task.status == old_status, Task.priority == old_priority)
+                .values(**values)
+                .returning(Task.id)
+                .execution_options(synchronize_session=False)
+            ).scalars().all()
+            rows.extend(group[task_id] for task_id in updated)
+    
+    entries = []
+    for row in rows:
+        old_values = {"status": row.status, "priority": row.priority}
+        described = [f"{key}: {old_values[key]} → {value}" for key, value in changes.items() if old_values[key] != value]
+        status_changed = "status" in changes and row.status != changes["status"]
+        entries.append({
+            "task_id": row.id,
+            "action": "updated",
+            "description": f"Task updated: {', '.join(described)}",
+            "old_status": row.status if status_changed else None,
+            "new_status": changes["status"] if status_changed else None
+        })
+    log_activities(session, entries)
+    session.commit()
     
-    # Create response with relations
-    task_dict = TaskRead.model_validate(task).model_dump()
-    task_dict["comments"] = task.comments
-    task_dict["labels"] = labels
+    invalidate_tasks(session.get_bind(), [row.id for row in rows])
+    index = get_task_index(session.get_bind())
+    reminders = get_reminder_scheduler(session.get_bind())
+    for row in rows:
+        status = changes.get("status", row.status)
+        index.set_task(row.id, status, changes.get("priority", row.priority))
+        reminders.schedule(row.id, row.due_date, status)
     
-    return task_dict
+    task_ids = sorted(row.id for row in rows)
+    return {"updated": len(task_ids), "task_ids": task_ids}
 
 @router.patch("/{task_id}", response_model=TaskRead)
-def update_task(task_id: int, task_data: TaskUpdate, session: Session = Depends(get_session)):
-    """Update a task"""
+def update_task(
+    task_id: int,
+    task_data: TaskUpdate,
+    response: Response,
+    create_labels: bool = Query(False, description="Create labels named in label_names that do not exist yet"),
+    expected_version: Optional[int] = Depends(if_match_version),
+    workspace: str = Depends(get_workspace),
+    session: Session = Depends(get_session)
+):
+    """Update a task; the write only applies to the version that was read (optimistic locking)"""
     task = session.get(Task, task_id)
-    if not task:
+    if not task or task.workspace != workspace:
         raise HTTPException(status_code=404, detail="Task not found")
+    check_version(task, expected_version, "Task")
     
     # Track changes for activity log
     changes = []
+    old_status = task.status
     
     # Update fields
     update_data = task_data.model_dump(exclude_unset=True)
-    label_ids = update_data.pop("label_ids", None)
+    label_ids = _requested_label_ids(
+        session, workspace, update_data.pop("label_ids", None), update_data.pop("label_names", None), create_labels
+    )
     
     for key, value in update_data.items():
         if value is not None:
@@ -132,39 +570,78 @@ def update_task(task_id: int, task_data: TaskUpdate, session: Session = Depends(
     
     # Update labels if provided
     if label_ids is not None:
-        # Remove existing labels
-        for task_label in task.task_labels:
-            session.delete(task_label)
+        # Remove labels no longer wanted; re-adding a kept link would collide on its key
+        current = {task_label.label_id: task_label for task_label in task.task_labels}
+        for label_id, task_label in current.items():
+            if label_id not in label_ids:
+                session.delete(task_label)
         
         # Add new labels
         for label_id in label_ids:
+            if label_id in current:
+                continue
             label = session.get(Label, label_id)
-            if not label:
+            if not label or label.workspace != workspace:
                 raise HTTPException(status_code=404, detail=f"Label with id {label_id} not found")
             
             task_label = TaskLabel(task_id=task.id, label_id=label_id)
             session.add(task_label)
+        task.label_ids = sorted(label_ids)
         changes.append("labels updated")
     
     session.add(task)
-    session.commit()
+    commit_versioned(session, "Task")
     session.refresh(task)
     
+    get_task_index(session.get_bind()).set_task(task.id, task.status, task.priority, label_ids)
+    get_reminder_scheduler(session.get_bind()).schedule(task.id, task.due_date, task.status)
+    
     # Log activity
     if changes:
-        log_activity(session, task.id, "updated", f"Task updated: {', '.join(changes)}")
+        status_changed = task.status != old_status
+        log_activity(
+            session, task.id, "updated", f"Task updated: {', '.join(changes)}",
+            old_status=old_status if status_changed else None,
+            new_status=task.status if status_changed else None
+        )
         session.commit()
+    invalidate_tasks(session.get_bind(), [task.id])
     
+    response.headers["ETag"] = etag(task.version)
     return task
 
 @router.delete("/{task_id}", status_code=204)
-def delete_task(task_id: int, session: Session = Depends(get_session)):
-    """Delete a task"""
+def delete_task(
+    task_id: int,
+    background_tasks: BackgroundTasks,
+    background: bool = Query(False, description="Purge comments and activity in chunks after responding (202)"),
+    expected_version: Optional[int] = Depends(if_match_version),
+    workspace: str = Depends(get_workspace),
+    session: Session = Depends(get_session)
+):
+    """Delete a task; children are removed by ON DELETE CASCADE"""
     task = session.get(Task, task_id)
-    if not task:
+    if not task or task.workspace != workspace:
         raise HTTPException(status_code=404, detail="Task not found")
+    check_version(task, expected_version, "Task")
     
-    session.delete(task)
-    session.commit()
+    session.add(TaskTombstone(task_id=task_id, workspace=workspace))
+    if background:
+        # Gone for every reader at once; the children are purged after responding
+        task.workspace = PURGING_WORKSPACE
+        task.updated_at = datetime.now(timezone.utc)
+        session.add(task)
+    else:
+        session.delete(task)
+    commit_versioned(session, "Task")
+    
+    invalidate_tasks(session.get_bind(), [task_id])
+    get_task_index(session.get_bind()).remove_task(task_id)
+    get_reminder_scheduler(session.get_bind()).cancel(task_id)
+    
+    if background:
+        # Large tasks: delete children in short chunks instead of one long transaction
+        background_tasks.add_task(purge_task, session.get_bind(), task_id)
+        return Response(status_code=202)
     
     return None
@@ -1,11 +1,19 @@
-from app.schemas.task import TaskCreate, TaskUpdate, TaskRead, TaskReadWithRelations
+from app.schemas.task import (
+    TaskCreate, TaskUpdate, TaskRead, TaskReadWithRelations, TaskReadEmbedded, TaskChanges,
+    TaskBulkUpdate, TaskBulkResult, TaskImportJob
+)
 from app.schemas.comment import CommentCreate, CommentUpdate, CommentRead
 from app.schemas.label import LabelCreate, LabelUpdate, LabelRead
 from app.schemas.activity_log import ActivityLogRead
+from app.schemas.batch import BatchOperation, BatchRequest, BatchResult, BatchResponse
+from app.schemas.analytics import DailyThroughput, LabelThroughput, CycleTimeSummary
 
 __all__ = [
-    "TaskCreate", "TaskUpdate", "TaskRead", "TaskReadWithRelations",
+    "TaskCreate", "TaskUpdate", "TaskRead", "TaskReadWithRelations", "TaskReadEmbedded", "TaskChanges",
+    "TaskBulkUpdate", "TaskBulkResult", "TaskImportJob",
     "CommentCreate", "CommentUpdate", "CommentRead",
     "LabelCreate", "LabelUpdate", "LabelRead",
-    "ActivityLogRead"
+    "ActivityLogRead",
+    "BatchOperation", "BatchRequest", "BatchResult", "BatchResponse",
+    "DailyThroughput", "LabelThroughput", "CycleTimeSummary"
 ]
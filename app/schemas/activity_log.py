@@ -1,5 +1,8 @@
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
+from typing import Optional
+
+from app.models.task import TaskStatus
 
 class ActivityLogRead(BaseModel):
     id: int
@@ -7,6 +10,8 @@ class ActivityLogRead(BaseModel):
     action: str
     description: str
     performed_by: str
+    old_status: Optional[TaskStatus] = None
+    new_status: Optional[TaskStatus] = None
     created_at: datetime
     
     model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import date
+
+class DailyThroughput(BaseModel):
+    day: date
+    created: int
+    completed: int
+
+class LabelThroughput(BaseModel):
+    label_id: int
+    name: Optional[str]
+    completed: int
+
+class CycleTimeSummary(BaseModel):
+    since: date
+    until: date
+    tasks: int
+    average_hours: Optional[float]
+    p50_hours: Optional[float]
+    p85_hours: Optional[float]
+    max_hours: Optional[float]
@@ -0,0 +1,24 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+class BatchOperation(BaseModel):
+    method: str = Field(pattern="^(GET|POST|PATCH|PUT|DELETE)$")
+    path: str = Field(description='Route under /tasks, /comments or /labels; "$ref.field" inserts an earlier result')
+    ref: Optional[str] = Field(None, pattern="^[A-Za-z_][A-Za-z0-9_-]{0,31}$", description="Name later operations use to refer to this result")
+    query: Dict[str, Any] = {}
+    body: Optional[Any] = None
+    headers: Dict[str, str] = Field({}, description="Extra headers, e.g. If-Match")
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(min_length=1, max_length=50)
+    atomic: bool = Field(False, description="Run every operation in one transaction: all apply or none do")
+
+class BatchResult(BaseModel):
+    ref: Optional[str] = None
+    status: int
+    headers: Dict[str, str] = {}
+    body: Optional[Any] = None
+
+class BatchResponse(BaseModel):
+    committed: bool
+    results: List[BatchResult]
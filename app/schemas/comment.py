@@ -17,5 +17,6 @@ class CommentRead(CommentBase):
     task_id: int
     created_at: datetime
     updated_at: datetime
+    version: int = 1
     
     model_config = ConfigDict(from_attributes=True)
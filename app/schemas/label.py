@@ -14,5 +14,7 @@ class LabelUpdate(BaseModel):
 
 class LabelRead(LabelBase):
     id: int
+    workspace: str = "default"
+    version: int = 1
     
     model_config = ConfigDict(from_attributes=True)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, model_validator
 from typing import Optional, List
 from datetime import datetime
 from app.models.task import TaskStatus, TaskPriority
@@ -12,6 +12,7 @@ class TaskBase(BaseModel):
 
 class TaskCreate(TaskBase):
     label_ids: Optional[List[int]] = []
+    label_names: Optional[List[str]] = None
 
 class TaskUpdate(BaseModel):
     title: Optional[str] = Field(None, min_length=1, max_length=200)
@@ -20,21 +21,88 @@ class TaskUpdate(BaseModel):
     priority: Optional[TaskPriority] = None
     due_date: Optional[datetime] = None
     label_ids: Optional[List[int]] = None
+    label_names: Optional[List[str]] = None
 
 class TaskRead(TaskBase):
     id: int
+    workspace: str = "default"
     created_at: datetime
     updated_at: datetime
+    comment_count: int = 0
+    last_activity_at: Optional[datetime] = None
+    label_ids: List[int] = []
+    version: int = 1
     
     model_config = ConfigDict(from_attributes=True)
 
+class TaskBulkFilter(BaseModel):
+    status: Optional[TaskStatus] = None
+    priority: Optional[TaskPriority] = None
+    label_id: Optional[int] = None
+    
+    @model_validator(mode="after")
+    def check_not_empty(self):
+        # An empty filter would match (and update) the whole workspace
+        if not self.model_dump(exclude_none=True):
+            raise ValueError("'filter' must set status, priority and/or label_id")
+        return self
+
+class TaskBulkChanges(BaseModel):
+    status: Optional[TaskStatus] = None
+    priority: Optional[TaskPriority] = None
+
+class TaskBulkUpdate(BaseModel):
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=10000)
+    filter: Optional[TaskBulkFilter] = None
+    changes: TaskBulkChanges
+    
+    @model_validator(mode="after")
+    def check_target_and_changes(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Provide exactly one of 'ids' or 'filter'")
+        if not self.changes.model_dump(exclude_none=True):
+            raise ValueError("'changes' must set status and/or priority")
+        return self
+
+class TaskBulkResult(BaseModel):
+    updated: int
+    task_ids: List[int]
+
+class TaskImportError(BaseModel):
+    line: int
+    error: str
+
+class TaskImportJob(BaseModel):
+    job_id: str
+    format: str
+    status: str  # running, completed or failed
+    rows_read: int
+    imported: int
+    failed: int
+    errors: List[TaskImportError] = []
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+
+class TaskChanges(BaseModel):
+    changed: List[TaskRead] = []
+    deleted: List[int] = []
+    next_token: str
+    has_more: bool = False
+
 
 # Import after base schemas to avoid circular imports
 from app.schemas.comment import CommentRead
 from app.schemas.label import LabelRead
+from app.schemas.activity_log import ActivityLogRead
 
 class TaskReadWithRelations(TaskRead):
     comments: List[CommentRead] = []
     labels: List[LabelRead] = []
     
     model_config = ConfigDict(from_attributes=True)
+
+class TaskReadEmbedded(TaskRead):
+    """List item with the relations requested through ``?include=``"""
+    comments: Optional[List[CommentRead]] = None
+    labels: Optional[List[LabelRead]] = None
+    latest_activity: Optional[ActivityLogRead] = None
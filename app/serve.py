@@ -0,0 +1,126 @@
+"""Pre-fork server: ``python -m app.serve [--workers N] [--host H] [--port P]``.
+
+The parent runs schema checks (and any DDL) once, imports the app and
+warms in-process state, then forks workers that share one listening
+socket. Each worker drops the inherited connection pool before serving,
+and crashed workers are restarted.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+logger = logging.getLogger("app.serve")
+
+def default_workers() -> int:
+    # One worker unless asked: events, the tier-1 cache and import jobs live per process
+    return int(os.getenv("WEB_CONCURRENCY", 0)) or 1
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.serve", description="Run the API with pre-forked workers")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info").lower())
+    return parser.parse_args(argv)
+
+def _bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+def _run_worker(app, sock: socket.socket, log_level: str) -> None:
+    import uvicorn
+    from app.database import shard_router
+    
+    # Never share pooled connections with the parent or sibling workers
+    for shard in shard_router.engines:
+        shard.dispose(close=False)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    config = uvicorn.Config(app, log_level=log_level, lifespan="on")
+    uvicorn.Server(config).run(sockets=[sock])
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(name)s %(message)s")
+    
+    from app.database import shard_router
+    from app.migrations import ensure_schema
+    
+    # Only the parent may run startup DDL, so workers never race on it
+    for number, shard in enumerate(shard_router.engines):
+        ensure_schema(shard, number)
+    from app.main import app
+    from app.services.task_index import get_task_index
+    
+    # Loaded before fork, the index is shared copy-on-write by every worker
+    for shard in shard_router.engines:
+        get_task_index(shard)
+        shard.dispose()
+    
+    if not hasattr(os, "fork") or args.workers <= 1:
+        import uvicorn
+        uvicorn.run(app, host=args.host, port=args.port, log_level=args.log_level)
+        return 0
+    
+    sock = _bind(args.host, args.port)
+    workers = {}
+    stopping = False
+    recent_crashes = []
+    
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _run_worker(app, sock, args.log_level)
+            finally:
+                os._exit(0)
+        workers[pid] = time.monotonic()
+        logger.info("Started worker %s", pid)
+    
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    logger.info("Listening on %s:%s with %d workers", args.host, args.port, args.workers)
+    for _ in range(args.workers):
+        spawn()
+    
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        workers.pop(pid, None)
+        if stopping:
+            continue
+        code = os.waitstatus_to_exitcode(status)
+        logger.warning("Worker %s exited with %s; restarting", pid, code)
+        now = time.monotonic()
+        recent_crashes = [t for t in recent_crashes if now - t < 10] + [now]
+        if len(recent_crashes) > args.workers * 3:
+            # Crash loop: back off instead of forking as fast as possible
+            time.sleep(1)
+        spawn()
+    
+    sock.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+from collections import Counter
+from datetime import datetime, timezone
+from sqlalchemy import event, insert, select
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.models import ActivityLog, Task
+from app.models.task import TaskStatus
+from app.schemas import ActivityLogRead
+from app.services.analytics import record_activity
+from app.services.counts import get_workspace_counts
+from app.services.events import broadcaster
+from app.services.summaries import touch_last_activity
+
+_PENDING_EVENTS = "pending_activity_events"
+_PUBLISH_WITH = "publish_activity_with"
+
+def log_activity(
+    session: Session,
+    task_id: int,
+    action: str,
+    description: str,
+    performed_by: str = "system",
+    old_status: Optional[TaskStatus] = None,
+    new_status: Optional[TaskStatus] = None
+) -> ActivityLog:
+    """Helper function to log task activities; pass the statuses of a status change"""
+    activity = ActivityLog(
+        task_id=task_id,
+        action=action,
+        description=description,
+        performed_by=performed_by,
+        old_status=old_status,
+        new_status=new_status
+    )
+    session.add(activity)
+    touch_last_activity(session, [task_id], activity.created_at)
+    return activity
+
+def log_activities(session: Session, entries: Iterable[Dict[str, Any]]) -> int:
+    """Write many activity rows in one multi-row INSERT.
+
+    Each entry carries ``task_id``, ``action``, ``description`` and optionally
+    ``performed_by``, ``old_status`` and ``new_status``. Rows are published on commit like :func:`log_activity`.
+    """
+    now = datetime.now(timezone.utc)
+    rows = [
+        {"performed_by": "system", "old_status": None, "new_status": None, "created_at": now, **entry}
+        for entry in entries
+    ]
+    if not rows:
+        return 0
+    table = ActivityLog.__table__
+    written = [dict(row._mapping) for row in session.execute(insert(table).returning(*table.c), rows)]
+    touch_last_activity(session, [row["task_id"] for row in rows], now)
+    record_activity(session.connection(), written)
+    _queue(session, written)
+    return len(rows)
+
+def _pending(session: OrmSession) -> List[Tuple[str, Dict[str, Any]]]:
+    return session.info.setdefault(_PENDING_EVENTS, [])
+
+def _queue(session: OrmSession, rows: List[Dict[str, Any]]) -> None:
+    """Hold written activity for publishing, tagged with its task's workspace"""
+    if not rows:
+        return
+    workspaces = dict(session.connection().execute(
+        select(Task.id, Task.workspace).where(Task.id.in_({row["task_id"] for row in rows}))
+    ).all())
+    _pending(session).extend(
+        (workspaces.get(row["task_id"]), ActivityLogRead.model_validate(row).model_dump(mode="json"))
+        for row in rows
+    )
+
+def publish_with(session: OrmSession, outer: OrmSession) -> None:
+    """Hold ``session``'s activity events until ``outer`` commits.
+
+    For sessions whose commits only release a savepoint inside ``outer``'s
+    transaction; events are dropped if ``outer`` rolls back.
+    """
+    session.info[_PUBLISH_WITH] = outer
+
+@event.listens_for(OrmSession, "after_flush")
+def _collect_activity(session: OrmSession, flush_context) -> None:
+    """Snapshot activity rows once they have IDs; they are published on commit.
+
+    The analytics rollups are updated here too, inside the same transaction.
+    """
+    written = [ActivityLogRead.model_validate(obj).model_dump() for obj in session.new if isinstance(obj, ActivityLog)]
+    if written:
+        record_activity(session.connection(), written)
+        _queue(session, written)
+
+@event.listens_for(OrmSession, "after_commit")
+def _publish_activity(session: OrmSession) -> None:
+    events = session.info.pop(_PENDING_EVENTS, None)
+    outer = session.info.get(_PUBLISH_WITH)
+    if outer is not None:
+        _pending(outer).extend(events or ())
+        return
+    written = Counter()
+    for workspace, activity in events or ():
+        if workspace is not None:
+            broadcaster.publish(workspace, activity)
+            written[workspace] += 1
+    counts = get_workspace_counts(session.get_bind()) if written else None
+    for workspace, added in written.items():
+        counts.add("activity_logs", workspace, added)
+
+@event.listens_for(OrmSession, "after_rollback")
+def _discard_activity(session: OrmSession) -> None:
+    session.info.pop(_PENDING_EVENTS, None)
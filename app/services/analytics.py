@@ -0,0 +1,168 @@
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlmodel import Session
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+import math
+import re
+
+from app.models import ActivityLog, DailyTaskStats, LabelDailyStats, Task, TaskCycle
+from app.models.task import TaskStatus
+from app.services.cursors import to_utc_naive
+
+BACKFILL_BATCH_SIZE = 5000
+
+# Activity written before old_status/new_status existed (schema v11) only
+# describes status changes as "status: <old> → <new>" among its other changes;
+# backfills parse that
+_STATUS_CHANGE = re.compile(r"(?:^Task updated: |, )status: (?:TaskStatus\.)?(\w+) → (?:TaskStatus\.)?(\w+)(?:,|$)")
+
+def _status(name: str) -> Optional[TaskStatus]:
+    try:
+        return TaskStatus[name.upper()]
+    except KeyError:
+        return None
+
+def status_change(description: str) -> Optional[Tuple[Optional[TaskStatus], Optional[TaskStatus]]]:
+    """The (old, new) statuses a legacy activity description records, if any"""
+    match = _STATUS_CHANGE.search(description or "")
+    if not match:
+        return None
+    return _status(match.group(1)), _status(match.group(2))
+
+def _upsert(connection: Connection, model, keys: Dict[str, Any], values: Dict[str, Any], set_) -> None:
+    """Insert a rollup row, or apply ``set_(table, new_values)`` to the existing one"""
+    table = model.__table__
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = insert(table).values(**keys, **values)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=list(keys), set_=set_(table, statement.excluded)
+        ))
+        return
+    matched = connection.execute(
+        update(table)
+        .where(*(table.c[name] == value for name, value in keys.items()))
+        .values(**set_(table, SimpleNamespace(**values)))
+    ).rowcount
+    if not matched:
+        connection.execute(table.insert().values(**keys, **values))
+
+def _add(names: Iterable[str]):
+    return lambda table, new: {name: table.c[name] + getattr(new, name) for name in names}
+
+def record_activity(connection: Connection, entries: Iterable[Mapping[str, Any]]) -> None:
+    """Fold newly written activity rows into the rollups, in the writer's transaction.
+
+    "created" entries count towards tasks created; status changes start a
+    task's cycle (first move to in_progress) and complete it (move to done,
+    counted per day and per label the task carries at that moment).
+    """
+    events = []
+    for entry in entries:
+        change = (entry.get("old_status"), entry["new_status"]) if entry.get("new_status") is not None else None
+        if entry["action"] == "created" or change:
+            events.append((entry, change))
+    if not events:
+        return
+    tasks = {
+        row.id: row for row in connection.execute(
+            select(Task.id, Task.workspace, Task.label_ids).where(Task.id.in_({entry["task_id"] for entry, _ in events}))
+        )
+    }
+
+    per_day: Counter = Counter()
+    per_label: Counter = Counter()
+    for entry, change in events:
+        task = tasks.get(entry["task_id"])
+        if task is None:
+            continue
+        at = to_utc_naive(entry["created_at"])
+        day = at.date()
+        if change is None:
+            per_day[(task.workspace, day, "created")] += 1
+            continue
+        old, new = change
+        if new == TaskStatus.IN_PROGRESS:
+            _upsert(
+                connection, TaskCycle, {"task_id": task.id}, {"workspace": task.workspace, "started_at": at},
+                lambda table, new: {"started_at": func.coalesce(table.c.started_at, new.started_at)}
+            )
+        elif new == TaskStatus.DONE and old != TaskStatus.DONE:
+            per_day[(task.workspace, day, "completed")] += 1
+            for label_id in task.label_ids or []:
+                per_label[(task.workspace, label_id, day)] += 1
+            _upsert(
+                connection, TaskCycle, {"task_id": task.id}, {"workspace": task.workspace, "completed_at": at},
+                lambda table, new: {"completed_at": new.completed_at}
+            )
+
+    for (workspace, day, column), count in per_day.items():
+        values = {"created": 0, "completed": 0, column: count}
+        _upsert(connection, DailyTaskStats, {"workspace": workspace, "day": day}, values, _add([column]))
+    for (workspace, label_id, day), count in per_label.items():
+        _upsert(
+            connection, LabelDailyStats, {"workspace": workspace, "label_id": label_id, "day": day},
+            {"completed": count}, _add(["completed"])
+        )
+
+def backfill_analytics(session: Session, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """Rebuild every rollup from the activity log; returns activity rows replayed.
+
+    Rollups are cleared and the newest activity ID read in one transaction,
+    so anything logged afterwards is counted live and not replayed twice.
+    Per-label completions use the labels tasks carry now.
+    """
+    last_id = 0
+    high_water = session.execute(select(func.max(ActivityLog.id))).scalar() or 0
+    for model in (DailyTaskStats, LabelDailyStats, TaskCycle):
+        session.execute(delete(model))
+    session.commit()
+
+    replayed = 0
+    while True:
+        rows = session.execute(
+            select(
+                ActivityLog.id, ActivityLog.task_id, ActivityLog.action, ActivityLog.description,
+                ActivityLog.old_status, ActivityLog.new_status, ActivityLog.created_at
+            )
+            .where(
+                ActivityLog.id > last_id,
+                ActivityLog.id <= high_water,
+                or_(
+                    ActivityLog.action == "created",
+                    ActivityLog.new_status.is_not(None),
+                    ActivityLog.description.contains("status: ")
+                )
+            )
+            .order_by(ActivityLog.id)
+            .limit(batch_size)
+        ).mappings().all()
+        if not rows:
+            return replayed
+        record_activity(session.connection(), [_with_legacy_status(row) for row in rows])
+        session.commit()
+        last_id = rows[-1]["id"]
+        replayed += len(rows)
+
+def _with_legacy_status(row: Mapping[str, Any]) -> Mapping[str, Any]:
+    if row["action"] != "updated" or row["new_status"] is not None:
+        return row
+    change = status_change(row["description"])
+    if change is None:
+        return row
+    return {**row, "old_status": change[0], "new_status": change[1]}
+
+def percentile(sorted_values, fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(len(sorted_values) * fraction))
+    return sorted_values[rank - 1]
+
+def hours_between(start: datetime, end: datetime) -> float:
+    return (to_utc_naive(end) - to_utc_naive(start)).total_seconds() / 3600
@@ -0,0 +1,200 @@
+from datetime import datetime, timezone
+from pathlib import Path
+from sqlalchemy.engine import Engine
+from typing import Callable, Dict, Optional
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import time
+import urllib.request
+
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_LATENCY_BUDGET_MS = 200.0
+BACKUP_MIN_PAUSE = 0.005
+BACKUP_MAX_PAUSE = 1.0
+# Paced copies of non-WAL databases that writers restarted this often finish in one step
+BACKUP_MAX_RESTARTS = 3
+PG_DUMP_CHUNK_SIZE = 1024 * 1024
+
+class BackupError(RuntimeError):
+    pass
+
+class BackupThrottle:
+    """Paces backup steps against the latency the live API is seeing.
+
+    ``latency`` returns the current interactive request latency in seconds
+    (or None when unknown). Within budget the backup only yields briefly
+    between steps; above it the pause grows with the overshoot, so the
+    snapshot slows down instead of pushing request latency further out.
+    """
+
+    def __init__(
+        self,
+        latency: Optional[Callable[[], Optional[float]]] = None,
+        budget: float = BACKUP_LATENCY_BUDGET_MS / 1000,
+        min_pause: float = BACKUP_MIN_PAUSE,
+        max_pause: float = BACKUP_MAX_PAUSE,
+    ):
+        self.latency = latency
+        self.budget = budget
+        self.min_pause = min_pause
+        self.max_pause = max_pause
+        self.paused = 0.0
+
+    @classmethod
+    def from_env(cls, latency: Optional[Callable[[], Optional[float]]] = None) -> "BackupThrottle":
+        return cls(latency, budget=float(os.getenv("BACKUP_LATENCY_BUDGET_MS", BACKUP_LATENCY_BUDGET_MS)) / 1000)
+
+    def pause_for(self, observed: Optional[float]) -> float:
+        if observed is None or observed <= self.budget:
+            return self.min_pause
+        overshoot = observed / self.budget - 1
+        return min(self.max_pause, self.min_pause + 0.25 * overshoot)
+
+    def wait(self) -> None:
+        pause = self.pause_for(self.latency() if self.latency else None)
+        self.paused += pause
+        time.sleep(pause)
+
+def health_latency(url: str) -> Callable[[], Optional[float]]:
+    """Latency probe reading a running API's ``/health`` admission stats"""
+    def probe() -> Optional[float]:
+        try:
+            with urllib.request.urlopen(url, timeout=2) as response:
+                body = json.load(response)
+        except OSError as exc:
+            # 503 still carries the body: the API is shedding, so back off hard
+            body = json.loads(exc.read()) if hasattr(exc, "read") else None
+        if not body:
+            return None
+        return body["admission"]["interactive_latency_ms"] / 1000
+    return probe
+
+def default_backup_path(engine: Engine, directory: Optional[str] = None) -> Path:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    suffix = "db" if engine.dialect.name == "sqlite" else "dump"
+    return Path(directory or os.getenv("BACKUP_DIR", "backups")) / f"task_management-{stamp}.{suffix}"
+
+class _TooManyRestarts(Exception):
+    pass
+
+def backup_sqlite(
+    engine: Engine,
+    target: Path,
+    throttle: BackupThrottle,
+    pages: int = BACKUP_PAGES_PER_STEP,
+    max_restarts: int = BACKUP_MAX_RESTARTS
+) -> Dict[str, object]:
+    """Copy a live SQLite database with the online backup API, a few pages at a time.
+
+    The backup API starts over whenever another connection writes. In WAL
+    mode the copy therefore runs inside one read transaction: every step
+    reads the same snapshot, so it never restarts, and writers carry on
+    in the WAL. Other journal modes cannot hold a snapshot without
+    blocking writers, so the paced copy gets ``max_restarts`` restarts;
+    after that the rest is copied in one unpaced step, and writers wait
+    for that step only.
+    """
+    steps = 0
+    total_pages = 0
+    restarts = 0
+    last_remaining = None
+
+    def progress(status, remaining, total):
+        nonlocal steps, total_pages, restarts, last_remaining
+        steps += 1
+        total_pages = total
+        if last_remaining is not None and remaining > last_remaining:
+            restarts += 1
+            if restarts > max_restarts:
+                raise _TooManyRestarts()
+        last_remaining = remaining
+        if remaining:
+            throttle.wait()
+
+    partial = target.with_name(target.name + ".partial")
+    raw = engine.raw_connection()
+    source = raw.driver_connection
+    snapshot = False
+    single_step = False
+    try:
+        if source.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal" and not source.in_transaction:
+            source.execute("BEGIN")
+            source.execute("SELECT count(*) FROM sqlite_master").fetchone()
+            snapshot = True
+        destination = sqlite3.connect(partial)
+        try:
+            try:
+                source.backup(destination, pages=pages, progress=progress)
+            except _TooManyRestarts:
+                single_step = True
+                source.backup(destination, pages=-1)
+                steps += 1
+        finally:
+            destination.close()
+    finally:
+        if snapshot:
+            source.rollback()
+        raw.close()
+    partial.replace(target)
+    return {
+        "steps": steps,
+        "pages": total_pages,
+        "snapshot": snapshot,
+        "restarts": min(restarts, max_restarts),
+        "single_step": single_step
+    }
+
+def backup_postgres(engine: Engine, target: Path, throttle: BackupThrottle, chunk_size: int = PG_DUMP_CHUNK_SIZE) -> Dict[str, object]:
+    """Stream ``pg_dump --format=custom`` to ``target``, pacing reads of its output.
+
+    pg_dump exports from a single repeatable-read snapshot, so it is
+    consistent without blocking writers; throttling the pipe applies
+    backpressure to the dump instead of letting it compete at full speed.
+    """
+    if shutil.which("pg_dump") is None:
+        raise BackupError("pg_dump is not installed")
+    url = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+    partial = target.with_name(target.name + ".partial")
+    steps = 0
+    with open(partial, "wb") as output, tempfile.TemporaryFile() as errors:
+        process = subprocess.Popen(
+            ["pg_dump", "--format=custom", "--no-owner", f"--dbname={url}"],
+            stdout=subprocess.PIPE,
+            stderr=errors
+        )
+        for chunk in iter(lambda: process.stdout.read(chunk_size), b""):
+            output.write(chunk)
+            steps += 1
+            throttle.wait()
+        if process.wait() != 0:
+            errors.seek(0)
+            detail = errors.read().decode(errors="replace").strip()
+            output.close()
+            partial.unlink(missing_ok=True)
+            raise BackupError(f"pg_dump failed: {detail}")
+    partial.replace(target)
+    return {"steps": steps}
+
+def take_backup(engine: Engine, target: Optional[Path] = None, throttle: Optional[BackupThrottle] = None) -> Dict[str, object]:
+    """Take a consistent snapshot of the database behind ``engine`` without stopping the API"""
+    throttle = throttle or BackupThrottle.from_env()
+    target = Path(target or default_backup_path(engine))
+    target.parent.mkdir(parents=True, exist_ok=True)
+    started = time.monotonic()
+    if engine.dialect.name == "sqlite":
+        stats = backup_sqlite(engine, target, throttle)
+    elif engine.dialect.name == "postgresql":
+        stats = backup_postgres(engine, target, throttle)
+    else:
+        raise BackupError(f"Backups are not supported for {engine.dialect.name}")
+    return {
+        "path": str(target),
+        "bytes": target.stat().st_size,
+        "seconds": round(time.monotonic() - started, 3),
+        "throttled_seconds": round(throttle.paused, 3),
+        **stats
+    }
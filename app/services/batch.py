@@ -0,0 +1,120 @@
+from fastapi import Request
+from sqlmodel import Session
+from starlette.routing import Match
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+import json
+import re
+
+from app.database import BATCH_SESSION
+
+# Routes a batch may call; everything else (imports, admin, events) is refused
+BATCH_PREFIXES = ("/tasks", "/comments", "/labels")
+_EXCLUDED_PATHS = ("/tasks/import",)
+_REFERENCE = re.compile(r"\$([A-Za-z_][A-Za-z0-9_-]*)\.([A-Za-z_]\w*)")
+# Copied from the batch request so sub-requests route and handle errors alike
+_INHERITED_SCOPE = ("http_version", "scheme", "server", "client", "root_path", "app", "router", "starlette.exception_handlers")
+
+class UnresolvedReference(LookupError):
+    pass
+
+def resolve_references(value: Any, outputs: Dict[str, Any]) -> Any:
+    """Replace ``$ref.field`` placeholders with fields of earlier results.
+
+    A string that is exactly one placeholder takes the field's value as is
+    (so IDs stay integers); placeholders inside longer strings, such as
+    paths, are formatted in.
+    """
+    if isinstance(value, dict):
+        return {key: resolve_references(item, outputs) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_references(item, outputs) for item in value]
+    if not isinstance(value, str):
+        return value
+
+    def lookup(match: re.Match) -> Any:
+        output = outputs.get(match.group(1))
+        if not isinstance(output, dict) or match.group(2) not in output:
+            raise UnresolvedReference(match.group(0))
+        return output[match.group(2)]
+
+    whole = _REFERENCE.fullmatch(value)
+    if whole:
+        return lookup(whole)
+    return _REFERENCE.sub(lambda match: str(lookup(match)), value)
+
+def allowed_path(path: str) -> bool:
+    if any(path == excluded or path.startswith(excluded + "/") for excluded in _EXCLUDED_PATHS):
+        return False
+    return any(path == prefix or path.startswith(prefix + "/") for prefix in BATCH_PREFIXES)
+
+def _match(request: Request, scope: Dict[str, Any]):
+    partial = False
+    for route in request.app.router.routes:
+        match, child_scope = route.matches(scope)
+        if match is Match.FULL:
+            return route, child_scope
+        partial = partial or match is Match.PARTIAL
+    return None, {"status": 405, "detail": "Method Not Allowed"} if partial else {"status": 404, "detail": "Not Found"}
+
+async def dispatch(
+    request: Request,
+    session: Session,
+    method: str,
+    path: str,
+    query: Dict[str, Any],
+    body: Any,
+    headers: List[Tuple[bytes, bytes]]
+) -> Tuple[int, Dict[str, str], Optional[Any]]:
+    """Run one sub-request through the app's own route, on the batch's session.
+
+    Validation, dependencies, response models and HTTPException handling are
+    the route's own; middleware is not run again. Returns (status, headers,
+    decoded JSON body).
+    """
+    payload = b"" if body is None else json.dumps(body).encode()
+    scope = {key: request.scope[key] for key in _INHERITED_SCOPE if key in request.scope}
+    scope.update({
+        "type": "http",
+        "method": method,
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": urlencode(query, doseq=True).encode(),
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode()), *headers],
+        BATCH_SESSION: session,
+    })
+
+    route, child_scope = _match(request, scope)
+    if route is None and not path.endswith("/"):
+        # Collections are declared as "/tasks/"; the app would redirect there
+        scope.update(path=path + "/", raw_path=(path + "/").encode())
+        route, child_scope = _match(request, scope)
+    if route is None:
+        return child_scope["status"], {}, {"detail": child_scope["detail"]}
+
+    received = False
+    response: Dict[str, Any] = {"status": 500, "headers": [], "body": []}
+
+    async def receive():
+        nonlocal received
+        if received:
+            return {"type": "http.disconnect"}
+        received = True
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+
+    await route.handle({**scope, **child_scope}, receive, send)
+
+    response_headers = {
+        name.decode("latin-1"): value.decode("latin-1")
+        for name, value in response["headers"]
+        if name.lower() not in (b"content-length", b"content-type")
+    }
+    content = b"".join(response["body"])
+    return response["status"], response_headers, json.loads(content) if content else None
@@ -0,0 +1,189 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from sqlalchemy.engine import Connection, Engine
+from typing import Callable, Dict, Iterable, Iterator, Optional, Protocol, Set
+import os
+import threading
+import time
+
+from app.services.registry import EngineLocal
+
+class CacheBackend(Protocol):
+    """Shared (tier 2) cache, e.g. Redis or memcached behind a thin adapter"""
+
+    def get(self, key: str) -> Optional[bytes]: ...
+
+    def set(self, key: str, value: bytes, ttl_seconds: float) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+class InMemoryBackend:
+    """Process-local stand-in for a shared backend, used in tests and development"""
+
+    def __init__(self):
+        self._data: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                self._data.pop(key, None)
+                return None
+            return entry[0]
+
+    def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl_seconds)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+class _Load:
+    __slots__ = ("done", "value", "stale")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Optional[bytes] = None
+        self.stale = False
+
+class ResponseCache:
+    """Read-through cache of serialized responses.
+
+    Tier 1 is a bounded in-process LRU; tier 2 is an optional shared
+    backend. Other workers' invalidations only reach tier 2, so tier-1
+    entries expire after ``local_ttl_seconds`` (sub-second by default)
+    rather than the full ``ttl_seconds``. Concurrent misses for one key share a single load, and an
+    invalidation that lands while a load is running stops its (possibly
+    stale) result from being stored.
+    """
+
+    def __init__(self, namespace: str, max_entries: int = 1024, ttl_seconds: float = 30, backend: Optional[CacheBackend] = None, local_ttl_seconds: float = 0.5):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.local_ttl_seconds = min(local_ttl_seconds, ttl_seconds)
+        self.backend = backend
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._loads: Dict[str, _Load] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _store_local(self, key: str, value: bytes) -> None:
+        self._entries[key] = (value, time.monotonic() + self.local_ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_or_load(self, key, loader: Callable[[], bytes]) -> bytes:
+        key = self._key(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            load = self._loads.get(key)
+            leader = load is None
+            if leader:
+                load = self._loads[key] = _Load()
+        
+        if not leader:
+            load.done.wait()
+            if load.value is not None:
+                return load.value
+            return loader()  # The leader failed; load independently
+        
+        try:
+            value = self.backend.get(key) if self.backend is not None else None
+            from_backend = value is not None
+            if not from_backend:
+                self.misses += 1
+                value = loader()
+            load.value = value
+            with self._lock:
+                if not load.stale:
+                    self._store_local(key, value)
+            if not from_backend and not load.stale and self.backend is not None:
+                self.backend.set(key, value, self.ttl_seconds)
+            return value
+        finally:
+            with self._lock:
+                self._loads.pop(key, None)
+            load.done.set()
+
+    def invalidate(self, keys: Iterable) -> None:
+        keys = [self._key(key) for key in keys]
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+                load = self._loads.get(key)
+                if load is not None:
+                    load.stale = True
+        if self.backend is not None:
+            for key in keys:
+                self.backend.delete(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            for load in self._loads.values():
+                load.stale = True
+
+_shared_backend: Optional[CacheBackend] = InMemoryBackend() if os.getenv("TASK_CACHE_BACKEND") == "memory" else None
+
+def set_shared_backend(backend: Optional[CacheBackend]) -> None:
+    """Plug in the tier-2 backend for caches created from now on"""
+    global _shared_backend
+    _shared_backend = backend
+
+def _task_cache_for(bind: Engine) -> ResponseCache:
+    return ResponseCache(
+        # Bump the suffix when the cached layout changes (now owner, version, body)
+        namespace=f"task-detail-v2:{bind.url}",
+        max_entries=int(os.getenv("TASK_CACHE_MAX_ENTRIES", "1024")),
+        ttl_seconds=float(os.getenv("TASK_CACHE_TTL_SECONDS", "30")),
+        backend=_shared_backend,
+        local_ttl_seconds=float(os.getenv("TASK_CACHE_LOCAL_TTL_SECONDS", "0.5"))
+    )
+
+_task_caches: EngineLocal[ResponseCache] = EngineLocal(_task_cache_for)
+
+def get_task_cache(bind: Engine) -> ResponseCache:
+    """Cache of serialized GET /tasks/{id} responses for ``bind``"""
+    return _task_caches.get(bind)
+
+# Connection.info key collecting the tasks written inside a still-open outer transaction
+_UNCOMMITTED_TASKS = "app.uncommitted_tasks"
+
+@contextmanager
+def uncommitted_writes(connection: Connection) -> Iterator[Set[int]]:
+    """Collect the task IDs invalidated through ``connection`` while its transaction stays open.
+
+    For atomic batches: route commits there only release a savepoint, so
+    their invalidations land before the writes are visible to anyone else.
+    The caller invalidates the collected IDs again once it commits, or
+    repairs them if it rolls back. Task details read through the connection
+    meanwhile are not cached.
+    """
+    touched = connection.info[_UNCOMMITTED_TASKS] = set()
+    try:
+        yield touched
+    finally:
+        connection.info.pop(_UNCOMMITTED_TASKS, None)
+
+def reads_uncommitted(bind) -> bool:
+    """Whether reads through ``bind`` may see writes that are not committed yet"""
+    return isinstance(bind, Connection) and _UNCOMMITTED_TASKS in bind.info
+
+def invalidate_tasks(bind: Engine, task_ids: Iterable[int]) -> None:
+    """Drop cached task details after a committed write touching them"""
+    task_ids = list(task_ids)
+    if reads_uncommitted(bind):
+        bind.info[_UNCOMMITTED_TASKS].update(task_ids)
+    _task_caches.get(bind).invalidate(task_ids)
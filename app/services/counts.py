@@ -0,0 +1,129 @@
+from fastapi import Response
+from sqlalchemy import func, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import Session, select
+from typing import Callable, Dict, Hashable, Optional, Tuple
+import os
+import threading
+import time
+
+from app.services.registry import EngineLocal
+
+class CountCache:
+    """Short-TTL cache of exact counts per filter combination"""
+
+    def __init__(self, bind: Engine, ttl_seconds: Optional[float] = None, max_entries: int = 4096):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("COUNT_CACHE_TTL_SECONDS", "5"))
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def get_or_count(self, key: Hashable, counter: Callable[[], int]) -> int:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                return entry[0]
+        value = counter()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries = {k: v for k, v in self._entries.items() if v[1] > now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[key] = (value, now + self.ttl_seconds)
+        return value
+
+_count_caches: EngineLocal[CountCache] = EngineLocal(CountCache)
+
+class WorkspaceCounts:
+    """Approximate row counts per workspace, for tables scoped through their task.
+
+    A count is seeded exactly on first use and recounted once it is
+    ``ttl_seconds`` old; writes in this process adjust it in between, so
+    only other workers' writes (and cascading deletes) make it drift.
+    """
+
+    def __init__(self, bind: Engine, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("WORKSPACE_COUNT_TTL_SECONDS", "60"))
+        self._counts: Dict[Tuple[str, str], Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def get_or_count(self, table: str, workspace: str, counter: Callable[[], int]) -> int:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._counts.get((table, workspace))
+            if entry is not None and entry[1] > now:
+                return entry[0]
+        value = counter()
+        with self._lock:
+            self._counts[(table, workspace)] = (value, now + self.ttl_seconds)
+        return value
+
+    def add(self, table: str, workspace: str, delta: int) -> None:
+        """Adjust a seeded count after a committed write; unseeded counts are left alone"""
+        with self._lock:
+            entry = self._counts.get((table, workspace))
+            if entry is not None:
+                self._counts[(table, workspace)] = (max(0, entry[0] + delta), entry[1])
+
+_workspace_counts: EngineLocal[WorkspaceCounts] = EngineLocal(WorkspaceCounts)
+
+def get_workspace_counts(bind: Engine) -> WorkspaceCounts:
+    return _workspace_counts.get(bind)
+
+def exact_count(session: Session, query) -> int:
+    """COUNT(*) over a filtered select, ignoring its ordering and paging"""
+    subquery = query.order_by(None).limit(None).offset(None).subquery()
+    return session.exec(select(func.count()).select_from(subquery)).one()
+
+def planner_row_count(session: Session, table: str) -> Optional[int]:
+    """Table size from planner statistics, or ``None`` when none are available"""
+    dialect = session.get_bind().dialect.name
+    try:
+        if dialect == "postgresql":
+            estimate = session.exec(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)").bindparams(table=table)
+            ).scalar()
+            return estimate if estimate is not None and estimate >= 0 else None
+        if dialect == "sqlite":
+            analyzed = session.exec(text("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")).scalar()
+            if not analyzed:
+                return None
+            stat = session.exec(
+                text("SELECT stat FROM sqlite_stat1 WHERE tbl = :table LIMIT 1").bindparams(table=table)
+            ).scalar()
+            return int(stat.split()[0]) if stat else None
+    except DBAPIError:
+        pass
+    return None
+
+def set_total_count(
+    response: Response,
+    session: Session,
+    mode: Optional[str],
+    query,
+    key: Hashable,
+    table: str,
+    unfiltered: bool,
+    estimate: Optional[Callable[[], Optional[int]]] = None
+) -> None:
+    """Set ``X-Total-Count`` for a list endpoint.
+
+    ``exact`` counts through a short-TTL cache keyed by the filters.
+    ``approx`` prefers a free in-memory ``estimate``, then planner statistics
+    when the query is unfiltered, then falls back to the cached exact count.
+    """
+    if mode is None:
+        return
+    total = None
+    if mode == "approx":
+        if estimate is not None:
+            total = estimate()
+        if total is None and unfiltered:
+            total = planner_row_count(session, table)
+        if total is not None:
+            response.headers["X-Total-Count-Approximate"] = "true"
+    if total is None:
+        total = _count_caches.get(session.get_bind()).get_or_count((table, key), lambda: exact_count(session, query))
+    response.headers["X-Total-Count"] = str(total)
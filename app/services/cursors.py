@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+import base64
+import json
+
+class InvalidCursor(ValueError):
+    pass
+
+def to_utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Normalise a timestamp to the naive-UTC form the database stores"""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    """Pack a keyset position into an opaque URL-safe token"""
+    data = {k: v.isoformat() if isinstance(v, datetime) else v for k, v in payload.items()}
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(token: str, datetime_keys=()) -> Dict[str, Any]:
+    """Reverse :func:`encode_cursor`; raises :class:`InvalidCursor` on garbage"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        data = json.loads(raw)
+        if not isinstance(data, dict):
+            raise ValueError("cursor is not an object")
+        for key in datetime_keys:
+            if data.get(key) is not None:
+                data[key] = to_utc_naive(datetime.fromisoformat(data[key]))
+        return data
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor(str(exc)) from exc
@@ -0,0 +1,76 @@
+from typing import Any, Dict, Optional, Set, Tuple
+import asyncio
+import threading
+
+class Subscription:
+    """One subscriber's queue, bound to the event loop it was created on"""
+
+    def __init__(self, workspace: str, task_id: Optional[int], max_queue: int):
+        self.workspace = workspace
+        self.task_id = task_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(max_queue)
+        self.overflowed = False
+
+    def _push(self, event: Dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow consumer: end its stream so it reconnects with Last-Event-ID
+            self.overflowed = True
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Wait for the next event; ``None`` on timeout"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+class ActivityBroadcaster:
+    """Fans activity events out to in-process subscribers.
+
+    Subscribers are indexed by workspace and task, so a publish only
+    touches the workspace's global subscribers and those watching that task;
+    an idle subscriber is just a parked queue. ``publish`` is thread-safe and
+    may be called from the threadpool that runs sync endpoints.
+    """
+
+    def __init__(self, max_queue: int = 1000):
+        self._max_queue = max_queue
+        self._lock = threading.Lock()
+        self._watchers: Dict[Tuple[str, Optional[int]], Set[Subscription]] = {}
+
+    def subscribe(self, workspace: str, task_id: Optional[int] = None) -> Subscription:
+        """Register a subscriber to one workspace; must be called from a running event loop"""
+        subscription = Subscription(workspace, task_id, self._max_queue)
+        with self._lock:
+            self._watchers.setdefault((workspace, task_id), set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        key = (subscription.workspace, subscription.task_id)
+        with self._lock:
+            watchers = self._watchers.get(key)
+            if watchers is not None:
+                watchers.discard(subscription)
+                if not watchers:
+                    del self._watchers[key]
+
+    def publish(self, workspace: str, event: Dict[str, Any]) -> None:
+        """Deliver an event of ``workspace`` to its subscribers"""
+        with self._lock:
+            targets = list(self._watchers.get((workspace, None), ()))
+            targets.extend(self._watchers.get((workspace, event.get("task_id")), ()))
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._push, event)
+            except RuntimeError:
+                # Loop already closed; the stream is gone
+                self.unsubscribe(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(watchers) for watchers in self._watchers.values())
+
+broadcaster = ActivityBroadcaster()
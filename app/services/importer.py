@@ -0,0 +1,259 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlmodel import Session, select
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+import anyio.from_thread
+import csv
+import io
+import json
+import threading
+import uuid
+
+from app.models import Label, Task, TaskLabel
+from app.schemas import TaskCreate
+from app.services.activity import log_activities
+from app.services.registry import EngineLocal
+from app.services.reminders import get_reminder_scheduler
+from app.services.task_index import get_task_index
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+MAX_TRACKED_JOBS = 50
+CSV_LABEL_SEPARATOR = "|"
+
+class ImportFormatError(ValueError):
+    """The upload as a whole cannot be parsed (bad header, wrong encoding)"""
+
+class RequestBodyReader(io.RawIOBase):
+    """Blocking file view over an ASGI request body stream.
+
+    Meant to be read from a worker thread: each refill hops to the event
+    loop for the next chunk, so only one chunk is ever held in memory.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks
+        self._buffer = b""
+        self._exhausted = False
+
+    def readable(self) -> bool:
+        return True
+
+    async def _next_chunk(self) -> bytes:
+        return await self._chunks.__anext__()
+
+    def readinto(self, buffer) -> int:
+        while not self._buffer and not self._exhausted:
+            try:
+                self._buffer = anyio.from_thread.run(self._next_chunk)
+            except StopAsyncIteration:
+                self._exhausted = True
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+class ImportJob:
+    """Progress and collected row errors of one import; updated in place"""
+
+    def __init__(self, job_id: str, format: str, workspace: str = "default"):
+        self.job_id = job_id
+        self.format = format
+        self.workspace = workspace
+        self.status = "running"
+        self.rows_read = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.started_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+
+    def add_error(self, line: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+    def finish(self, status: str) -> None:
+        self.status = status
+        self.finished_at = datetime.now(timezone.utc)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "format": self.format,
+            "status": self.status,
+            "rows_read": self.rows_read,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": list(self.errors),
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+class ImportJobs:
+    """Recent import jobs for progress polling, oldest evicted first"""
+
+    def __init__(self, bind=None):
+        self._jobs: "OrderedDict[str, ImportJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, format: str, job_id: Optional[str] = None, workspace: str = "default") -> ImportJob:
+        job = ImportJob(job_id or uuid.uuid4().hex, format, workspace)
+        with self._lock:
+            if job.job_id in self._jobs and self._jobs[job.job_id].status == "running":
+                raise ValueError(f"Import {job.job_id} is already running")
+            self._jobs[job.job_id] = job
+            self._jobs.move_to_end(job.job_id)
+            while len(self._jobs) > MAX_TRACKED_JOBS:
+                self._jobs.popitem(last=False)
+        return job
+
+    def get(self, job_id: str) -> Optional[ImportJob]:
+        return self._jobs.get(job_id)
+
+_jobs: EngineLocal[ImportJobs] = EngineLocal(ImportJobs)
+
+def get_import_jobs(bind) -> ImportJobs:
+    return _jobs.get(bind)
+
+def _csv_records(text: io.TextIOBase) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    reader = csv.DictReader(text)
+    if not reader.fieldnames or "title" not in reader.fieldnames:
+        raise ImportFormatError("CSV header must include a 'title' column")
+    for row in reader:
+        # Blank cells mean "not given", so model defaults still apply
+        record = {key: value for key, value in row.items() if key and value not in (None, "")}
+        for column in ("labels", "label_ids"):
+            if column in record:
+                record[column] = [item.strip() for item in record[column].split(CSV_LABEL_SEPARATOR) if item.strip()]
+        yield reader.line_num, record
+
+def _ndjson_records(text: io.TextIOBase) -> Iterator[Tuple[int, Any]]:
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield line_number, exc
+
+def _parse(record: Any, label_lookup: Dict[str, int], known_label_ids: set) -> TaskCreate:
+    if isinstance(record, Exception):
+        raise ValueError(f"Invalid JSON: {record}")
+    if not isinstance(record, dict):
+        raise ValueError("Each line must be a JSON object")
+    record = dict(record)
+    label_ids = record.pop("label_ids", None) or []
+    if not isinstance(label_ids, list):
+        raise ValueError("label_ids must be a list")
+    label_ids = list(label_ids)
+    for label_id in label_ids:
+        # CSV cells arrive as strings; anything but digits is a row error, not a guess
+        if isinstance(label_id, str) and not label_id.isdigit():
+            raise ValueError(f"Invalid label ID '{label_id}'")
+    # label_names is the API's spelling of labels; both resolve by name here
+    names = []
+    for field in ("labels", "label_names"):
+        values = record.pop(field, None) or []
+        if not isinstance(values, list) or not all(isinstance(name, str) for name in values):
+            raise ValueError(f"{field} must be a list of strings")
+        names.extend(values)
+    for name in names:
+        if name not in label_lookup:
+            raise ValueError(f"Unknown label '{name}'")
+        label_ids.append(label_lookup[name])
+    task_data = TaskCreate.model_validate({**record, "label_ids": label_ids})
+    unknown = [label_id for label_id in task_data.label_ids if label_id not in known_label_ids]
+    if unknown:
+        raise ValueError(f"Unknown label IDs {unknown}")
+    return task_data
+
+def _load_batch(session: Session, batch: List[TaskCreate], workspace: str) -> None:
+    """Insert one validated batch with executemany and commit it"""
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "workspace": workspace,
+            "title": task_data.title,
+            "description": task_data.description,
+            "status": task_data.status,
+            "priority": task_data.priority,
+            "due_date": task_data.due_date,
+            "created_at": now,
+            "updated_at": now,
+            "comment_count": 0,
+            "label_ids": sorted(set(task_data.label_ids)),
+        }
+        for task_data in batch
+    ]
+    table = Task.__table__
+    task_ids = list(session.execute(insert(table).returning(table.c.id, sort_by_parameter_order=True), rows).scalars())
+
+    links = [
+        {"task_id": task_id, "label_id": label_id}
+        for task_id, row in zip(task_ids, rows)
+        for label_id in row["label_ids"]
+    ]
+    if links:
+        session.execute(insert(TaskLabel.__table__), links)
+    log_activities(session, (
+        {"task_id": task_id, "action": "created", "description": f"Task '{row['title']}' imported"}
+        for task_id, row in zip(task_ids, rows)
+    ))
+    session.commit()
+
+    bind = session.get_bind()
+    index = get_task_index(bind)
+    reminders = get_reminder_scheduler(bind)
+    for task_id, row in zip(task_ids, rows):
+        index.set_task(task_id, row["status"], row["priority"], row["label_ids"], workspace)
+        reminders.schedule(task_id, row["due_date"], row["status"])
+
+def run_import(session: Session, body: io.RawIOBase, job: ImportJob, batch_size: Optional[int] = None) -> ImportJob:
+    """Parse, validate and load an upload in batches, recording progress on ``job``.
+
+    Valid rows are committed batch by batch; invalid rows are skipped and
+    reported with their line number. Runs synchronously, so call it from a
+    worker thread when ``body`` is a :class:`RequestBodyReader`.
+    """
+    batch_size = batch_size or IMPORT_BATCH_SIZE
+    # One lookup for the whole upload; label names are resolved from memory
+    label_lookup = {
+        name: label_id for label_id, name in session.exec(select(Label.id, Label.name).where(Label.workspace == job.workspace))
+    }
+    known_label_ids = set(label_lookup.values())
+    text = io.TextIOWrapper(io.BufferedReader(body), encoding="utf-8-sig", newline="")
+    records = _csv_records(text) if job.format == "csv" else _ndjson_records(text)
+
+    batch: List[TaskCreate] = []
+    try:
+        for line_number, record in records:
+            job.rows_read += 1
+            try:
+                batch.append(_parse(record, label_lookup, known_label_ids))
+            except ValidationError as exc:
+                job.add_error(line_number, "; ".join(
+                    f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in exc.errors()
+                ))
+            except ValueError as exc:
+                job.add_error(line_number, str(exc))
+            if len(batch) >= batch_size:
+                _load_batch(session, batch, job.workspace)
+                job.imported += len(batch)
+                batch = []
+        if batch:
+            _load_batch(session, batch, job.workspace)
+            job.imported += len(batch)
+    except (ImportFormatError, UnicodeDecodeError, csv.Error) as exc:
+        session.rollback()
+        job.add_error(job.rows_read, str(exc))
+        job.finish("failed")
+        return job
+    except Exception:
+        session.rollback()
+        job.finish("failed")
+        raise
+    job.finish("completed")
+    return job
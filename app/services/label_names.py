@@ -0,0 +1,118 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, select
+from typing import Dict, Iterable, List, Set, Tuple
+import threading
+
+from app.models import Label
+from app.services.registry import EngineLocal
+
+class UnknownLabels(LookupError):
+    def __init__(self, names: List[str]):
+        super().__init__(f"Labels not found: {', '.join(names)}")
+        self.names = names
+
+class LabelDirectory:
+    """In-memory (workspace, label name) -> id map for one engine.
+
+    Label routes update it after they commit. A name it does not know is
+    looked up in the database before being reported missing, so labels
+    created by another process are picked up on first use. Cached entries
+    are confirmed by ID on every resolve, so labels another process renamed
+    or deleted are looked up again instead of being handed out stale.
+    """
+
+    def __init__(self, bind=None):
+        self._ids: Dict[Tuple[str, str], int] = {}
+        self._names: Dict[int, Tuple[str, str]] = {}
+        self._loaded: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def _remember(self, label_id: int, workspace: str, name: str) -> None:
+        stale = self._names.pop(label_id, None)
+        if stale is not None and self._ids.get(stale) == label_id:
+            del self._ids[stale]
+        self._ids[(workspace, name)] = label_id
+        self._names[label_id] = (workspace, name)
+
+    def put(self, label_id: int, workspace: str, name: str) -> None:
+        with self._lock:
+            self._remember(label_id, workspace, name)
+
+    def remove(self, label_id: int) -> None:
+        with self._lock:
+            key = self._names.pop(label_id, None)
+            if key is not None and self._ids.get(key) == label_id:
+                del self._ids[key]
+
+    def _lookup(self, session: Session, workspace: str, names: Iterable[str]) -> None:
+        query = select(Label.id, Label.name).where(Label.workspace == workspace)
+        if workspace in self._loaded:
+            query = query.where(Label.name.in_(list(names)))
+        rows = session.exec(query).all()
+        with self._lock:
+            for label_id, name in rows:
+                self._remember(label_id, workspace, name)
+            self._loaded.add(workspace)
+
+    def _confirm(self, session: Session, workspace: str, names: List[str]) -> None:
+        cached = {name: self._ids[(workspace, name)] for name in names if (workspace, name) in self._ids}
+        if not cached:
+            return
+        current = {
+            label_id: (label_workspace, name)
+            for label_id, label_workspace, name in session.exec(
+                select(Label.id, Label.workspace, Label.name).where(Label.id.in_(set(cached.values())))
+            )
+        }
+        with self._lock:
+            for name, label_id in cached.items():
+                if current.get(label_id) == (workspace, name):
+                    continue
+                if label_id in current:
+                    self._remember(label_id, *current[label_id])
+                else:
+                    self._names.pop(label_id, None)
+                if self._ids.get((workspace, name)) == label_id:
+                    del self._ids[(workspace, name)]
+
+    def resolve(self, session: Session, workspace: str, names: Iterable[str], create_missing: bool = False) -> List[int]:
+        """Map label names of ``workspace`` to IDs, in order; unknown names raise :class:`UnknownLabels`.
+
+        With ``create_missing`` unknown names are inserted (ignoring races with
+        concurrent creators) in the caller's transaction; they are cached once
+        a later lookup finds them committed.
+        """
+        names = list(dict.fromkeys(names))
+        self._confirm(session, workspace, names)
+        missing = [name for name in names if (workspace, name) not in self._ids]
+        if missing:
+            self._lookup(session, workspace, missing)
+            missing = [name for name in names if (workspace, name) not in self._ids]
+        if not missing:
+            return [self._ids[(workspace, name)] for name in names]
+        if not create_missing:
+            raise UnknownLabels(missing)
+
+        _insert_ignoring_conflicts(session, workspace, missing)
+        created = dict(session.exec(
+            select(Label.name, Label.id).where(Label.workspace == workspace, Label.name.in_(missing))
+        ).all())
+        return [self._ids[(workspace, name)] if (workspace, name) in self._ids else created[name] for name in names]
+
+def _insert_ignoring_conflicts(session: Session, workspace: str, names: List[str]) -> None:
+    dialect = session.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = insert(Label).values([{"workspace": workspace, "name": name, "color": "#808080"} for name in names])
+        session.exec(statement.on_conflict_do_nothing(index_elements=["workspace", "name"]))
+    else:
+        existing = set(session.exec(
+            select(Label.name).where(Label.workspace == workspace, Label.name.in_(names))
+        ).all())
+        session.add_all(Label(workspace=workspace, name=name) for name in names if name not in existing)
+        session.flush()
+
+_directories: EngineLocal[LabelDirectory] = EngineLocal(LabelDirectory)
+
+def get_label_directory(bind) -> LabelDirectory:
+    return _directories.get(bind)
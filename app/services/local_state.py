@@ -0,0 +1,90 @@
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+from typing import Iterable
+
+from app.models import Task
+from app.services.cache import invalidate_tasks
+from app.services.label_names import _directories
+from app.services.reminders import _schedulers
+from app.services.task_index import REFRESH_BATCH_SIZE, _indexes
+
+def reload_local_state(bind: Engine, task_ids: Iterable[int] = ()) -> None:
+    """Rebuild in-process state for ``bind`` after changes its hooks did not track.
+
+    Used by the process that moved rows between shards. Only state this
+    process already built is touched.
+    """
+    bind = bind.engine
+    invalidate_tasks(bind, task_ids)
+    index = _indexes.peek(bind)
+    if index is not None:
+        index.load(bind)
+    scheduler = _schedulers.peek(bind)
+    if scheduler is not None:
+        scheduler.load()
+    # Label names are looked up again on first use
+    _directories.discard(bind)
+
+def repair_tasks(bind: Engine, task_ids: Iterable[int]) -> None:
+    """Re-read only these tasks into ``bind``'s in-process state.
+
+    Used when an atomic batch rolls back: its write paths already updated
+    the index, reminders and caches for changes that never committed.
+    """
+    bind = bind.engine
+    task_ids = sorted(set(task_ids))
+    invalidate_tasks(bind, task_ids)
+    index = _indexes.peek(bind)
+    scheduler = _schedulers.peek(bind)
+    if task_ids and (index is not None or scheduler is not None):
+        with Session(bind) as session:
+            if index is not None:
+                index.reload_tasks(session, task_ids)
+            if scheduler is not None:
+                for start in range(0, len(task_ids), REFRESH_BATCH_SIZE):
+                    batch = task_ids[start:start + REFRESH_BATCH_SIZE]
+                    rows = {row[0]: row for row in session.exec(
+                        select(Task.id, Task.due_date, Task.status, Task.overdue_notified_for).where(Task.id.in_(batch))
+                    )}
+                    for task_id in batch:
+                        row = rows.get(task_id)
+                        if row is None or (row.due_date is not None and row.overdue_notified_for == row.due_date):
+                            scheduler.cancel(task_id)
+                        else:
+                            scheduler.schedule(task_id, row.due_date, row.status)
+    # Labels the batch created are looked up again on first use
+    _directories.discard(bind)
+
+def reload_workspace(bind: Engine, workspace: str, previous: Iterable[Engine] = ()) -> None:
+    """Re-read one workspace's tasks into ``bind``'s state and drop them from ``previous`` shards'.
+
+    Run by every worker that notices a workspace moved (see ``ShardRouter``),
+    since the copied rows reached the new shard without going through its
+    write hooks.
+    """
+    for old in previous:
+        index = _indexes.peek(old)
+        stale = index.workspace_tasks(workspace) if index is not None else []
+        if index is not None:
+            for task_id in stale:
+                index.remove_task(task_id)
+        scheduler = _schedulers.peek(old)
+        if scheduler is not None:
+            for task_id in stale:
+                scheduler.cancel(task_id)
+        invalidate_tasks(old, stale)
+        _directories.discard(old)
+    
+    bind = bind.engine
+    with Session(bind) as session:
+        rows = session.exec(select(Task.id, Task.due_date, Task.status).where(Task.workspace == workspace)).all()
+        index = _indexes.peek(bind)
+        if index is not None:
+            index.reload_tasks(session, [task_id for task_id, _, _ in rows])
+    scheduler = _schedulers.peek(bind)
+    if scheduler is not None:
+        for task_id, due_date, status in rows:
+            scheduler.schedule(task_id, due_date, status)
+    invalidate_tasks(bind, [task_id for task_id, _, _ in rows])
+    # Labels the move created on this shard are looked up again on first use
+    _directories.discard(bind)
@@ -0,0 +1,46 @@
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, delete, select
+import logging
+import time
+
+from app.models import ActivityLog, Comment, Task, TaskLabel
+from app.services.cache import invalidate_tasks
+
+logger = logging.getLogger(__name__)
+
+PURGE_CHUNK_SIZE = 1000
+# Tasks awaiting a background purge are parked here; it is not a valid
+# X-Workspace, so no request sees them
+PURGING_WORKSPACE = "~purging"
+
+def purge_task(bind: Engine, task_id: int, chunk_size: int = PURGE_CHUNK_SIZE, pause_seconds: float = 0.01) -> None:
+    """Delete a parked task's children in short transactions, then the task itself.
+
+    Each chunk commits on its own so no single statement holds locks for
+    long; the final task delete relies on ON DELETE CASCADE for anything
+    written meanwhile.
+    """
+    with Session(bind) as session:
+        for model in (ActivityLog, Comment):
+            while True:
+                chunk = select(model.id).where(model.task_id == task_id).limit(chunk_size)
+                deleted = session.exec(
+                    delete(model).where(model.id.in_(chunk)).execution_options(synchronize_session=False)
+                ).rowcount
+                session.commit()
+                if deleted < chunk_size:
+                    break
+                time.sleep(pause_seconds)
+        session.exec(delete(TaskLabel).where(TaskLabel.task_id == task_id))
+        session.exec(delete(Task).where(Task.id == task_id))
+        session.commit()
+    invalidate_tasks(bind, [task_id])
+    logger.info("Purged task %s", task_id)
+
+def purge_pending(bind: Engine, chunk_size: int = PURGE_CHUNK_SIZE) -> int:
+    """Finish purges a stopped process left behind; returns how many tasks were purged"""
+    with Session(bind) as session:
+        task_ids = session.exec(select(Task.id).where(Task.workspace == PURGING_WORKSPACE)).all()
+    for task_id in task_ids:
+        purge_task(bind, task_id, chunk_size)
+    return len(task_ids)
@@ -0,0 +1,287 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, select, update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+from typing import Callable, Dict, List, Optional, Set
+import logging
+import time
+
+from app.models import (
+    ActivityLog, Comment, DailyTaskStats, Label, LabelDailyStats, Task, TaskCycle, TaskLabel, TaskTombstone
+)
+from app.services.local_state import reload_local_state
+from app.services.summaries import reconcile_task_summaries
+
+logger = logging.getLogger(__name__)
+
+MOVE_BATCH_SIZE = 500
+# Rows written on the source up to this long before a pass started are copied again
+CATCH_UP_MARGIN = timedelta(seconds=5)
+
+class RebalanceError(RuntimeError):
+    pass
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+class _Move:
+    """Copies one workspace's rows from the source shard to the target.
+
+    Rows keep their IDs, so task URLs and sync tokens stay valid. Each
+    shard allocates IDs from its own range (see ``app.migrations``), so the
+    target has not handed them out. SQLite tables continue after their
+    largest ID, so there the ranges blur once rows move to a lower shard.
+    An ID already used on the target aborts the move.
+    """
+
+    def __init__(self, workspace: str, source: Engine, target: Engine, batch_size: int):
+        self.workspace = workspace
+        self.source = source
+        self.target = target
+        self.batch_size = batch_size
+        self.copied: Dict[str, int] = {"tasks": 0, "comments": 0, "activity_logs": 0, "task_tombstones": 0}
+        # Highest ID copied per table; append-only tables catch up from here
+        self.high_water: Dict[str, int] = {name: 0 for name in self.copied}
+        # When the last catch-up pass started; frozen source rows must not be newer
+        self.watermark: Optional[datetime] = None
+        # Target label IDs by name; label IDs are not shard-ranged, so links follow names
+        self.label_ids: Dict[str, int] = {}
+
+    def _owned(self, model):
+        # Rows of ``model`` that belong to the workspace, on either shard
+        if model in (Task, TaskTombstone):
+            return model.workspace == self.workspace
+        return model.task_id.in_(select(Task.id).where(Task.workspace == self.workspace))
+
+    def _write(self, session: Session, model, rows: List[dict]) -> None:
+        """Insert new rows and overwrite ones copied by an earlier pass"""
+        table = model.__table__
+        ids = [row["id"] for row in rows]
+        existing = set(session.execute(select(table.c.id).where(table.c.id.in_(ids))).scalars())
+        if existing:
+            owned = set(session.execute(
+                select(table.c.id).where(table.c.id.in_(existing), self._owned(model))
+            ).scalars())
+            if existing - owned:
+                raise RebalanceError(
+                    f"{table.name} IDs {sorted(existing - owned)[:10]} already exist on the target shard"
+                )
+            for row in rows:
+                if row["id"] in existing:
+                    session.execute(update(table).where(table.c.id == row["id"]).values(**row))
+        fresh = [row for row in rows if row["id"] not in existing]
+        if fresh:
+            session.execute(table.insert(), fresh)
+        self.copied[table.name] += len(rows)
+        self.high_water[table.name] = max(self.high_water[table.name], *ids)
+
+    def _copy(self, model, condition=None) -> None:
+        """Copy the workspace's rows of ``model`` matching ``condition`` in ID batches"""
+        table = model.__table__
+        last_id = 0
+        with Session(self.source) as source, Session(self.target) as target:
+            while True:
+                query = select(table).where(self._owned(model), table.c.id > last_id)
+                if condition is not None:
+                    query = query.where(condition)
+                if model in (Comment, ActivityLog):
+                    # Skip children of tasks created after the task pass; a later pass gets them
+                    query = query.where(model.task_id <= self.high_water["tasks"])
+                rows = [dict(row) for row in source.execute(query.order_by(table.c.id).limit(self.batch_size)).mappings()]
+                if not rows:
+                    return
+                last_id = rows[-1]["id"]
+                self._write(target, model, rows)
+                if model is Task:
+                    self._copy_labels(source, target, [row["id"] for row in rows])
+                target.commit()
+
+    def _sync_labels(self, source: Session, target: Session, prune: bool = False) -> None:
+        """Copy the workspace's labels to the target by name; ``prune`` drops ones the source lost"""
+        labels = Label.__table__
+        wanted = dict(source.execute(select(labels.c.name, labels.c.color).where(labels.c.workspace == self.workspace)).all())
+        existing = dict(target.execute(select(labels.c.name, labels.c.id).where(labels.c.workspace == self.workspace)).all())
+        for name, color in wanted.items():
+            if name in existing:
+                target.execute(update(labels).where(labels.c.id == existing[name]).values(color=color))
+            else:
+                target.execute(labels.insert().values(workspace=self.workspace, name=name, color=color))
+        stale = [label_id for name, label_id in existing.items() if name not in wanted]
+        if prune and stale:
+            target.execute(delete(labels).where(labels.c.id.in_(stale)))
+        self.label_ids = dict(target.execute(
+            select(labels.c.name, labels.c.id).where(labels.c.workspace == self.workspace, labels.c.name.in_(wanted))
+        ).all())
+
+    def _copy_labels(self, source: Session, target: Session, task_ids: List[int]) -> None:
+        links = source.execute(
+            select(TaskLabel.task_id, Label.name).join(Label).where(TaskLabel.task_id.in_(task_ids))
+        ).all()
+        if any(name not in self.label_ids for _, name in links):
+            self._sync_labels(source, target)
+        target.execute(delete(TaskLabel).where(TaskLabel.task_id.in_(task_ids)))
+        if links:
+            target.execute(TaskLabel.__table__.insert(), [
+                {"task_id": task_id, "label_id": self.label_ids[name]} for task_id, name in links
+            ])
+
+    def _copy_rollups(self, source: Session, target: Session) -> None:
+        """Replace the target's analytics rollups for the workspace with the source's"""
+        for model in (DailyTaskStats, LabelDailyStats, TaskCycle):
+            target.execute(delete(model).where(model.workspace == self.workspace))
+            rows = [dict(row) for row in source.execute(
+                select(model.__table__).where(model.workspace == self.workspace)
+            ).mappings()]
+            if model is LabelDailyStats and rows:
+                # Per-label counts follow their label's name, as links do
+                names = dict(source.execute(
+                    select(Label.id, Label.name).where(Label.id.in_({row["label_id"] for row in rows}))
+                ).all())
+                rows = [
+                    {**row, "label_id": self.label_ids[names[row["label_id"]]]}
+                    for row in rows if names.get(row["label_id"]) in self.label_ids
+                ]
+            if rows:
+                target.execute(model.__table__.insert(), rows)
+
+    def _ids(self, bind: Engine, model) -> Set[int]:
+        with Session(bind) as session:
+            return set(session.execute(select(model.id).where(self._owned(model))).scalars())
+
+    def clear_target(self) -> None:
+        """Drop leftovers of an earlier, aborted move (children cascade)"""
+        with Session(self.target) as target:
+            target.execute(delete(Task).where(Task.workspace == self.workspace))
+            target.execute(delete(TaskTombstone).where(TaskTombstone.workspace == self.workspace))
+            target.execute(delete(Label).where(Label.workspace == self.workspace))
+            target.commit()
+        self.label_ids = {}
+
+    def copy_all(self) -> None:
+        for model in (Task, Comment, ActivityLog, TaskTombstone):
+            self._copy(model)
+
+    def catch_up(self, since: datetime) -> None:
+        """Copy what changed on the source since a pass that started at ``since``"""
+        self.watermark = _utcnow()
+        since = since - CATCH_UP_MARGIN
+        high_water = dict(self.high_water)
+        self._copy(Task, (Task.id > high_water["tasks"]) | (Task.updated_at >= since))
+        self._copy(Comment, (Comment.id > high_water["comments"]) | (Comment.updated_at >= since))
+        self._copy(ActivityLog, ActivityLog.id > high_water["activity_logs"])
+        self._copy(TaskTombstone, TaskTombstone.id > high_water["task_tombstones"])
+
+    def check_quiet(self, step: str) -> None:
+        """Abort if the source took writes after the last catch-up pass started.
+
+        Nothing should write to a frozen or moved workspace; a worker with a
+        stale placement still could, and its rows would be lost.
+        """
+        written = []
+        with Session(self.source) as source:
+            for model in (Task, Comment, ActivityLog, TaskTombstone):
+                table = model.__table__
+                newer = table.c.id > self.high_water[table.name]
+                if "updated_at" in table.c:
+                    newer = newer | (table.c.updated_at > self.watermark)
+                if source.execute(select(table.c.id).where(self._owned(model), newer).limit(1)).first() is not None:
+                    written.append(table.name)
+        if written:
+            raise RebalanceError(
+                f"Workspace {self.workspace!r} took writes on the source shard during the move "
+                f"({', '.join(written)}); stopped before {step}"
+            )
+
+    def finish(self) -> None:
+        """Make the target match the source exactly; only run while the workspace is frozen.
+
+        Online passes skip some rows and never see deletes, so every table is
+        compared by ID set: missing rows are copied, extra ones deleted.
+        """
+        self.check_quiet("finishing")
+        extra = {}
+        for model in (Task, Comment, ActivityLog, TaskTombstone):
+            source_ids, target_ids = self._ids(self.source, model), self._ids(self.target, model)
+            missing = sorted(source_ids - target_ids)
+            for start in range(0, len(missing), self.batch_size):
+                self._copy(model, model.id.in_(missing[start:start + self.batch_size]))
+            extra[model] = sorted(target_ids - source_ids)
+        task_ids = sorted(self._ids(self.source, Task))
+        with Session(self.source) as source, Session(self.target) as target:
+            # Labels can be renamed, recoloured or deleted without touching a task
+            self._sync_labels(source, target, prune=True)
+            for model in (Comment, ActivityLog, TaskTombstone, Task):
+                for start in range(0, len(extra[model]), self.batch_size):
+                    target.execute(delete(model).where(model.id.in_(extra[model][start:start + self.batch_size])))
+            # Label edits do not always touch updated_at, so relink every task
+            for start in range(0, len(task_ids), self.batch_size):
+                self._copy_labels(source, target, task_ids[start:start + self.batch_size])
+            reconcile_task_summaries(target, batch_size=self.batch_size, workspace=self.workspace)
+            self._copy_rollups(source, target)
+            target.commit()
+
+    def delete_source(self) -> List[int]:
+        """Remove the workspace from the source in short transactions"""
+        self.check_quiet("deleting the source rows")
+        task_ids = sorted(self._ids(self.source, Task))
+        with Session(self.source) as source:
+            for start in range(0, len(task_ids), self.batch_size):
+                source.execute(delete(Task).where(Task.id.in_(task_ids[start:start + self.batch_size])))
+                source.commit()
+            for model in (TaskTombstone, DailyTaskStats, LabelDailyStats, TaskCycle, Label):
+                source.execute(delete(model).where(model.workspace == self.workspace))
+            source.commit()
+        return task_ids
+
+def move_workspace(
+    router,
+    workspace: str,
+    target_shard: int,
+    batch_size: int = MOVE_BATCH_SIZE,
+    grace: float = 1.0,
+    sleep: Callable[[float], None] = time.sleep
+) -> Dict[str, int]:
+    """Move a workspace to another shard while the API keeps serving it.
+
+    1. Copy every row to the target while the source stays writable, then
+       catch up on whatever changed meanwhile.
+    2. Freeze the workspace (writes get 503 + Retry-After) and wait out the
+       routers' placement cache, so no worker still writes to the source.
+    3. Copy the last changes, point the placement at the target, wait again
+       for readers to follow, and delete the source rows.
+    """
+    if not 0 <= target_shard < len(router.engines):
+        raise RebalanceError(f"No shard {target_shard}; configured shards: 0-{len(router.engines) - 1}")
+    placement = router.placement(workspace)
+    if placement.shard == target_shard:
+        raise RebalanceError(f"Workspace {workspace!r} is already on shard {target_shard}")
+    if placement.state != "active":
+        raise RebalanceError(f"Workspace {workspace!r} is {placement.state}; finish or reset that move first")
+    source, target = router.engines[placement.shard], router.engines[target_shard]
+    move = _Move(workspace, source, target, batch_size)
+    settle = router.ttl + grace
+
+    move.clear_target()
+    started = _utcnow()
+    try:
+        move.copy_all()
+        logger.info("Copied workspace %s to shard %s: %s", workspace, target_shard, move.copied)
+        since, started = started, _utcnow()
+        move.catch_up(since)
+
+        router.set_placement(workspace, placement.shard, "frozen")
+        sleep(settle)
+        move.catch_up(started)
+        move.finish()
+    except Exception:
+        router.set_placement(workspace, placement.shard, "active")
+        move.clear_target()
+        raise
+
+    router.set_placement(workspace, target_shard, "active")
+    sleep(settle)
+    moved = move.delete_source()
+    for bind in (source, target):
+        reload_local_state(bind, moved)
+    logger.info("Moved workspace %s from shard %s to %s", workspace, placement.shard, target_shard)
+    return {"from_shard": placement.shard, "to_shard": target_shard, "tasks": len(moved), "rows_copied": sum(move.copied.values())}
@@ -0,0 +1,42 @@
+from sqlalchemy.engine import Engine
+from typing import Callable, Dict, Generic, TypeVar
+import threading
+import weakref
+
+T = TypeVar("T")
+
+class EngineLocal(Generic[T]):
+    """Holds one instance of some in-process state per database engine.
+
+    Request handlers look their state up from ``session.get_bind()``, so a test
+    engine (or a second database) never sees another engine's data. A
+    session bound to a connection (as in a batch transaction) resolves to
+    that connection's engine.
+    """
+
+    def __init__(self, factory: Callable[[Engine], T]):
+        self._factory = factory
+        self._instances: "weakref.WeakKeyDictionary[Engine, T]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self, bind: Engine) -> T:
+        bind = bind.engine
+        instance = self._instances.get(bind)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(bind)
+                if instance is None:
+                    instance = self._factory(bind)
+                    self._instances[bind] = instance
+        return instance
+
+    def peek(self, bind: Engine):
+        """Return the instance for ``bind`` without creating one"""
+        return self._instances.get(bind.engine)
+
+    def discard(self, bind: Engine) -> None:
+        with self._lock:
+            self._instances.pop(bind.engine, None)
+
+    def instances(self) -> Dict[Engine, T]:
+        return dict(self._instances)
@@ -0,0 +1,152 @@
+from datetime import datetime, timezone
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select, update
+from typing import Dict, List, Optional, Tuple
+import heapq
+import logging
+import threading
+
+from app.models import Task
+from app.models.task import TaskStatus
+from app.services.activity import log_activity
+from app.services.cursors import to_utc_naive
+from app.services.registry import EngineLocal
+
+logger = logging.getLogger(__name__)
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+class ReminderScheduler:
+    """Emits an "overdue" activity for each open task when its due date passes.
+
+    Keeps a min-heap of upcoming due dates, loaded once and then updated by
+    the task write paths, and sleeps until the earliest one instead of
+    polling the table. Superseded heap entries are skipped lazily. Each
+    reminder is claimed with a conditional UPDATE on the task, so several
+    workers running their own scheduler never emit it twice.
+    """
+
+    def __init__(self, bind: Engine):
+        self._bind = bind
+        self._heap: List[Tuple[datetime, int]] = []
+        self._due: Dict[int, datetime] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.load()
+
+    def load(self) -> None:
+        """Load every open task whose reminder has not been emitted yet"""
+        query = select(Task.id, Task.due_date).where(
+            Task.due_date.is_not(None),
+            Task.status != TaskStatus.DONE,
+            (Task.overdue_notified_for.is_(None)) | (Task.overdue_notified_for != Task.due_date)
+        )
+        with Session(self._bind) as session:
+            rows = session.exec(query).all()
+        with self._cond:
+            self._due = {task_id: to_utc_naive(due) for task_id, due in rows}
+            self._heap = [(due, task_id) for task_id, due in self._due.items()]
+            heapq.heapify(self._heap)
+            self._cond.notify()
+
+    def schedule(self, task_id: int, due_date: Optional[datetime], status) -> None:
+        """Track a created or updated task; done or undated tasks are dropped"""
+        if due_date is None or TaskStatus(status) == TaskStatus.DONE:
+            return self.cancel(task_id)
+        due_date = to_utc_naive(due_date)
+        with self._cond:
+            if self._due.get(task_id) == due_date:
+                return
+            self._due[task_id] = due_date
+            heapq.heappush(self._heap, (due_date, task_id))
+            if self._heap[0] == (due_date, task_id):
+                self._cond.notify()
+
+    def cancel(self, task_id: int) -> None:
+        with self._cond:
+            self._due.pop(task_id, None)
+
+    def _next_due(self) -> Optional[datetime]:
+        # Caller holds the lock; discards superseded entries on the way
+        while self._heap:
+            due, task_id = self._heap[0]
+            if self._due.get(task_id) == due:
+                return due
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now: Optional[datetime] = None) -> List[Tuple[int, datetime]]:
+        """Remove and return every (task_id, due_date) due at ``now``"""
+        now = now or _utcnow()
+        due_now = []
+        with self._cond:
+            while (due := self._next_due()) is not None and due <= now:
+                _, task_id = heapq.heappop(self._heap)
+                del self._due[task_id]
+                due_now.append((task_id, due))
+        return due_now
+
+    def run_pending(self, now: Optional[datetime] = None) -> int:
+        """Emit reminders that are due; returns how many were written"""
+        emitted = 0
+        due_now = self.pop_due(now)
+        if not due_now:
+            return 0
+        with Session(self._bind) as session:
+            for task_id, due in due_now:
+                # Claim the reminder; fails if the task changed, closed or was already notified
+                claimed = session.exec(
+                    update(Task)
+                    .where(
+                        Task.id == task_id,
+                        Task.due_date == due,
+                        Task.status != TaskStatus.DONE,
+                        (Task.overdue_notified_for.is_(None)) | (Task.overdue_notified_for != due)
+                    )
+                    .values(overdue_notified_for=due)
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                if claimed:
+                    log_activity(session, task_id, "overdue", f"Task is overdue (due {due.isoformat()})")
+                    emitted += 1
+            session.commit()
+        return emitted
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+                due = self._next_due()
+                timeout = None if due is None else max(0.0, (due - _utcnow()).total_seconds())
+                if timeout is None or timeout > 0:
+                    self._cond.wait(timeout)
+                    continue
+            try:
+                self.run_pending()
+            except Exception:
+                logger.exception("Failed to emit overdue reminders")
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="reminder-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+
+_schedulers: EngineLocal[ReminderScheduler] = EngineLocal(ReminderScheduler)
+
+def get_reminder_scheduler(bind: Engine) -> ReminderScheduler:
+    """Return the scheduler for ``bind``, loading its heap on first use"""
+    return _schedulers.get(bind)
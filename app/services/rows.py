@@ -0,0 +1,49 @@
+from datetime import datetime
+from enum import Enum
+from fastapi import Response
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlmodel import Session
+from typing import Any, Dict, List, Optional, Tuple, Type
+import json
+
+def _columns(model, schema: Type[BaseModel]) -> Tuple:
+    table = model.__table__
+    return tuple(table.c[name] for name in schema.model_fields if name in table.c)
+
+def lean_select(model, schema: Type[BaseModel]):
+    """Core SELECT of exactly the table columns ``schema`` exposes.
+
+    Rows come back as plain tuples: no ORM instances, identity map or
+    attribute instrumentation. Filter it with the model's columns as usual.
+    """
+    return select(*_columns(model, schema))
+
+def fetch_dicts(session: Session, query) -> List[Dict[str, Any]]:
+    """Run a lean select on the session's connection and zip rows into dicts"""
+    result = session.connection().execute(query)
+    keys = tuple(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+def _json_default(value: Any) -> Any:
+    # Same wire format as pydantic: ISO datetimes (UTC as 'Z'), enum values
+    if isinstance(value, datetime):
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def to_json(content: Any) -> str:
+    """Compact JSON in the API's wire format, for rows from :func:`fetch_dicts`"""
+    return json.dumps(content, default=_json_default, ensure_ascii=False, separators=(",", ":"))
+
+def json_response(content: Any, response: Optional[Response] = None) -> Response:
+    """Serialize already-shaped response data once, skipping response-model validation.
+
+    Headers set on the endpoint's injected ``response`` (totals, cursors)
+    are carried over, since FastAPI drops them once a Response is returned.
+    """
+    body = to_json(content)
+    headers = dict(response.headers) if response is not None else None
+    return Response(content=body.encode("utf-8"), headers=headers, media_type="application/json")
@@ -0,0 +1,90 @@
+from datetime import datetime, timezone
+from sqlmodel import Session, func, select, update
+from typing import Iterable, Optional
+
+from app.models import ActivityLog, Comment, Task, TaskLabel
+from app.services.cursors import to_utc_naive
+
+RECONCILE_BATCH_SIZE = 1000
+
+def record_comment_change(session: Session, task_id: int, delta: int = 0) -> None:
+    """Atomically shift a task's comment_count and mark the task changed, inside the caller's transaction.
+
+    Comments are part of the task's representation, so ``updated_at`` (delta
+    sync, index refresh) and ``version`` (ETag / If-Match) move with them.
+    """
+    session.exec(
+        update(Task)
+        .where(Task.id == task_id)
+        .values(
+            comment_count=Task.comment_count + delta,
+            updated_at=datetime.now(timezone.utc),
+            version=Task.version + 1
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+def touch_last_activity(session: Session, task_ids: Iterable[int], at: Optional[datetime] = None) -> None:
+    """Record activity time on tasks inside the caller's transaction"""
+    task_ids = list(set(task_ids))
+    if task_ids:
+        session.exec(
+            update(Task)
+            .where(Task.id.in_(task_ids))
+            .values(last_activity_at=to_utc_naive(at or datetime.now(timezone.utc)))
+            .execution_options(synchronize_session=False)
+        )
+
+def reconcile_task_summaries(session: Session, batch_size: int = RECONCILE_BATCH_SIZE, workspace: Optional[str] = None) -> int:
+    """Recompute comment_count, last_activity_at and label_ids; returns tasks repaired.
+
+    Walks tasks (of one ``workspace``, or all) in ID batches with one grouped
+    query per summary, so it can run against a live database. Changes are
+    flushed, not committed.
+    """
+    repaired = 0
+    last_id = 0
+    while True:
+        query = select(Task.id, Task.comment_count, Task.last_activity_at, Task.label_ids)
+        if workspace is not None:
+            query = query.where(Task.workspace == workspace)
+        tasks = session.exec(
+            query
+            .where(Task.id > last_id)
+            .order_by(Task.id)
+            .limit(batch_size)
+        ).all()
+        if not tasks:
+            return repaired
+        ids = [row.id for row in tasks]
+        last_id = ids[-1]
+        
+        comment_counts = dict(session.exec(
+            select(Comment.task_id, func.count()).where(Comment.task_id.in_(ids)).group_by(Comment.task_id)
+        ).all())
+        last_activity = dict(session.exec(
+            select(ActivityLog.task_id, func.max(ActivityLog.created_at)).where(ActivityLog.task_id.in_(ids)).group_by(ActivityLog.task_id)
+        ).all())
+        label_ids = {}
+        for task_id, label_id in session.exec(
+            select(TaskLabel.task_id, TaskLabel.label_id).where(TaskLabel.task_id.in_(ids)).order_by(TaskLabel.task_id, TaskLabel.label_id)
+        ):
+            label_ids.setdefault(task_id, []).append(label_id)
+        
+        for row in tasks:
+            expected = {
+                "comment_count": comment_counts.get(row.id, 0),
+                "last_activity_at": last_activity.get(row.id),
+                "label_ids": label_ids.get(row.id, []),
+            }
+            actual = {
+                "comment_count": row.comment_count,
+                "last_activity_at": row.last_activity_at,
+                "label_ids": sorted(row.label_ids or []),
+            }
+            if expected != actual:
+                session.exec(
+                    update(Task).where(Task.id == row.id).values(**expected).execution_options(synchronize_session=False)
+                )
+                repaired += 1
+        session.flush()
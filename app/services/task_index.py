@@ -0,0 +1,381 @@
+from array import array
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime, timedelta
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, func, select
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import threading
+import time
+
+from app.models import Task, TaskLabel, TaskTombstone
+from app.models.task import TaskStatus, TaskPriority
+from app.services.cursors import to_utc_naive
+from app.services.registry import EngineLocal
+
+# How far back a refresh re-reads tasks, to cover clock skew between workers
+# and transactions that commit after later ones; writes slower than this to
+# commit are picked up the next time the task changes
+REFRESH_MARGIN = timedelta(seconds=5)
+REFRESH_BATCH_SIZE = 500
+
+# (newest tasks.updated_at, newest task_tombstones.id)
+Mark = Tuple[Optional[datetime], int]
+
+# A chunk holds up to this many IDs as a sorted array before switching to a bitset
+ARRAY_CHUNK_MAX = 4096
+_CHUNK_BYTES = 1 << 13
+_EMPTY_CHUNK = bytes(_CHUNK_BYTES)
+
+def _chunk_contains(chunk, low: int) -> bool:
+    if isinstance(chunk, array):
+        i = bisect_left(chunk, low)
+        return i < len(chunk) and chunk[i] == low
+    return bool(chunk[low >> 3] >> (low & 7) & 1)
+
+def _chunk_bits(chunk) -> int:
+    if isinstance(chunk, array):
+        bits = 0
+        for low in chunk:
+            bits |= 1 << low
+        return bits
+    return int.from_bytes(chunk, "little")
+
+def _bit_positions(bits: int) -> Iterator[int]:
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
+
+def _chunk_from_bits(bits: int):
+    if bits.bit_count() > ARRAY_CHUNK_MAX:
+        return bytearray(bits.to_bytes(_CHUNK_BYTES, "little"))
+    return array("H", _bit_positions(bits))
+
+def _chunk_lows(chunk) -> Iterator[int]:
+    if isinstance(chunk, array):
+        return iter(chunk)
+    return _bit_positions(_chunk_bits(chunk))
+
+class Bitmap:
+    """Set of non-negative integers split into 65536-wide chunks.
+
+    IDs are split into a 16-bit high key and a 16-bit low part. A chunk
+    with up to ``ARRAY_CHUNK_MAX`` IDs is a sorted ``array('H')``; fuller
+    chunks become an 8 KB bitset that is updated in place. Set algebra
+    works chunk by chunk.
+    """
+
+    __slots__ = ("_containers",)
+
+    def __init__(self, values: Iterable[int] = ()):
+        self._containers: Dict[int, object] = {}
+        for value in values:
+            self.add(value)
+
+    def add(self, value: int) -> None:
+        high, low = value >> 16, value & 0xFFFF
+        chunk = self._containers.get(high)
+        if chunk is None:
+            self._containers[high] = array("H", [low])
+        elif isinstance(chunk, array):
+            i = bisect_left(chunk, low)
+            if i < len(chunk) and chunk[i] == low:
+                return
+            if len(chunk) < ARRAY_CHUNK_MAX:
+                chunk.insert(i, low)
+            else:
+                self._containers[high] = bytearray((_chunk_bits(chunk) | 1 << low).to_bytes(_CHUNK_BYTES, "little"))
+        else:
+            chunk[low >> 3] |= 1 << (low & 7)
+
+    def discard(self, value: int) -> None:
+        high, low = value >> 16, value & 0xFFFF
+        chunk = self._containers.get(high)
+        if chunk is None:
+            return
+        if isinstance(chunk, array):
+            i = bisect_left(chunk, low)
+            if i < len(chunk) and chunk[i] == low:
+                del chunk[i]
+            empty = not chunk
+        else:
+            chunk[low >> 3] &= ~(1 << (low & 7)) & 0xFF
+            empty = not chunk[low >> 3] and chunk == _EMPTY_CHUNK
+        if empty:
+            del self._containers[high]
+
+    def __contains__(self, value: int) -> bool:
+        chunk = self._containers.get(value >> 16)
+        return chunk is not None and _chunk_contains(chunk, value & 0xFFFF)
+
+    def __len__(self) -> int:
+        return sum(
+            len(chunk) if isinstance(chunk, array) else _chunk_bits(chunk).bit_count()
+            for chunk in self._containers.values()
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self._containers)
+
+    def __iter__(self) -> Iterator[int]:
+        for high in sorted(self._containers):
+            base = high << 16
+            for low in _chunk_lows(self._containers[high]):
+                yield base | low
+
+    def copy(self) -> "Bitmap":
+        result = Bitmap()
+        result._containers = {high: chunk[:] for high, chunk in self._containers.items()}
+        return result
+
+    def _set(self, high: int, chunk) -> None:
+        if len(chunk):
+            self._containers[high] = chunk
+
+    def __and__(self, other: "Bitmap") -> "Bitmap":
+        result = Bitmap()
+        small, large = sorted((self._containers, other._containers), key=len)
+        for high, chunk in small.items():
+            match = large.get(high)
+            if match is None:
+                continue
+            if isinstance(chunk, array) or isinstance(match, array):
+                lows, other_chunk = (chunk, match) if isinstance(chunk, array) else (match, chunk)
+                result._set(high, array("H", (low for low in lows if _chunk_contains(other_chunk, low))))
+            else:
+                result._set(high, _chunk_from_bits(_chunk_bits(chunk) & _chunk_bits(match)))
+        return result
+
+    def __or__(self, other: "Bitmap") -> "Bitmap":
+        result = self.copy()
+        for high, chunk in other._containers.items():
+            mine = result._containers.get(high)
+            if mine is None:
+                result._containers[high] = chunk[:]
+            else:
+                result._containers[high] = _chunk_from_bits(_chunk_bits(mine) | _chunk_bits(chunk))
+        return result
+
+    def __sub__(self, other: "Bitmap") -> "Bitmap":
+        result = Bitmap()
+        for high, chunk in self._containers.items():
+            theirs = other._containers.get(high)
+            if theirs is None:
+                result._containers[high] = chunk[:]
+            elif isinstance(chunk, array):
+                result._set(high, array("H", (low for low in chunk if not _chunk_contains(theirs, low))))
+            else:
+                result._set(high, _chunk_from_bits(_chunk_bits(chunk) & ~_chunk_bits(theirs)))
+        return result
+
+class TaskBitmapIndex:
+    """In-memory task ID bitmaps per label, status and priority.
+
+    Loaded once from ``tasks``/``task_labels`` and kept current by the task and
+    label write paths, so label set filters resolve without touching the
+    database before the final page fetch. Writes made by other worker
+    processes are caught up by :meth:`refresh`.
+    """
+
+    def __init__(self, bind: Engine):
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        # Marks seen within REFRESH_MARGIN, oldest first, and the last older one
+        self._recent: Deque[Tuple[float, Mark]] = deque()
+        self._settled: Mark = (None, 0)
+        self.all = Bitmap()
+        self.by_label: Dict[int, Bitmap] = {}
+        self.by_status: Dict[TaskStatus, Bitmap] = {s: Bitmap() for s in TaskStatus}
+        self.by_priority: Dict[TaskPriority, Bitmap] = {p: Bitmap() for p in TaskPriority}
+        self.by_workspace: Dict[str, Bitmap] = {}
+        # Reverse maps, so a write only touches the bitmaps the task is in
+        self._workspace_of: Dict[int, str] = {}
+        self._labels_of: Dict[int, Tuple[int, ...]] = {}
+        self.load(bind)
+
+    def load(self, bind: Engine) -> None:
+        """(Re)build every bitmap from the database"""
+        with self._refresh_lock, self._lock, Session(bind) as session:
+            mark = self._read_mark(session)
+            self._settled = mark
+            self._recent = deque([(time.monotonic(), mark)])
+            self.all = Bitmap()
+            self.by_label = {}
+            self.by_status = {s: Bitmap() for s in TaskStatus}
+            self.by_priority = {p: Bitmap() for p in TaskPriority}
+            self.by_workspace = {}
+            self._workspace_of = {}
+            self._labels_of = {}
+            for task_id, status, priority, workspace in session.exec(select(Task.id, Task.status, Task.priority, Task.workspace)):
+                self.all.add(task_id)
+                self.by_workspace.setdefault(workspace, Bitmap()).add(task_id)
+                self._workspace_of[task_id] = workspace
+                self.by_status[TaskStatus(status)].add(task_id)
+                self.by_priority[TaskPriority(priority)].add(task_id)
+            for task_id, label_id in session.exec(select(TaskLabel.task_id, TaskLabel.label_id)):
+                self.by_label.setdefault(label_id, Bitmap()).add(task_id)
+                self._labels_of[task_id] = self._labels_of.get(task_id, ()) + (label_id,)
+
+    def set_task(
+        self,
+        task_id: int,
+        status,
+        priority,
+        label_ids: Optional[Iterable[int]] = None,
+        workspace: Optional[str] = None
+    ) -> None:
+        """Record a created or updated task; ``None`` keeps its labels or workspace"""
+        with self._lock:
+            self.all.add(task_id)
+            if workspace is not None:
+                previous = self._workspace_of.get(task_id)
+                if previous is not None and previous != workspace:
+                    self.by_workspace[previous].discard(task_id)
+                self.by_workspace.setdefault(workspace, Bitmap()).add(task_id)
+                self._workspace_of[task_id] = workspace
+            for bitmap in (*self.by_status.values(), *self.by_priority.values()):
+                bitmap.discard(task_id)
+            self.by_status[TaskStatus(status)].add(task_id)
+            self.by_priority[TaskPriority(priority)].add(task_id)
+            if label_ids is not None:
+                label_ids = tuple(sorted(set(label_ids)))
+                for label_id in set(self._labels_of.get(task_id, ())) - set(label_ids):
+                    if label_id in self.by_label:
+                        self.by_label[label_id].discard(task_id)
+                for label_id in label_ids:
+                    self.by_label.setdefault(label_id, Bitmap()).add(task_id)
+                if label_ids:
+                    self._labels_of[task_id] = label_ids
+                else:
+                    self._labels_of.pop(task_id, None)
+
+    @staticmethod
+    def _read_mark(session: Session) -> Mark:
+        latest_tombstone = select(func.max(TaskTombstone.id)).scalar_subquery()
+        updated_at, tombstone_id = session.exec(select(func.max(Task.updated_at), latest_tombstone)).one()
+        return to_utc_naive(updated_at), tombstone_id or 0
+
+    def refresh(self, session: Session) -> None:
+        """Catch up on tasks written or deleted by other processes.
+
+        Costs one query on the ``updated_at`` index and the tombstone key
+        while nothing changed. Once the newest ``updated_at`` or tombstone
+        moves, tasks updated or deleted since the last settled mark are
+        re-read, and that keeps happening for ``REFRESH_MARGIN`` so commits
+        that land out of order are not missed.
+        """
+        with self._refresh_lock:
+            mark = self._read_mark(session)
+            latest = self._recent[-1][1] if self._recent else self._settled
+            if mark == latest and not self._recent:
+                return
+            now = time.monotonic()
+            if mark != latest:
+                self._recent.append((now, mark))
+            self._catch_up(session, self._settled)
+            while self._recent and now - self._recent[0][0] >= REFRESH_MARGIN.total_seconds():
+                self._settled = self._recent.popleft()[1]
+
+    def _catch_up(self, session: Session, since: Mark) -> None:
+        updated_after, tombstone_id = since
+        changed = select(Task.id)
+        if updated_after is not None:
+            changed = changed.where(Task.updated_at >= updated_after - REFRESH_MARGIN)
+        task_ids: Set[int] = set(session.exec(changed))
+        task_ids.update(session.exec(select(TaskTombstone.task_id).where(TaskTombstone.id > tombstone_id)))
+        self.reload_tasks(session, task_ids)
+
+    def reload_tasks(self, session: Session, task_ids: Iterable[int]) -> None:
+        """Re-read these tasks from the database; ones that no longer exist are dropped"""
+        ordered = sorted(set(task_ids))
+        for start in range(0, len(ordered), REFRESH_BATCH_SIZE):
+            batch = ordered[start:start + REFRESH_BATCH_SIZE]
+            rows = session.exec(
+                select(Task.id, Task.status, Task.priority, Task.workspace).where(Task.id.in_(batch))
+            ).all()
+            labels: Dict[int, List[int]] = {}
+            for task_id, label_id in session.exec(
+                select(TaskLabel.task_id, TaskLabel.label_id).where(TaskLabel.task_id.in_(batch))
+            ):
+                labels.setdefault(task_id, []).append(label_id)
+            with self._lock:
+                for task_id, status, priority, workspace in rows:
+                    self.set_task(task_id, status, priority, labels.get(task_id, []), workspace)
+                for task_id in set(batch) - {row[0] for row in rows}:
+                    self.remove_task(task_id)
+
+    def remove_task(self, task_id: int) -> None:
+        with self._lock:
+            self.all.discard(task_id)
+            for bitmap in (*self.by_status.values(), *self.by_priority.values()):
+                bitmap.discard(task_id)
+            workspace = self._workspace_of.pop(task_id, None)
+            if workspace is not None:
+                self.by_workspace[workspace].discard(task_id)
+            for label_id in self._labels_of.pop(task_id, ()):
+                if label_id in self.by_label:
+                    self.by_label[label_id].discard(task_id)
+
+    def remove_label(self, label_id: int) -> None:
+        with self._lock:
+            for task_id in self.by_label.pop(label_id, ()):
+                rest = tuple(other for other in self._labels_of.get(task_id, ()) if other != label_id)
+                if rest:
+                    self._labels_of[task_id] = rest
+                else:
+                    self._labels_of.pop(task_id, None)
+
+    def in_workspace(self, task_id: int, workspace: str) -> bool:
+        with self._lock:
+            return task_id in self.by_workspace.get(workspace, Bitmap())
+
+    def workspace_tasks(self, workspace: str) -> List[int]:
+        with self._lock:
+            return list(self.by_workspace.get(workspace, ()))
+
+    def tasks_with_label(self, label_id: int) -> List[int]:
+        with self._lock:
+            return list(self.by_label.get(label_id, ()))
+
+    def resolve(
+        self,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        label_all: Optional[List[int]] = None,
+        label_any: Optional[List[int]] = None,
+        label_none: Optional[List[int]] = None,
+        workspace: Optional[str] = None,
+    ) -> Bitmap:
+        """Combine the filters into the matching set of task IDs"""
+        with self._lock:
+            result = self.all
+            if workspace is not None:
+                result = result & self.by_workspace.get(workspace, Bitmap())
+            if status:
+                result = result & self._lookup(self.by_status, TaskStatus, status)
+            if priority:
+                result = result & self._lookup(self.by_priority, TaskPriority, priority)
+            for label_id in label_all or []:
+                result = result & self.by_label.get(label_id, Bitmap())
+            if label_any:
+                any_of = Bitmap()
+                for label_id in label_any:
+                    any_of = any_of | self.by_label.get(label_id, Bitmap())
+                result = result & any_of
+            for label_id in label_none or []:
+                result = result - self.by_label.get(label_id, Bitmap())
+            return result.copy() if result is self.all else result
+
+    @staticmethod
+    def _lookup(bitmaps, enum, value) -> Bitmap:
+        try:
+            return bitmaps[enum(value)]
+        except ValueError:
+            return Bitmap()
+
+_indexes: EngineLocal[TaskBitmapIndex] = EngineLocal(TaskBitmapIndex)
+
+def get_task_index(bind: Engine) -> TaskBitmapIndex:
+    """Return the bitmap index for ``bind``, loading it on first use"""
+    return _indexes.get(bind)
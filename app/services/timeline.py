@@ -0,0 +1,95 @@
+from datetime import datetime
+from sqlalchemy import and_, or_
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+from typing import Any, Dict, Iterator, Optional, Tuple
+import heapq
+import json
+
+from app.models import ActivityLog, Comment
+from app.schemas import ActivityLogRead, CommentRead
+from app.services.cursors import encode_cursor, to_utc_naive
+from app.services.rows import fetch_dicts, lean_select, to_json
+
+TIMELINE_CHUNK_SIZE = 200
+
+# (rank, type, model, schema); the rank orders entries sharing a timestamp
+_SOURCES = (
+    (0, "activity", ActivityLog, ActivityLogRead),
+    (1, "comment", Comment, CommentRead),
+)
+
+Position = Tuple[datetime, int, int]
+
+def _after(model, rank: int, position: Position, descending: bool):
+    """Rows of one source strictly past ``position`` in (created_at, rank, id) order"""
+    created_at, position_rank, row_id = position
+    later = model.created_at < created_at if descending else model.created_at > created_at
+    if rank == position_rank:
+        same_time = model.id < row_id if descending else model.id > row_id
+        return or_(later, and_(model.created_at == created_at, same_time))
+    if (rank > position_rank) != descending:
+        # Same timestamp, but this source sorts after the position's
+        return model.created_at <= created_at if descending else model.created_at >= created_at
+    return later
+
+def _source(bind: Engine, task_id: int, rank: int, kind: str, model, schema, after: Optional[Position], descending: bool, chunk_size: int):
+    """One source in timeline order, read a keyset chunk per short-lived session"""
+    order = (model.created_at.desc(), model.id.desc()) if descending else (model.created_at, model.id)
+    position = after
+    while True:
+        query = lean_select(model, schema).where(model.task_id == task_id)
+        if position is not None:
+            query = query.where(_after(model, rank, position, descending))
+        with Session(bind) as session:
+            rows = fetch_dicts(session, query.order_by(*order).limit(chunk_size))
+        for row in rows:
+            position = (to_utc_naive(row["created_at"]), rank, row["id"])
+            yield position, {"type": kind, **row}
+        if len(rows) < chunk_size:
+            return
+
+def stream_timeline(
+    bind: Engine,
+    task_id: int,
+    after: Optional[Position],
+    limit: int,
+    descending: bool = False,
+    chunk_size: int = TIMELINE_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Stream ``{"items": [...], "next_cursor": ...}`` for one task's merged history.
+
+    Comments and activity are each walked along their (task_id, created_at,
+    id) index and k-way merged, so memory stays at one chunk per source and
+    the first items go out before the last are read.
+    """
+    sources = [
+        _source(bind, task_id, rank, kind, model, schema, after, descending, chunk_size)
+        for rank, kind, model, schema in _SOURCES
+    ]
+    merged = heapq.merge(*sources, key=lambda entry: entry[0], reverse=descending)
+
+    yield b'{"items":['
+    written = 0
+    buffered = []
+    position = None
+    next_cursor = None
+    for entry_position, item in merged:
+        if written + len(buffered) == limit:
+            # One more entry exists: continue after the last one sent
+            created_at, rank, row_id = position
+            next_cursor = encode_cursor({"c": created_at, "r": rank, "i": row_id})
+            break
+        buffered.append(to_json(item))
+        position = entry_position
+        # Flush the first item at once so the client can start rendering
+        if len(buffered) == chunk_size or written + len(buffered) == 1:
+            yield (b"," if written else b"") + ",".join(buffered).encode()
+            written += len(buffered)
+            buffered = []
+    if buffered:
+        yield (b"," if written else b"") + ",".join(buffered).encode()
+    yield b'],"next_cursor":' + json.dumps(next_cursor).encode() + b"}"
+
+def decode_position(cursor: Dict[str, Any]) -> Position:
+    return (cursor["c"], int(cursor["r"]), int(cursor["i"]))
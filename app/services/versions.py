@@ -0,0 +1,38 @@
+from fastapi import Header, HTTPException
+from sqlalchemy.orm.exc import StaleDataError
+from sqlmodel import Session
+from typing import Optional
+import re
+
+_ETAG = re.compile(r'^(?:W/)?"(\d+)"$')
+
+def etag(version: int) -> str:
+    return f'"{version}"'
+
+def if_match_version(
+    if_match: Optional[str] = Header(None, description="ETag from a previous read; the write is refused with 409 if the row changed since")
+) -> Optional[int]:
+    """Dependency for the version a client expects to overwrite, if it sent one"""
+    if if_match is None or if_match.strip() == "*":
+        return None
+    match = _ETAG.match(if_match.strip())
+    if not match:
+        raise HTTPException(status_code=400, detail='Invalid If-Match; send the ETag of a previous response, e.g. "3"')
+    return int(match.group(1))
+
+def check_version(row, expected: Optional[int], name: str) -> None:
+    """Refuse the write up front when If-Match names an older version"""
+    if expected is not None and row.version != expected:
+        raise HTTPException(
+            status_code=409,
+            detail=f"{name} has changed (now version {row.version}); reload it and retry",
+            headers={"ETag": etag(row.version)}
+        )
+
+def commit_versioned(session: Session, name: str) -> None:
+    """Commit, turning a lost race on the version counter into a 409"""
+    try:
+        session.commit()
+    except StaleDataError:
+        session.rollback()
+        raise HTTPException(status_code=409, detail=f"{name} was changed by another request; reload it and retry")
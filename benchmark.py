@@ -0,0 +1,76 @@
+"""
+Compare the ORM and lean row paths for one page of list results
+Run with: python benchmark.py [--rows 100] [--repeat 200]
+"""
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+from fastapi.encoders import jsonable_encoder
+import argparse
+import json
+import time
+import tracemalloc
+
+from app.models import Task, Comment
+from app.models.task import TaskPriority, TaskStatus
+from app.schemas import TaskRead, CommentRead
+from app.services.rows import fetch_dicts, json_response, lean_select
+
+def seed(engine, rows: int) -> None:
+    with Session(engine) as session:
+        for i in range(rows):
+            task = Task(
+                title=f"Task {i}",
+                description="Benchmark task " * 4,
+                status=list(TaskStatus)[i % 3],
+                priority=list(TaskPriority)[i % 3],
+                label_ids=[1, 2]
+            )
+            session.add(task)
+            session.flush()
+            session.add(Comment(content="Benchmark comment", author="bench", task_id=task.id))
+        session.commit()
+
+def orm_page(session: Session, model, schema, rows: int) -> bytes:
+    # What the endpoints did before: ORM instances -> response model -> JSON
+    objects = session.exec(select(model).limit(rows)).all()
+    validated = [schema.model_validate(obj) for obj in objects]
+    body = json.dumps(jsonable_encoder(validated)).encode()
+    session.expunge_all()
+    return body
+
+def lean_page(session: Session, model, schema, rows: int) -> bytes:
+    return json_response(fetch_dicts(session, lean_select(model, schema).limit(rows))).body
+
+def measure(label: str, page, engine, model, schema, rows: int, repeat: int) -> None:
+    with Session(engine) as session:
+        page(session, model, schema, rows)  # warm caches and compiled statements
+        started = time.process_time()
+        for _ in range(repeat):
+            page(session, model, schema, rows)
+        cpu = (time.process_time() - started) / repeat
+
+        tracemalloc.start()
+        page(session, model, schema, rows)
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+    blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+    print(f"{label:<16} {cpu * 1000:8.2f} ms CPU/page {peak / 1024:9.1f} KiB peak {blocks:8d} live blocks")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    seed(engine, args.rows)
+
+    for name, model, schema in (("tasks", Task, TaskRead), ("comments", Comment, CommentRead)):
+        print(f"{name}: {args.rows}-row page, mean of {args.repeat}")
+        measure("  orm + pydantic", orm_page, engine, model, schema, args.rows, args.repeat)
+        measure("  lean rows", lean_page, engine, model, schema, args.rows, args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,8 @@ Run with: python seed.py
 """
 from sqlmodel import Session
 from datetime import datetime, timedelta, timezone
-from app.database import engine, create_db_and_tables
+from app.database import engine
+from app.migrations import migrate
 from app.models import Task, Comment, Label, TaskLabel, ActivityLog
 from app.models.task import TaskStatus, TaskPriority
 
@@ -13,7 +14,7 @@ def seed_database():
     print("🌱 Starting database seeding...")
     
     # Create tables
-    create_db_and_tables()
+    migrate(engine)
     print("✅ Database tables created")
     
     with Session(engine) as session:
@@ -2,7 +2,8 @@
 import os
 from dotenv import load_dotenv
 from sqlmodel import Session, select
-from app.database import engine, create_db_and_tables
+from app.database import engine
+from app.migrations import migrate
 from app.models.task import Task
 from app.models.label import Label
 from app.models.comment import Comment
@@ -30,7 +31,7 @@ def test_create_tables():
     """Create all database tables"""
     print("\nCreating database tables...")
     try:
-        create_db_and_tables()
+        migrate(engine)
         print("✓ Tables created successfully!")
         return True
     except Exception as e:
@@ -1,10 +1,11 @@
 import pytest
+from fastapi import Request
 from fastapi.testclient import TestClient
 from sqlmodel import Session, SQLModel, create_engine
 from sqlmodel.pool import StaticPool
 
 from app.main import app
-from app.database import get_session
+from app.database import BATCH_SESSION, get_bind, get_session
 
 @pytest.fixture(name="session")
 def session_fixture():
@@ -21,10 +22,12 @@ def session_fixture():
 @pytest.fixture(name="client")
 def client_fixture(session: Session):
     """Create a test client with overridden database session"""
-    def get_session_override():
-        return session
+    def get_session_override(request: Request):
+        # Batch sub-requests bring their own session, as with the real dependency
+        return request.scope.get(BATCH_SESSION, session)
 
     app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_bind] = lambda: session.get_bind()
     client = TestClient(app)
     yield client
     app.dependency_overrides.clear()
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.models import ActivityLog, Task
+
+
+def make_logs(session: Session):
+    task = Task(title="Audited")
+    session.add(task)
+    session.commit()
+    start = datetime(2026, 1, 1)
+    for i in range(5):
+        session.add(ActivityLog(
+            task_id=task.id,
+            action="updated" if i % 2 else "created",
+            description=f"Entry {i}",
+            performed_by="alice" if i < 3 else "bob",
+            created_at=start + timedelta(days=i)
+        ))
+    session.commit()
+    return task, start
+
+
+def test_filter_activity_logs(client: TestClient, session: Session):
+    """Test performed_by, since and until filters"""
+    task, start = make_logs(session)
+    
+    data = client.get("/activity-logs", params={"performed_by": "bob"}).json()
+    assert [log["description"] for log in data] == ["Entry 4", "Entry 3"]
+    
+    params = {"since": (start + timedelta(days=1)).isoformat(), "until": (start + timedelta(days=3)).isoformat()}
+    data = client.get("/activity-logs", params=params).json()
+    assert [log["description"] for log in data] == ["Entry 2", "Entry 1"]
+
+
+def test_activity_logs_task_id_zero_is_a_filter(client: TestClient, session: Session):
+    """Test that task_id=0 filters instead of being ignored"""
+    make_logs(session)
+    assert client.get("/activity-logs?task_id=0").json() == []
+
+
+def test_activity_logs_keyset_pagination(client: TestClient, session: Session):
+    """Test walking all pages with X-Next-Cursor"""
+    task, _ = make_logs(session)
+    seen = []
+    params = {"limit": 2}
+    while True:
+        response = client.get(f"/activity-logs/task/{task.id}", params=params)
+        seen += [log["description"] for log in response.json()]
+        if "x-next-cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["x-next-cursor"]
+    
+    assert seen == [f"Entry {i}" for i in reversed(range(5))]
+    assert client.get("/activity-logs", params={"cursor": "garbage"}).status_code == 400
+
+
+def test_activity_logs_approximate_count(client: TestClient, session: Session):
+    """Test approx counts come from the workspace counter, kept up by new activity"""
+    make_logs(session)
+    
+    response = client.get("/activity-logs?count=approx")
+    assert response.headers["x-total-count"] == "5"
+    assert response.headers["x-total-count-approximate"] == "true"
+    
+    client.post("/tasks", json={"title": "Logged"})
+    assert client.get("/activity-logs?count=approx").headers["x-total-count"] == "6"
+    # Filtered lists still count exactly
+    response = client.get("/activity-logs?performed_by=bob&count=approx")
+    assert response.headers["x-total-count"] == "2"
+    assert "x-total-count-approximate" not in response.headers
@@ -0,0 +1,154 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.middleware.admission import AdmissionController, AdmissionRejected, PriorityClass, classify, parse_route_limits
+
+
+def make_controller(limit=1, max_queue=10):
+    return AdmissionController(
+        max_concurrency=limit,
+        max_queue=max_queue,
+        classes=(
+            PriorityClass("read", 0, limit, 0.5, 1.0),
+            PriorityClass("write", 1, limit, 0.5, 1.0),
+            PriorityClass("bulk", 2, limit, 0.5, 1.0),
+        )
+    )
+
+
+def test_classify_routes():
+    """Test priority classes for reads, writes and bulk work"""
+    assert classify("GET", "/tasks/") == "read"
+    assert classify("PATCH", "/tasks/1") == "write"
+    assert classify("PATCH", "/tasks/bulk") == "bulk"
+
+
+def test_freed_slot_goes_to_highest_priority():
+    """Test that queued reads are admitted before queued bulk requests"""
+    controller = make_controller()
+    order = []
+    
+    async def run(name):
+        await controller.acquire(name)
+        order.append(name)
+        await asyncio.sleep(0.01)
+        controller.release(name, 0.01)
+    
+    async def scenario():
+        await controller.acquire("write")
+        waiters = [asyncio.create_task(run("bulk")), asyncio.create_task(run("read"))]
+        await asyncio.sleep(0.01)
+        controller.release("write", 0.01)
+        await asyncio.gather(*waiters)
+    
+    asyncio.run(scenario())
+    assert order == ["read", "bulk"]
+
+
+def test_full_queue_is_rejected_fast():
+    """Test 429 when the queue is full and 503 when the wait would be too long"""
+    controller = make_controller(max_queue=0)
+    
+    async def scenario():
+        await controller.acquire("read")
+        with pytest.raises(AdmissionRejected) as full:
+            await controller.acquire("read")
+        assert full.value.status_code == 429
+        
+        controller.max_queue = 10
+        controller.class_latency["read"] = 5.0
+        with pytest.raises(AdmissionRejected) as slow:
+            await controller.acquire("read")
+        assert slow.value.status_code == 503
+        assert slow.value.retry_after >= 5
+    
+    asyncio.run(scenario())
+
+
+def test_slow_bulk_requests_do_not_inflate_read_estimates():
+    """Test bulk latency stays out of the interactive service time and read estimates"""
+    controller = make_controller(limit=2)
+    
+    async def scenario():
+        for _ in range(5):
+            await controller.acquire("bulk")
+            controller.release("bulk", 30.0)
+        await controller.acquire("read")
+        await controller.acquire("write")
+        # One read queued behind a full pool still fits its deadline
+        waiter = asyncio.create_task(controller.acquire("read"))
+        await asyncio.sleep(0)
+        controller.release("write", 0.05)
+        await waiter
+    
+    asyncio.run(scenario())
+    assert controller.service_time == pytest.approx(0.05)
+    assert controller.class_latency["bulk"] > 20
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    """Test a request cancelled while queued neither stays queued nor keeps a slot"""
+    controller = make_controller()
+    
+    async def scenario():
+        await controller.acquire("write")
+        waiter = asyncio.create_task(controller.acquire("read"))
+        await asyncio.sleep(0)
+        assert controller.queued == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert controller.queued == 0
+        
+        # Cancelled right after release() handed it the slot: the slot is passed on
+        waiter = asyncio.create_task(controller.acquire("read"))
+        await asyncio.sleep(0)
+        controller.release("write", 0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert controller.active_total == 0
+    
+    asyncio.run(scenario())
+
+
+def test_route_limits_cap_one_route():
+    """Test a route limit rejects extra requests for that route only and frees on release"""
+    controller = make_controller(limit=4)
+    controller.route_limits = parse_route_limits("POST  /tasks/import=1")
+    assert controller.route_limits == {"POST /tasks/import": 1}
+    
+    async def scenario():
+        await controller.acquire("bulk", "POST /tasks/import")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("bulk", "POST /tasks/import")
+        assert rejected.value.status_code == 429
+        await controller.acquire("bulk", "PATCH /tasks/bulk")
+        controller.release("bulk", 0.01, "POST /tasks/import")
+        await controller.acquire("bulk", "POST /tasks/import")
+    
+    asyncio.run(scenario())
+    assert controller.route_active == {"POST /tasks/import": 1}
+
+
+def test_rejections_carry_cors_headers(client: TestClient, monkeypatch):
+    """Test CORS wraps admission control so browsers can read 429/503 responses"""
+    monkeypatch.setattr(app.state.admission, "route_limits", {"GET /tasks/": 0})
+    monkeypatch.setattr(app.state.admission, "last_rejection_at", None)
+    monkeypatch.setattr(app.state.admission, "rejected", app.state.admission.rejected)
+    response = client.get("/tasks", headers={"Origin": "https://example.com"})
+    assert response.status_code == 429
+    assert response.headers["access-control-allow-origin"] == "*"
+    assert "retry-after" in response.headers
+
+
+def test_health_reports_admission(client: TestClient):
+    """Test that the health check exposes admission state"""
+    response = client.get("/health")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "healthy"
+    assert "queued" in data["admission"]
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta, timezone
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.models import ActivityLog, DailyTaskStats, TaskCycle
+from app.models.task import TaskStatus
+from app.services.analytics import backfill_analytics
+
+
+def _today():
+    return datetime.now(timezone.utc).date()
+
+
+def test_analytics_follow_status_changes(client: TestClient, session: Session):
+    """Test rollups are updated as tasks are created, started and completed"""
+    label = client.post("/labels/", json={"name": "backend"}).json()
+    first = client.post("/tasks/", json={"title": "First", "label_ids": [label["id"]]}).json()
+    second = client.post("/tasks/", json={"title": "Second"}).json()
+    client.post("/tasks/", json={"title": "Other", "status": "done"}, headers={"X-Workspace": "other"})
+    
+    client.patch(f"/tasks/{first['id']}", json={"status": "in_progress"})
+    client.patch(f"/tasks/{first['id']}", json={"status": "done"})
+    client.patch(f"/tasks/{second['id']}", json={"status": "done"})
+    
+    throughput = client.get("/analytics/throughput").json()
+    assert len(throughput) == 30
+    assert throughput[-1] == {"day": _today().isoformat(), "created": 2, "completed": 2}
+    assert all(day["created"] == day["completed"] == 0 for day in throughput[:-1])
+    other = client.get("/analytics/throughput", headers={"X-Workspace": "other"}).json()
+    assert other[-1] == {"day": _today().isoformat(), "created": 1, "completed": 0}
+    
+    assert client.get("/analytics/labels").json() == [{"label_id": label["id"], "name": "backend", "completed": 1}]
+    
+    # Only the task that went through in_progress has a cycle time
+    cycle = client.get("/analytics/cycle-time").json()
+    assert cycle["tasks"] == 1
+    assert 0 <= cycle["p50_hours"] == cycle["max_hours"] < 1
+    
+    response = client.get("/analytics/throughput", params={"since": "2024-01-01", "until": "2026-01-01"})
+    assert response.status_code == 400
+
+
+def test_backfill_rebuilds_rollups(client: TestClient, session: Session):
+    """Test the backfill replays the activity log into empty rollups"""
+    task = client.post("/tasks/", json={"title": "Old"}).json()
+    client.patch(f"/tasks/{task['id']}", json={"status": "in_progress"})
+    client.patch(f"/tasks/{task['id']}", json={"status": "done"})
+    
+    # History from before the rollups existed: created, started and finished on three days
+    logs = session.exec(select(ActivityLog).where(ActivityLog.task_id == task["id"]).order_by(ActivityLog.id)).all()
+    for days_ago, log in zip((3, 2, 1), logs):
+        log.created_at -= timedelta(days=days_ago)
+        session.add(log)
+    session.commit()
+    
+    assert backfill_analytics(session, batch_size=2) == 3
+    rows = session.exec(select(DailyTaskStats).order_by(DailyTaskStats.day)).all()
+    assert [(row.day, row.created, row.completed) for row in rows] == [
+        (_today() - timedelta(days=3), 1, 0),
+        (_today() - timedelta(days=1), 0, 1),
+    ]
+    cycle = session.get(TaskCycle, task["id"])
+    assert cycle.completed_at - cycle.started_at > timedelta(hours=23)
+    assert client.get("/analytics/cycle-time").json()["tasks"] == 1
+
+
+def test_rollups_use_recorded_status_changes(client: TestClient, session: Session):
+    """Test completions come from the recorded statuses, not from description text"""
+    tasks = [client.post("/tasks/", json={"title": f"Task {i}"}).json() for i in range(3)]
+    # A title that reads like a status change is not one
+    client.patch(f"/tasks/{tasks[0]['id']}", json={"title": "status: todo → done"})
+    client.patch("/tasks/bulk", json={"ids": [tasks[1]["id"], tasks[2]["id"]], "changes": {"status": "done"}})
+    
+    assert client.get("/analytics/throughput").json()[-1]["completed"] == 2
+    logs = session.exec(select(ActivityLog).where(ActivityLog.action == "updated").order_by(ActivityLog.id)).all()
+    assert [(log.old_status, log.new_status) for log in logs] == [
+        (None, None), (TaskStatus.TODO, TaskStatus.DONE), (TaskStatus.TODO, TaskStatus.DONE)
+    ]
+    
+    # Legacy rows without recorded statuses are still replayed from their descriptions
+    for log in logs[1:]:
+        log.old_status = log.new_status = None
+        session.add(log)
+    session.commit()
+    backfill_analytics(session)
+    assert session.exec(select(DailyTaskStats)).one().completed == 2
@@ -0,0 +1,94 @@
+import pytest
+import sqlite3
+import threading
+import time
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, create_engine
+
+from app.database import _create_engine
+from app.services.backup import BackupThrottle, take_backup
+
+
+def test_sqlite_backup_is_consistent_copy(client: TestClient, session: Session, tmp_path):
+    """Test the online backup copies a live database page by page"""
+    for i in range(50):
+        client.post("/tasks", json={"title": f"Task {i}", "description": "x" * 500})
+    throttle = BackupThrottle(min_pause=0)
+    
+    result = take_backup(session.get_bind(), target=tmp_path / "snapshot.db", throttle=throttle)
+    
+    assert result["steps"] >= 1
+    with sqlite3.connect(result["path"]) as copy:
+        assert copy.execute("SELECT count(*) FROM tasks").fetchone()[0] == 50
+        assert copy.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+
+
+def test_backup_throttle_backs_off_over_budget():
+    """Test pauses stay minimal within budget and grow with latency overshoot"""
+    throttle = BackupThrottle(budget=0.1, min_pause=0.01, max_pause=1.0)
+    assert throttle.pause_for(None) == 0.01
+    assert throttle.pause_for(0.05) == 0.01
+    assert 0.01 < throttle.pause_for(0.2) < throttle.pause_for(0.4) <= 1.0
+    assert throttle.pause_for(10) == 1.0
+
+
+def test_admin_backup_requires_token(client: TestClient, monkeypatch, tmp_path):
+    """Test the admin endpoint is hidden without ADMIN_TOKEN and checks the header"""
+    assert client.post("/admin/backup").status_code == 404
+    
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    monkeypatch.setenv("BACKUP_DIR", str(tmp_path))
+    assert client.post("/admin/backup", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    
+    response = client.post("/admin/backup", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert response.json()["path"].startswith(str(tmp_path))
+
+
+def test_file_databases_use_wal(tmp_path):
+    """Test SQLite file engines switch to WAL while in-memory ones keep their journal"""
+    file_engine = _create_engine(f"sqlite:///{tmp_path / 'wal.db'}")
+    memory_engine = _create_engine("sqlite://")
+    with file_engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+    with memory_engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "memory"
+    file_engine.dispose()
+    memory_engine.dispose()
+
+
+@pytest.mark.parametrize("journal_mode", ["wal", "delete"])
+def test_sqlite_backup_finishes_under_writes(tmp_path, journal_mode):
+    """Test a paced backup completes while another connection keeps writing"""
+    path = tmp_path / "live.db"
+    with sqlite3.connect(path) as setup:
+        setup.execute(f"PRAGMA journal_mode={journal_mode}")
+        setup.execute("CREATE TABLE notes (body TEXT)")
+        setup.executemany("INSERT INTO notes VALUES (?)", [("x" * 500,)] * 2000)
+    engine = create_engine(f"sqlite:///{path}")
+    stop = threading.Event()
+    
+    def write():
+        with sqlite3.connect(path, timeout=5) as writer:
+            while not stop.is_set():
+                writer.execute("INSERT INTO notes VALUES ('y')")
+                writer.commit()
+                time.sleep(0.002)
+    
+    thread = threading.Thread(target=write)
+    thread.start()
+    try:
+        throttle = BackupThrottle(min_pause=0.005)
+        result = take_backup(engine, target=tmp_path / "snapshot.db", throttle=throttle)
+    finally:
+        stop.set()
+        thread.join()
+        engine.dispose()
+    
+    assert result["snapshot"] is (journal_mode == "wal")
+    if journal_mode == "wal":
+        assert result["restarts"] == 0 and not result["single_step"]
+    with sqlite3.connect(result["path"]) as copy:
+        assert copy.execute("SELECT count(*) FROM notes").fetchone()[0] >= 2000
+        assert copy.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
@@ -0,0 +1,92 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.models import Comment, Label, Task
+from app.models.task import TaskStatus
+from app.services.reminders import get_reminder_scheduler
+from app.services.task_index import TaskBitmapIndex, get_task_index
+
+
+def _create_with_comments(atomic: bool, comment_task: str = "$task.id"):
+    return {
+        "atomic": atomic,
+        "operations": [
+            {"method": "POST", "path": "/labels", "ref": "label", "body": {"name": "urgent"}},
+            {"method": "POST", "path": "/tasks", "ref": "task", "body": {"title": "Batched", "label_ids": ["$label.id"]}},
+            {"method": "POST", "path": "/comments", "body": {"content": "First", "author": "Ann", "task_id": comment_task}},
+            {"method": "POST", "path": "/comments", "body": {"content": "Second", "author": "Ann", "task_id": "$task.id"}},
+            {"method": "GET", "path": "/tasks/$task.id"},
+        ]
+    }
+
+
+def test_batch_with_references(client: TestClient):
+    """Test later operations using IDs created by earlier ones"""
+    response = client.post("/batch", json=_create_with_comments(atomic=False))
+    assert response.status_code == 200
+    data = response.json()
+    assert data["committed"] is True
+    assert [result["status"] for result in data["results"]] == [201, 201, 201, 201, 200]
+    
+    label, task = data["results"][0]["body"], data["results"][1]["body"]
+    assert task["label_ids"] == [label["id"]]
+    detail = data["results"][4]
+    assert [c["content"] for c in detail["body"]["comments"]] == ["First", "Second"]
+    assert detail["headers"]["etag"] == f'"{detail["body"]["version"]}"'
+    assert client.get(f"/tasks/{task['id']}").json()["comment_count"] == 2
+
+
+def test_atomic_batch_rolls_back_on_failure(client: TestClient, session: Session):
+    """Test one failing operation undoes the whole atomic batch"""
+    # The test engine has a single shared connection: build state that loads
+    # through its own session before the batch transaction starts
+    get_task_index(session.get_bind())
+    get_reminder_scheduler(session.get_bind())
+    
+    response = client.post("/batch", json=_create_with_comments(atomic=True, comment_task=99999))
+    data = response.json()
+    assert data["committed"] is False
+    assert [result["status"] for result in data["results"]] == [201, 201, 404, 424, 424]
+    
+    assert session.exec(select(Task)).all() == []
+    assert session.exec(select(Label)).all() == []
+    assert session.exec(select(Comment)).all() == []
+    # In-process state built during the batch is rebuilt from the database
+    assert len(get_task_index(session.get_bind()).resolve()) == 0
+    assert client.get("/labels").json() == []
+    
+    response = client.post("/batch", json=_create_with_comments(atomic=True))
+    assert response.json()["committed"] is True
+    assert len(session.exec(select(Comment)).all()) == 2
+
+
+def test_batch_rejects_other_routes_and_bad_references(client: TestClient):
+    """Test only task, comment and label routes can be batched"""
+    data = client.post("/batch", json={"operations": [
+        {"method": "POST", "path": "/admin/backup"},
+        {"method": "GET", "path": "/tasks/$missing.id"},
+        {"method": "GET", "path": "/tasks"},
+    ]}).json()
+    assert [result["status"] for result in data["results"]] == [400, 424, 200]
+
+
+def test_atomic_rollback_repairs_only_touched_tasks(client: TestClient, session: Session, monkeypatch):
+    """Test a rolled-back batch neither caches nor indexes its uncommitted writes"""
+    task = client.post("/tasks", json={"title": "Original"}).json()
+    index = get_task_index(session.get_bind())
+    get_reminder_scheduler(session.get_bind())
+    monkeypatch.setattr(TaskBitmapIndex, "load", lambda self, bind: pytest.fail("full index reload"))
+    
+    data = client.post("/batch", json={"atomic": True, "operations": [
+        {"method": "PATCH", "path": f"/tasks/{task['id']}", "body": {"title": "Changed", "status": "done"}},
+        {"method": "GET", "path": f"/tasks/{task['id']}"},
+        {"method": "GET", "path": "/tasks/99999"},
+    ]}).json()
+    assert data["committed"] is False
+    assert data["results"][1]["body"]["title"] == "Changed"
+    
+    # Neither the detail cache nor the index kept the rolled-back change
+    assert client.get(f"/tasks/{task['id']}").json()["title"] == "Original"
+    assert len(index.resolve(status=TaskStatus.DONE)) == 0
+    assert task["id"] in index.resolve(status=TaskStatus.TODO)
@@ -0,0 +1,84 @@
+import threading
+import time
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.models import Label, Task, TaskLabel
+from app.services.cache import InMemoryBackend, ResponseCache, get_task_cache
+
+
+def test_task_detail_cache_invalidated_by_writes(client: TestClient, session: Session):
+    """Test that comment and label writes invalidate cached task details"""
+    label = Label(name="Bug", color="#FF0000")
+    task = Task(title="Cached")
+    session.add_all([label, task])
+    session.commit()
+    session.add(TaskLabel(task_id=task.id, label_id=label.id))
+    session.commit()
+    
+    cache = get_task_cache(session.get_bind())
+    assert client.get(f"/tasks/{task.id}").json()["comments"] == []
+    hits = cache.hits
+    client.get(f"/tasks/{task.id}")
+    assert cache.hits == hits + 1
+    
+    client.post("/comments", json={"content": "Hi", "author": "Ann", "task_id": task.id})
+    assert len(client.get(f"/tasks/{task.id}").json()["comments"]) == 1
+    
+    client.patch(f"/labels/{label.id}", json={"name": "Defect"})
+    assert client.get(f"/tasks/{task.id}").json()["labels"][0]["name"] == "Defect"
+    
+    client.patch(f"/tasks/{task.id}", json={"title": "Renamed"})
+    assert client.get(f"/tasks/{task.id}").json()["title"] == "Renamed"
+
+
+def test_concurrent_misses_share_one_load():
+    """Test stampede protection for concurrent misses on one key"""
+    cache = ResponseCache("test")
+    calls = []
+    
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return b"value"
+    
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load(1, loader))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert results == [b"value"] * 5
+    assert len(calls) == 1
+
+
+def test_shared_backend_and_invalidation_during_load():
+    """Test tier-2 reads and that a load racing an invalidation is not stored"""
+    backend = InMemoryBackend()
+    first = ResponseCache("test", backend=backend)
+    second = ResponseCache("test", backend=backend)
+    
+    first.get_or_load(1, lambda: b"v1")
+    assert second.get_or_load(1, lambda: b"unexpected") == b"v1"
+    
+    def racing_loader():
+        first.invalidate([2])
+        return b"stale"
+    
+    assert first.get_or_load(2, racing_loader) == b"stale"
+    assert first.get_or_load(2, lambda: b"fresh") == b"fresh"
+
+
+def test_local_tier_expires_before_shared_tier():
+    """Test another worker's invalidation reaches this tier 1 once its short TTL lapses"""
+    backend = InMemoryBackend()
+    first = ResponseCache("test", backend=backend, local_ttl_seconds=0.05)
+    second = ResponseCache("test", backend=backend, local_ttl_seconds=0.05)
+    
+    assert second.get_or_load(1, lambda: b"v1") == b"v1"
+    first.invalidate([1])
+    assert second.get_or_load(1, lambda: b"v2") == b"v1"
+    time.sleep(0.06)
+    assert second.get_or_load(1, lambda: b"v2") == b"v2"
@@ -114,3 +114,65 @@ def test_delete_comment(client: TestClient, session: Session):
     # Verify comment is deleted
     response = client.get(f"/comments/{comment_id}")
     assert response.status_code == 404
+
+
+def test_comment_total_count(client: TestClient, session: Session):
+    """Test X-Total-Count on the comment list"""
+    task = Task(title="Test Task")
+    session.add(task)
+    session.commit()
+    session.add_all([Comment(content=f"Comment {i}", author="User", task_id=task.id) for i in range(3)])
+    session.commit()
+    
+    response = client.get(f"/comments?task_id={task.id}&count=exact")
+    assert response.headers["x-total-count"] == "3"
+    
+    # Approx reads the workspace's counter, seeded with an exact count
+    response = client.get("/comments?count=approx")
+    assert response.headers["x-total-count"] == "3"
+    assert response.headers["x-total-count-approximate"] == "true"
+    assert client.get("/comments?count=bogus").status_code == 422
+    
+    # Writes through the API adjust the counter without recounting
+    client.post("/comments", json={"content": "Fourth", "author": "User", "task_id": task.id})
+    assert client.get("/comments?count=approx").headers["x-total-count"] == "4"
+    assert client.get("/comments?count=approx", headers={"X-Workspace": "other"}).headers["x-total-count"] == "0"
+    # Per task, approx uses the task's comment_count summary, which the rows added directly above bypassed
+    response = client.get(f"/comments?task_id={task.id}&count=approx")
+    assert response.headers["x-total-count"] == "1"
+    assert response.headers["x-total-count-approximate"] == "true"
+
+
+def test_update_comment_version_conflict(client: TestClient, session: Session):
+    """Test a comment edit based on an old version gets 409"""
+    task = Task(title="Test Task")
+    session.add(task)
+    session.commit()
+    comment = client.post("/comments", json={"content": "v1", "author": "Ann", "task_id": task.id}).json()
+    
+    etag = client.get(f"/comments/{comment['id']}").headers["etag"]
+    assert client.patch(f"/comments/{comment['id']}", json={"content": "v2"}, headers={"If-Match": etag}).status_code == 200
+    response = client.patch(f"/comments/{comment['id']}", json={"content": "v3"}, headers={"If-Match": etag})
+    assert response.status_code == 409
+    assert client.get(f"/comments/{comment['id']}").json()["content"] == "v2"
+
+
+def test_comment_writes_change_their_task(client: TestClient):
+    """Test creating, editing and deleting a comment bumps the task's version and updated_at"""
+    task = client.post("/tasks", json={"title": "Discussed"}).json()
+    seen = [(task["version"], task["updated_at"])]
+    
+    def changed():
+        current = client.get(f"/tasks/{task['id']}").json()
+        seen.append((current["version"], current["updated_at"]))
+        return seen[-1][0] > seen[-2][0] and seen[-1][1] > seen[-2][1]
+    
+    comment = client.post("/comments", json={"content": "Hi", "author": "ann", "task_id": task["id"]}).json()
+    assert changed()
+    client.patch(f"/comments/{comment['id']}", json={"content": "Hello"})
+    assert changed()
+    client.delete(f"/comments/{comment['id']}")
+    assert changed()
+    
+    response = client.patch(f"/tasks/{task['id']}", json={"title": "Stale"}, headers={"If-Match": f'"{task["version"]}"'})
+    assert response.status_code == 409
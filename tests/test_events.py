@@ -0,0 +1,89 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.models import Task
+from app.routers import events
+from app.routers.events import _activity_feed, _replay
+from app.services.events import ActivityBroadcaster, broadcaster
+
+
+def test_broadcaster_fans_out_by_task():
+    """Test global and per-task subscriptions, each within one workspace"""
+    hub = ActivityBroadcaster()
+    
+    async def scenario():
+        everything = hub.subscribe("default")
+        task_one = hub.subscribe("default", task_id=1)
+        elsewhere = hub.subscribe("acme")
+        hub.publish("default", {"id": 1, "task_id": 1})
+        hub.publish("default", {"id": 2, "task_id": 2})
+        hub.publish("acme", {"id": 3, "task_id": 3})
+        
+        assert (await everything.get(1))["id"] == 1
+        assert (await everything.get(1))["id"] == 2
+        assert await everything.get(0.05) is None
+        assert (await task_one.get(1))["id"] == 1
+        assert await task_one.get(0.05) is None
+        assert (await elsewhere.get(1))["id"] == 3
+        
+        for subscription in (everything, task_one, elsewhere):
+            hub.unsubscribe(subscription)
+        assert hub.subscriber_count == 0
+    
+    asyncio.run(scenario())
+
+
+def test_committed_activity_is_published(client: TestClient, session: Session):
+    """Test that activity written by the routers reaches subscribers after commit"""
+    task = Task(title="Watched")
+    session.add(task)
+    session.commit()
+    
+    async def scenario():
+        subscription = broadcaster.subscribe("default", task_id=task.id)
+        try:
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(None, lambda: client.post(
+                "/comments", json={"content": "Hi", "author": "Ann", "task_id": task.id}
+            ))
+            assert response.status_code == 201
+            return await subscription.get(1)
+        finally:
+            broadcaster.unsubscribe(subscription)
+    
+    activity = asyncio.run(scenario())
+    assert activity["action"] == "comment_added"
+    assert activity["task_id"] == task.id
+
+
+def test_replay_after_last_event_id(client: TestClient, session: Session):
+    """Test resuming the feed from a Last-Event-ID"""
+    task_id = client.post("/tasks", json={"title": "Task"}).json()["id"]
+    client.patch(f"/tasks/{task_id}", json={"title": "Renamed"})
+    
+    bind = session.get_bind()
+    replayed = _replay(bind, "default", task_id, 0)
+    assert [e["action"] for e in replayed] == ["created", "updated"]
+    assert [e["action"] for e in _replay(bind, "default", task_id, replayed[0]["id"])] == ["updated"]
+    assert _replay(bind, "default", task_id, None) == []
+    assert _replay(bind, "acme", None, 0) == []
+
+
+def test_replay_pages_through_backlog(client: TestClient, session: Session, monkeypatch):
+    """Test a resumed feed replays every missed event, not just the first page"""
+    monkeypatch.setattr(events, "REPLAY_PAGE_SIZE", 2)
+    task_id = client.post("/tasks", json={"title": "Task"}).json()["id"]
+    for title in ("One", "Two", "Three", "Four"):
+        client.patch(f"/tasks/{task_id}", json={"title": title})
+    
+    async def scenario():
+        feed = _activity_feed(session.get_bind(), "default", task_id, 0)
+        try:
+            return [(await feed.__anext__())["id"] for _ in range(5)]
+        finally:
+            await feed.aclose()
+    
+    ids = asyncio.run(scenario())
+    assert len(set(ids)) == 5 and ids == sorted(ids)
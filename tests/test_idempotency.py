@@ -0,0 +1,117 @@
+import asyncio
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.middleware.idempotency import DatabaseIdempotencyStore, IdempotencyMiddleware, IdempotencyStore
+from app.models import ActivityLog, IdempotencyKey, Task
+
+
+def test_retried_post_is_replayed(client: TestClient, session: Session):
+    """Test that a retry with the same Idempotency-Key does not create a duplicate"""
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    first = client.post("/tasks/", json={"title": "Once"}, headers=headers)
+    retry = client.post("/tasks/", json={"title": "Once"}, headers=headers)
+    
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert len(session.exec(select(Task)).all()) == 1
+    assert len(session.exec(select(ActivityLog)).all()) == 1
+
+
+def test_idempotency_key_reused_with_different_body(client: TestClient):
+    """Test that reusing a key for another payload is rejected"""
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    assert client.post("/tasks/", json={"title": "One"}, headers=headers).status_code == 201
+    response = client.post("/tasks/", json={"title": "Two"}, headers=headers)
+    assert response.status_code == 422
+
+
+def test_concurrent_duplicates_run_once():
+    """Test that an in-flight duplicate waits for and replays the first response"""
+    calls = []
+    
+    async def slow_app(scope, receive, send):
+        await receive()
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        await send({"type": "http.response.start", "status": 201, "headers": []})
+        await send({"type": "http.response.body", "body": b'{"id": 1}'})
+    
+    middleware = IdempotencyMiddleware(slow_app, paths=("/tasks/",), store=IdempotencyStore())
+    
+    async def request():
+        sent = []
+        
+        async def receive():
+            return {"type": "http.request", "body": b"{}", "more_body": False}
+        
+        async def send(message):
+            sent.append(message)
+        
+        scope = {"type": "http", "method": "POST", "path": "/tasks/", "headers": [(b"idempotency-key", b"k")]}
+        await middleware(scope, receive, send)
+        return sent
+    
+    async def scenario():
+        return await asyncio.gather(request(), request())
+    
+    first, second = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert first[1]["body"] == second[1]["body"] == b'{"id": 1}'
+
+
+def test_idempotency_keys_are_scoped_to_workspace(client: TestClient, session: Session):
+    """Test the same key in two workspaces creates a task in each"""
+    key = str(uuid.uuid4())
+    first = client.post("/tasks/", json={"title": "Mine"}, headers={"Idempotency-Key": key, "X-Workspace": "alpha"})
+    second = client.post("/tasks/", json={"title": "Mine"}, headers={"Idempotency-Key": key, "X-Workspace": "beta"})
+    
+    assert first.status_code == second.status_code == 201
+    assert "idempotent-replayed" not in second.headers
+    assert sorted(task.workspace for task in session.exec(select(Task))) == ["alpha", "beta"]
+
+
+def test_database_store_shares_keys_between_workers(tmp_path):
+    """Test duplicates reaching two workers with a shared table run the write once"""
+    calls = []
+    
+    async def slow_app(scope, receive, send):
+        await receive()
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        await send({"type": "http.response.start", "status": 201, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": b'{"id": 1}'})
+    
+    # Workers share the database, not a connection
+    bind = create_engine(f"sqlite:///{tmp_path / 'keys.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(bind)
+    workers = [
+        IdempotencyMiddleware(slow_app, paths=("/tasks/",), store=DatabaseIdempotencyStore(bind, poll_seconds=0.01))
+        for _ in range(2)
+    ]
+    
+    async def request(worker):
+        sent = []
+        
+        async def receive():
+            return {"type": "http.request", "body": b"{}", "more_body": False}
+        
+        async def send(message):
+            sent.append(message)
+        
+        scope = {"type": "http", "method": "POST", "path": "/tasks/", "headers": [(b"idempotency-key", b"k")]}
+        await worker(scope, receive, send)
+        return sent
+    
+    async def scenario():
+        return await asyncio.gather(request(workers[0]), request(workers[1]))
+    
+    first, second = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert first[1]["body"] == second[1]["body"] == b'{"id": 1}'
+    assert (b"idempotent-replayed", b"true") in first[0]["headers"] + second[0]["headers"]
+    with Session(bind) as session:
+        assert session.get(IdempotencyKey, ("default", "/tasks/", "k")).status == 201
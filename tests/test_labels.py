@@ -1,6 +1,6 @@
 import pytest
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from sqlmodel import Session, select
 
 from app.models import Label
 
@@ -89,6 +89,18 @@ def test_delete_label(client: TestClient, session: Session):
     assert response.status_code == 404
 
 
+def test_delete_label_touches_labelled_tasks(client: TestClient):
+    """Test tasks losing a deleted label show up in delta sync"""
+    label_id = client.post("/labels", json={"name": "Bug"}).json()["id"]
+    labelled = client.post("/tasks", json={"title": "Labelled", "label_ids": [label_id]}).json()
+    client.post("/tasks", json={"title": "Plain"})
+    token = client.get("/tasks/changes").json()["next_token"]
+    
+    assert client.delete(f"/labels/{label_id}").status_code == 204
+    changed = client.get(f"/tasks/changes?since={token}").json()["changed"]
+    assert [(task["id"], task["label_ids"]) for task in changed] == [(labelled["id"], [])]
+
+
 def test_invalid_color_format(client: TestClient):
     """Test creating a label with invalid color format"""
     response = client.post(
@@ -96,3 +108,80 @@ def test_invalid_color_format(client: TestClient):
         json={"name": "Bug", "color": "red"}
     )
     assert response.status_code == 422
+
+
+def test_rename_to_existing_name_conflicts(client: TestClient):
+    """Test the unique index turns a conflicting rename into 409"""
+    client.post("/labels", json={"name": "Bug", "color": "#FF0000"})
+    feature_id = client.post("/labels", json={"name": "Feature", "color": "#00FF00"}).json()["id"]
+    
+    response = client.patch(f"/labels/{feature_id}", json={"name": "Bug"})
+    assert response.status_code == 409
+    assert client.get(f"/labels/{feature_id}").json()["name"] == "Feature"
+
+
+def test_tasks_accept_label_names(client: TestClient):
+    """Test label names resolve to IDs and follow renames"""
+    label_id = client.post("/labels", json={"name": "Bug", "color": "#FF0000"}).json()["id"]
+    
+    task = client.post("/tasks", json={"title": "Named", "label_names": ["Bug"]}).json()
+    assert task["label_ids"] == [label_id]
+    assert client.post("/tasks", json={"title": "Unknown", "label_names": ["Nope"]}).status_code == 404
+    
+    client.patch(f"/labels/{label_id}", json={"name": "Defect"})
+    updated = client.patch(f"/tasks/{task['id']}", json={"label_names": ["Defect"]})
+    assert updated.json()["label_ids"] == [label_id]
+    assert client.patch(f"/tasks/{task['id']}", json={"label_names": ["Bug"]}).status_code == 404
+
+
+def test_label_names_follow_changes_from_other_workers(client: TestClient, session: Session):
+    """Test cached names are confirmed against labels renamed or deleted elsewhere"""
+    bug_id = client.post("/labels", json={"name": "Bug"}).json()["id"]
+    ops_id = client.post("/labels", json={"name": "Ops"}).json()["id"]
+    
+    # Another worker renames one label and deletes the other, bypassing this directory
+    bug = session.get(Label, bug_id)
+    bug.name = "Defect"
+    session.add(bug)
+    session.delete(session.get(Label, ops_id))
+    session.commit()
+    
+    assert client.post("/tasks", json={"title": "Stale", "label_names": ["Bug"]}).status_code == 404
+    assert client.post("/tasks", json={"title": "Gone", "label_names": ["Ops"]}).status_code == 404
+    task = client.post("/tasks", json={"title": "Renamed", "label_names": ["Defect"]}).json()
+    assert task["label_ids"] == [bug_id]
+    
+    # Creating the deleted name again resolves to the new row
+    new_ops_id = client.post("/tasks?create_labels=true", json={"title": "New", "label_names": ["Ops"]}).json()["label_ids"][0]
+    session.expire_all()
+    assert session.get(Label, new_ops_id).name == "Ops"
+
+
+def test_create_labels_on_demand(client: TestClient, session: Session):
+    """Test ?create_labels=true upserts unknown label names"""
+    existing_id = client.post("/labels", json={"name": "Bug", "color": "#FF0000"}).json()["id"]
+    
+    response = client.post("/tasks?create_labels=true", json={"title": "Upsert", "label_names": ["Bug", "Triage"]})
+    assert response.status_code == 201
+    triage = session.exec(select(Label).where(Label.name == "Triage")).one()
+    assert response.json()["label_ids"] == sorted([existing_id, triage.id])
+    assert triage.color == "#808080"
+
+
+def test_labels_are_scoped_to_workspaces(client: TestClient):
+    """Test labels are listed, named and attached per workspace"""
+    acme = {"X-Workspace": "acme"}
+    default_label = client.post("/labels", json={"name": "Bug"}).json()
+    acme_label = client.post("/labels", json={"name": "Bug"}, headers=acme).json()
+    assert acme_label["workspace"] == "acme"
+    assert acme_label["id"] != default_label["id"]
+    assert client.post("/labels", json={"name": "Bug"}, headers=acme).status_code == 409
+    
+    assert [label["id"] for label in client.get("/labels", headers=acme).json()] == [acme_label["id"]]
+    assert client.get(f"/labels/{default_label['id']}", headers=acme).status_code == 404
+    assert client.delete(f"/labels/{default_label['id']}", headers=acme).status_code == 404
+    
+    response = client.post("/tasks", json={"title": "Foreign", "label_ids": [default_label["id"]]}, headers=acme)
+    assert response.status_code == 404
+    task = client.post("/tasks", json={"title": "Named", "label_names": ["Bug"]}, headers=acme).json()
+    assert task["label_ids"] == [acme_label["id"]]
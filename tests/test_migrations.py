@@ -0,0 +1,74 @@
+import pytest
+from sqlalchemy import inspect, text
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.migrations import SCHEMA_VERSION, SchemaOutOfDate, current_version, ensure_schema, migrate
+from app.models import Label, Task, TaskLabel
+
+
+@pytest.fixture(name="engine")
+def engine_fixture(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    yield engine
+    engine.dispose()
+
+
+def test_migrate_fresh_database(engine):
+    """Test that migrate creates the schema and stamps its version"""
+    assert current_version(engine) is None
+    assert migrate(engine) == SCHEMA_VERSION
+    assert current_version(engine) == SCHEMA_VERSION
+    assert inspect(engine).has_table("tasks")
+    
+    # Already current: startup check is a no-op
+    ensure_schema(engine)
+
+
+def test_migrate_unmanaged_database(engine):
+    """Test adopting a database created before schema versioning"""
+    Task.__table__.create(engine)
+    
+    migrate(engine)
+    assert current_version(engine) == SCHEMA_VERSION
+    assert inspect(engine).has_table("activity_logs")
+
+
+def test_ensure_schema_without_auto_migrate(engine, monkeypatch):
+    """Test that startup refuses to run DDL when AUTO_MIGRATE=0"""
+    monkeypatch.setenv("AUTO_MIGRATE", "0")
+    with pytest.raises(SchemaOutOfDate):
+        ensure_schema(engine)
+
+
+def test_migrate_scopes_labels_to_workspaces(engine):
+    """Test v12 moves labels into workspaces and copies ones other workspaces shared"""
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        # Labels as they were up to v11: one global namespace
+        conn.execute(text("DROP TABLE labels"))
+        conn.execute(text(
+            "CREATE TABLE labels (id INTEGER PRIMARY KEY, name VARCHAR(50) NOT NULL, "
+            "color VARCHAR(7) NOT NULL, version INTEGER DEFAULT 1 NOT NULL)"
+        ))
+        conn.execute(text("CREATE UNIQUE INDEX ix_labels_name ON labels (name)"))
+        conn.execute(text("INSERT INTO labels (id, name, color) VALUES (1, 'urgent', '#FF0000')"))
+        conn.execute(text("CREATE TABLE schema_version (version INTEGER NOT NULL)"))
+        conn.execute(text("INSERT INTO schema_version (version) VALUES (11)"))
+    with Session(engine) as session:
+        session.add_all([Task(id=1, title="Default", label_ids=[1]), Task(id=2, title="Acme", workspace="acme", label_ids=[1])])
+        session.add_all([TaskLabel(task_id=1, label_id=1), TaskLabel(task_id=2, label_id=1)])
+        session.commit()
+    
+    migrate(engine)
+    
+    with Session(engine) as session:
+        labels = {label.workspace: label for label in session.exec(select(Label))}
+        assert sorted(labels) == ["acme", "default"]
+        assert labels["default"].id == 1
+        assert (labels["acme"].name, labels["acme"].color) == ("urgent", "#FF0000")
+        assert session.get(Task, 1).label_ids == [1]
+        assert session.get(Task, 2).label_ids == [labels["acme"].id]
+        
+        session.add(Label(name="fresh", workspace="acme"))
+        session.add(Label(name="fresh", workspace="default"))
+        session.commit()
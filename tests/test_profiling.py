@@ -0,0 +1,32 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.main import app
+from app.middleware.profiling import ProfilingMiddleware
+
+
+def test_request_is_profiled_with_admin_token(client: TestClient, session: Session, tmp_path):
+    """Test profiled requests store collapsed stacks including SQL time"""
+    client.post("/tasks", json={"title": "Profiled"})
+    profiled = TestClient(ProfilingMiddleware(app, token="secret", output_dir=str(tmp_path)))
+    
+    response = profiled.get("/tasks", headers={"X-Profile": "1", "X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert "queries" in response.headers["server-timing"]
+    
+    profile = tmp_path / f"{response.headers['x-profile-id']}.collapsed"
+    lines = profile.read_text().splitlines()
+    assert any(line.startswith("[sql];SELECT") for line in lines)
+    for line in lines:
+        stack, weight = line.rsplit(" ", 1)
+        assert stack and int(weight) >= 0
+
+
+def test_request_without_token_is_not_profiled(client: TestClient, tmp_path):
+    """Test requests with a missing or wrong token pass through untouched"""
+    profiled = TestClient(ProfilingMiddleware(app, token="secret", output_dir=str(tmp_path)))
+    
+    response = profiled.get("/tasks", headers={"X-Profile": "1", "X-Admin-Token": "wrong"})
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,62 @@
+from array import array
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.models import Label, Task, TaskLabel, TaskTombstone
+from app.services.task_index import Bitmap, TaskBitmapIndex
+
+
+def test_bitmap_set_operations():
+    """Test bitmap algebra across container boundaries"""
+    a = Bitmap([1, 5, 70000, 1 << 20])
+    b = Bitmap([5, 70000, 9])
+    
+    assert list(a & b) == [5, 70000]
+    assert list(a | b) == [1, 5, 9, 70000, 1 << 20]
+    assert list(a - b) == [1, 1 << 20]
+    assert len(a) == 4
+    assert 70000 in a and 70001 not in a
+    
+    a.discard(70000)
+    assert list(a) == [1, 5, 1 << 20]
+
+
+def test_bitmap_switches_full_chunks_to_bitsets():
+    """Test chunks past ARRAY_CHUNK_MAX become bitsets and keep set semantics"""
+    dense = Bitmap(range(0, 20000, 2))
+    sparse = Bitmap(range(0, 20000, 7))
+    assert isinstance(dense._containers[0], bytearray)
+    assert isinstance(sparse._containers[0], array)
+    
+    assert list(dense & sparse) == list(range(0, 20000, 14))
+    assert len(dense | sparse) == len(set(range(0, 20000, 2)) | set(range(0, 20000, 7)))
+    assert list(sparse - dense) == [n for n in range(0, 20000, 7) if n % 2]
+    assert 19998 in dense and 19999 not in dense
+    
+    for value in range(0, 20000, 2):
+        dense.discard(value)
+    assert not dense and list(dense) == []
+
+
+def test_index_catches_up_with_other_processes(tmp_path):
+    """Test writes made through another engine (worker) reach the index on refresh"""
+    url = f"sqlite:///{tmp_path / 'shared.db'}"
+    worker_a, worker_b = create_engine(url), create_engine(url)
+    SQLModel.metadata.create_all(worker_a)
+    with Session(worker_b) as session:
+        session.add(Label(id=1, name="urgent"))
+        session.add(Task(id=1, title="Existing"))
+        session.commit()
+    index = TaskBitmapIndex(worker_a)
+    
+    with Session(worker_b) as session:
+        session.add(Task(id=2, title="Elsewhere"))
+        session.add(TaskLabel(task_id=2, label_id=1))
+        session.delete(session.get(Task, 1))
+        session.add(TaskTombstone(task_id=1))
+        session.commit()
+    assert list(index.resolve(label_any=[1])) == []
+    
+    with Session(worker_a) as session:
+        index.refresh(session)
+    assert list(index.resolve(label_any=[1])) == [2]
+    assert list(index.resolve()) == [2]
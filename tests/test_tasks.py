@@ -1,9 +1,15 @@
 import pytest
+from datetime import datetime, timedelta, timezone
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from sqlalchemy import event
+from sqlalchemy.orm.exc import StaleDataError
+from sqlmodel import Session, select
 
-from app.models import Task, Label, TaskLabel
+from app.models import Task, Label, TaskLabel, ActivityLog, Comment
 from app.models.task import TaskStatus, TaskPriority
+from app.services.purge import purge_pending
+from app.services.reminders import get_reminder_scheduler
+from app.services.summaries import reconcile_task_summaries
 
 
 def test_create_task(client: TestClient):
@@ -166,3 +172,451 @@ def test_get_nonexistent_task(client: TestClient):
     """Test getting a task that doesn't exist"""
     response = client.get("/tasks/99999")
     assert response.status_code == 404
+
+
+@pytest.mark.parametrize("id_list_limit", [1000, 0])
+def test_filter_tasks_by_label_sets(client: TestClient, session: Session, monkeypatch, id_list_limit):
+    """Test label_all / label_any / label_none filters, by bitmap ID list and by SQL"""
+    monkeypatch.setattr("app.routers.tasks.BITMAP_ID_LIST_LIMIT", id_list_limit)
+    bug = Label(name="Bug", color="#FF0000")
+    ui = Label(name="UI", color="#00FF00")
+    docs = Label(name="Docs", color="#0000FF")
+    session.add_all([bug, ui, docs])
+    session.commit()
+    
+    for title, label_ids, status in [
+        ("Bug in UI", [bug.id, ui.id], "todo"),
+        ("Plain bug", [bug.id], "done"),
+        ("Docs", [docs.id], "todo"),
+        ("No labels", [], "todo"),
+    ]:
+        response = client.post("/tasks", json={"title": title, "status": status, "label_ids": label_ids})
+        assert response.status_code == 201
+    
+    def titles(query):
+        response = client.get(f"/tasks?{query}")
+        assert response.status_code == 200
+        return sorted(task["title"] for task in response.json())
+    
+    assert titles(f"label_all={bug.id}&label_all={ui.id}") == ["Bug in UI"]
+    assert titles(f"label_any={ui.id}&label_any={docs.id}") == ["Bug in UI", "Docs"]
+    assert titles(f"label_none={bug.id}") == ["Docs", "No labels"]
+    assert titles(f"label_any={bug.id}&status=done") == ["Plain bug"]
+    
+    # Index follows updates and deletes
+    task_id = client.get(f"/tasks?label_all={docs.id}").json()[0]["id"]
+    client.patch(f"/tasks/{task_id}", json={"label_ids": [bug.id]})
+    assert titles(f"label_all={bug.id}&label_none={ui.id}") == ["Docs", "Plain bug"]
+    client.delete(f"/tasks/{task_id}")
+    assert titles(f"label_any={bug.id}") == ["Bug in UI", "Plain bug"]
+
+
+def test_task_changes_since_token(client: TestClient):
+    """Test delta sync of created, updated and deleted tasks"""
+    first = client.post("/tasks", json={"title": "First"}).json()
+    second = client.post("/tasks", json={"title": "Second"}).json()
+    
+    response = client.get("/tasks/changes")
+    assert response.status_code == 200
+    data = response.json()
+    assert [t["id"] for t in data["changed"]] == [first["id"], second["id"]]
+    assert data["deleted"] == []
+    token = data["next_token"]
+    
+    # Nothing new yet
+    data = client.get(f"/tasks/changes?since={token}").json()
+    assert data["changed"] == [] and data["deleted"] == []
+    assert data["next_token"] == token
+    
+    client.patch(f"/tasks/{first['id']}", json={"title": "First, edited"})
+    client.delete(f"/tasks/{second['id']}")
+    data = client.get(f"/tasks/changes?since={token}").json()
+    assert [t["title"] for t in data["changed"]] == ["First, edited"]
+    assert data["deleted"] == [second["id"]]
+
+
+def test_task_changes_invalid_token(client: TestClient):
+    """Test that a garbled sync token is rejected"""
+    response = client.get("/tasks/changes?since=not-a-token")
+    assert response.status_code == 400
+
+
+def test_overdue_and_due_tasks(client: TestClient):
+    """Test the overdue and due-within endpoints"""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    for title, offset, status in [
+        ("Late", -timedelta(hours=2), "todo"),
+        ("Late but done", -timedelta(hours=2), "done"),
+        ("Soon", timedelta(hours=3), "in_progress"),
+        ("Later", timedelta(days=3), "todo"),
+    ]:
+        client.post("/tasks", json={"title": title, "status": status, "due_date": (now + offset).isoformat()})
+    
+    assert [t["title"] for t in client.get("/tasks/overdue").json()] == ["Late"]
+    assert [t["title"] for t in client.get("/tasks/due?within=1d").json()] == ["Soon"]
+    assert [t["title"] for t in client.get("/tasks/due?within=7d").json()] == ["Soon", "Later"]
+    assert client.get("/tasks/due?within=soon").status_code == 400
+
+
+def test_overdue_reminder_emitted_once(client: TestClient, session: Session):
+    """Test that the scheduler emits one overdue activity per due date"""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    task = client.post("/tasks", json={"title": "Late", "due_date": (now + timedelta(minutes=5)).isoformat()}).json()
+    done = client.post("/tasks", json={"title": "Closed", "due_date": (now + timedelta(minutes=5)).isoformat()}).json()
+    client.patch(f"/tasks/{done['id']}", json={"status": "done"})
+    
+    scheduler = get_reminder_scheduler(session.get_bind())
+    assert scheduler.run_pending(now) == 0
+    assert scheduler.run_pending(now + timedelta(minutes=10)) == 1
+    assert scheduler.run_pending(now + timedelta(minutes=20)) == 0
+    
+    # A fresh load (e.g. another worker) does not emit it again
+    scheduler.load()
+    assert scheduler.run_pending(now + timedelta(minutes=30)) == 0
+    
+    logs = session.exec(select(ActivityLog).where(ActivityLog.action == "overdue")).all()
+    assert [log.task_id for log in logs] == [task["id"]]
+
+
+def test_delete_task_cascades_in_database(client: TestClient, session: Session):
+    """Test that deleting a task removes its children via ON DELETE CASCADE"""
+    label = Label(name="Bug", color="#FF0000")
+    session.add(label)
+    session.commit()
+    task_id = client.post("/tasks", json={"title": "Parent", "label_ids": [label.id]}).json()["id"]
+    client.post("/comments", json={"content": "Hi", "author": "Ann", "task_id": task_id})
+    
+    assert client.delete(f"/tasks/{task_id}").status_code == 204
+    session.expire_all()
+    assert session.exec(select(Comment)).all() == []
+    assert session.exec(select(ActivityLog)).all() == []
+    assert session.exec(select(TaskLabel)).all() == []
+
+
+def test_delete_task_in_background(client: TestClient, session: Session):
+    """Test chunked background deletion of a task with many children"""
+    task_id = client.post("/tasks", json={"title": "Huge"}).json()["id"]
+    session.add_all([Comment(content=f"c{i}", author="Ann", task_id=task_id) for i in range(25)])
+    session.commit()
+    
+    response = client.delete(f"/tasks/{task_id}?background=true")
+    assert response.status_code == 202
+    session.expire_all()
+    assert session.get(Task, task_id) is None
+    assert session.exec(select(Comment)).all() == []
+    assert client.get("/tasks/changes").json()["deleted"] == [task_id]
+
+
+def test_background_delete_hides_task_before_purge(client: TestClient, session: Session, monkeypatch):
+    """Test a background delete hides the task at once and a later sweep purges it"""
+    task_id = client.post("/tasks", json={"title": "Huge"}).json()["id"]
+    client.post("/comments", json={"content": "Kept for now", "author": "Ann", "task_id": task_id})
+    # Simulate the worker stopping before its background purge ran
+    monkeypatch.setattr("app.routers.tasks.purge_task", lambda bind, task_id: None)
+    
+    assert client.delete(f"/tasks/{task_id}?background=true").status_code == 202
+    assert client.get(f"/tasks/{task_id}").status_code == 404
+    assert client.get("/tasks").json() == []
+    assert client.get("/comments").json() == []
+    
+    assert purge_pending(session.get_bind()) == 1
+    session.expire_all()
+    assert session.get(Task, task_id) is None
+    assert session.exec(select(Comment)).all() == []
+
+
+def test_bulk_update_tasks(client: TestClient, session: Session):
+    """Test moving many tasks to a new status in one request"""
+    ids = [client.post("/tasks", json={"title": f"Task {i}", "status": "in_progress"}).json()["id"] for i in range(3)]
+    already_done = client.post("/tasks", json={"title": "Done", "status": "done"}).json()["id"]
+    
+    response = client.patch("/tasks/bulk", json={"ids": ids + [already_done], "changes": {"status": "done"}})
+    assert response.status_code == 200
+    data = response.json()
+    assert data == {"updated": 3, "task_ids": sorted(ids)}
+    
+    assert [t["id"] for t in client.get("/tasks?status=done&sort_by=id&sort_order=asc").json()] == sorted(ids + [already_done])
+    logs = session.exec(select(ActivityLog).where(ActivityLog.action == "updated")).all()
+    assert sorted(log.task_id for log in logs) == sorted(ids)
+    assert all("status:" in log.description for log in logs)
+
+
+def test_bulk_update_by_filter(client: TestClient):
+    """Test bulk updates selected by filter"""
+    client.post("/tasks", json={"title": "A", "priority": "low"})
+    client.post("/tasks", json={"title": "B", "priority": "high"})
+    
+    response = client.patch("/tasks/bulk", json={"filter": {"priority": "low"}, "changes": {"priority": "medium"}})
+    assert response.json()["updated"] == 1
+    assert [t["title"] for t in client.get("/tasks?priority=medium").json()] == ["A"]
+    
+    response = client.patch("/tasks/bulk", json={"changes": {"status": "done"}})
+    assert response.status_code == 422
+    for empty in ({}, {"status": None, "priority": None, "label_id": None}):
+        response = client.patch("/tasks/bulk", json={"filter": empty, "changes": {"status": "done"}})
+        assert response.status_code == 422
+    assert all(task["status"] == "todo" for task in client.get("/tasks").json())
+
+
+def test_task_total_counts(client: TestClient, session: Session):
+    """Test exact and approximate X-Total-Count on the task list"""
+    label = Label(name="Bug", color="#FF0000")
+    session.add(label)
+    session.commit()
+    for i in range(3):
+        client.post("/tasks", json={"title": f"Task {i}", "status": "todo", "label_ids": [label.id] if i else []})
+    
+    response = client.get("/tasks?status=todo&limit=1&count=exact")
+    assert len(response.json()) == 1
+    assert response.headers["x-total-count"] == "3"
+    
+    response = client.get(f"/tasks?label_id={label.id}&count=approx")
+    assert response.headers["x-total-count"] == "2"
+    assert response.headers["x-total-count-approximate"] == "true"
+    
+    assert "x-total-count" not in client.get("/tasks").headers
+
+
+def test_task_summary_columns(client: TestClient, session: Session):
+    """Test list responses carry maintained comment, label and activity summaries"""
+    label_id = client.post("/labels", json={"name": "summary", "color": "#000000"}).json()["id"]
+    task_id = client.post("/tasks", json={"title": "Summarized", "label_ids": [label_id]}).json()["id"]
+    client.post("/comments", json={"content": "One", "author": "A", "task_id": task_id})
+    comment_id = client.post("/comments", json={"content": "Two", "author": "A", "task_id": task_id}).json()["id"]
+    client.delete(f"/comments/{comment_id}")
+    
+    row = next(task for task in client.get("/tasks").json() if task["id"] == task_id)
+    assert row["comment_count"] == 1
+    assert row["label_ids"] == [label_id]
+    assert row["last_activity_at"] is not None
+    
+    client.delete(f"/labels/{label_id}")
+    assert client.get(f"/tasks/{task_id}").json()["label_ids"] == []
+
+
+def test_reconcile_task_summaries(client: TestClient, session: Session):
+    """Test reconciliation repairs drifted summary columns"""
+    task_id = client.post("/tasks", json={"title": "Drifted"}).json()["id"]
+    client.post("/comments", json={"content": "One", "author": "A", "task_id": task_id})
+    task = session.get(Task, task_id)
+    task.comment_count = 7
+    task.label_ids = [42]
+    session.add(task)
+    session.commit()
+    
+    assert reconcile_task_summaries(session) == 1
+    session.commit()
+    session.expire_all()
+    task = session.get(Task, task_id)
+    assert task.comment_count == 1
+    assert task.label_ids == []
+    assert reconcile_task_summaries(session) == 0
+
+
+def test_list_tasks_with_embedded_relations(client: TestClient, session: Session):
+    """Test ?include= embeds relations with a fixed number of queries"""
+    label_id = client.post("/labels", json={"name": "embedded", "color": "#123456"}).json()["id"]
+    task_ids = []
+    for i in range(6):
+        task_id = client.post("/tasks", json={"title": f"Task {i}", "label_ids": [label_id]}).json()["id"]
+        for j in range(3):
+            client.post("/comments", json={"content": f"Comment {j}", "author": "A", "task_id": task_id})
+        task_ids.append(task_id)
+    
+    plain = client.get("/tasks").json()[0]
+    assert "comments" not in plain and "labels" not in plain
+    
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.get("/tasks?include=comments,labels,latest_activity&comments_limit=2")
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    
+    assert response.status_code == 200
+    assert len(statements) == 4
+    tasks = response.json()
+    assert len(tasks) == 6
+    for task in tasks:
+        assert [label["id"] for label in task["labels"]] == [label_id]
+        assert [comment["content"] for comment in task["comments"]] == ["Comment 2", "Comment 1"]
+        assert task["latest_activity"]["action"] == "comment_added"
+    
+    assert client.get("/tasks?include=history").status_code == 400
+
+
+def test_import_tasks_from_csv(client: TestClient, session: Session):
+    """Test CSV imports resolve label names and report row errors"""
+    client.post("/labels", json={"name": "legacy", "color": "#000000"})
+    upload = (
+        "title,description,status,priority,due_date,labels\n"
+        "Migrated one,\"multi\nline\",done,high,,legacy\n"
+        "Migrated two,,,,2030-01-01T00:00:00,\n"
+        ",missing title,,,,\n"
+        "Bad label,,,,,nope\n"
+    )
+    response = client.post("/tasks/import", content=upload, headers={"Content-Type": "text/csv"})
+    assert response.status_code == 200
+    job = response.json()
+    assert job["status"] == "completed"
+    assert job["rows_read"] == 4
+    assert job["imported"] == 2
+    assert job["failed"] == 2
+    assert [error["line"] for error in job["errors"]] == [5, 6]
+    
+    tasks = {task["title"]: task for task in client.get("/tasks").json()}
+    assert tasks["Migrated one"]["description"] == "multi\nline"
+    assert tasks["Migrated one"]["status"] == "done"
+    assert len(tasks["Migrated one"]["label_ids"]) == 1
+    assert tasks["Migrated two"]["status"] == "todo"
+    
+    assert client.get(f"/tasks/import/{job['job_id']}").json()["imported"] == 2
+
+
+def test_import_csv_label_ids(client: TestClient, session: Session):
+    """Test CSV label_ids cells are split on the separator and validated per row"""
+    ids = [client.post("/labels", json={"name": f"label {i}"}).json()["id"] for i in range(12)]
+    upload = (
+        "title,label_ids\n"
+        f"Two digits,{ids[11]}\n"
+        f"Several,{ids[0]}| {ids[1]}\n"
+        f"Not a number,{ids[0]}|x\n"
+        "Unknown,999\n"
+    )
+    job = client.post("/tasks/import", content=upload, headers={"Content-Type": "text/csv"}).json()
+    assert job["imported"] == 2
+    assert [(error["line"], error["error"]) for error in job["errors"]] == [
+        (4, "Invalid label ID 'x'"), (5, "Unknown label IDs [999]")
+    ]
+    
+    tasks = {task["title"]: task for task in client.get("/tasks").json()}
+    assert tasks["Two digits"]["label_ids"] == [ids[11]]
+    assert tasks["Several"]["label_ids"] == sorted(ids[:2])
+
+
+def test_import_tasks_from_ndjson_in_batches(client: TestClient, session: Session, monkeypatch):
+    """Test NDJSON imports commit batch by batch and report invalid lines"""
+    monkeypatch.setattr("app.services.importer.IMPORT_BATCH_SIZE", 2)
+    lines = [f'{{"title": "Row {i}", "priority": "low"}}' for i in range(5)] + ["not json", '{"title": ""}']
+    response = client.post(
+        "/tasks/import?job_id=ndjson-test",
+        content="\n".join(lines) + "\n",
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    job = response.json()
+    assert job["job_id"] == "ndjson-test"
+    assert job["imported"] == 5
+    assert job["failed"] == 2
+    assert len(session.exec(select(Task).where(Task.priority == TaskPriority.LOW)).all()) == 5
+    assert len(session.exec(select(ActivityLog).where(ActivityLog.action == "created")).all()) == 5
+    
+    assert client.post("/tasks/import", content="x", headers={"Content-Type": "text/plain"}).status_code == 415
+
+
+def test_import_ndjson_rejects_mistyped_label_fields(client: TestClient):
+    """Test NDJSON rows with mistyped label fields fail alone and label_names resolve"""
+    client.post("/labels", json={"name": "x"})
+    lines = [
+        '{"title": "a", "label_ids": 5}',
+        '{"title": "b", "labels": [["x"]]}',
+        '{"title": "c", "label_names": ["x"]}',
+        '{"title": "d", "label_names": ["missing"]}',
+    ]
+    job = client.post(
+        "/tasks/import", content="\n".join(lines) + "\n", headers={"Content-Type": "application/x-ndjson"}
+    ).json()
+    assert job["status"] == "completed"
+    assert job["imported"] == 1
+    assert [(error["line"], error["error"]) for error in job["errors"]] == [
+        (1, "label_ids must be a list"), (2, "labels must be a list of strings"), (4, "Unknown label 'missing'")
+    ]
+    
+    task = next(task for task in client.get("/tasks").json() if task["title"] == "c")
+    assert len(task["label_ids"]) == 1
+
+
+def test_list_rows_match_detail_serialization(client: TestClient):
+    """Test the lean list path serializes fields exactly like the response models"""
+    created = client.post("/tasks", json={"title": "Parity", "status": "in_progress", "due_date": "2030-01-01T10:30:00"}).json()
+    
+    listed = next(task for task in client.get("/tasks").json() if task["id"] == created["id"])
+    detail = client.get(f"/tasks/{created['id']}").json()
+    assert listed == {key: detail[key] for key in listed}
+    assert listed["status"] == "in_progress"
+    assert listed["due_date"] == "2030-01-01T10:30:00"
+
+
+def test_update_task_with_if_match(client: TestClient):
+    """Test optimistic concurrency: If-Match, ETag and 409 on a stale version"""
+    task = client.post("/tasks", json={"title": "Versioned"}).json()
+    assert task["version"] == 1
+    assert client.get(f"/tasks/{task['id']}").headers["etag"] == '"1"'
+    
+    response = client.patch(f"/tasks/{task['id']}", json={"title": "First"}, headers={"If-Match": '"1"'})
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+    assert response.headers["etag"] == '"2"'
+    
+    # A client still holding version 1 is refused instead of overwriting "First"
+    response = client.patch(f"/tasks/{task['id']}", json={"title": "Second"}, headers={"If-Match": '"1"'})
+    assert response.status_code == 409
+    assert response.headers["etag"] == '"2"'
+    assert client.get(f"/tasks/{task['id']}").json()["title"] == "First"
+    
+    assert client.patch(f"/tasks/{task['id']}", json={"title": "x"}, headers={"If-Match": "nope"}).status_code == 400
+    assert client.delete(f"/tasks/{task['id']}", headers={"If-Match": '"1"'}).status_code == 409
+    assert client.delete(f"/tasks/{task['id']}", headers={"If-Match": '"2"'}).status_code == 204
+
+
+def test_concurrent_task_updates_do_not_lose_writes(session: Session):
+    """Test the versioned UPDATE refuses a write based on a stale read"""
+    task = Task(title="Shared")
+    session.add(task)
+    session.commit()
+    
+    with Session(session.get_bind()) as first, Session(session.get_bind()) as second:
+        mine, theirs = first.get(Task, task.id), second.get(Task, task.id)
+        theirs.title = "Theirs"
+        second.commit()
+        
+        mine.title = "Mine"
+        with pytest.raises(StaleDataError):
+            first.commit()
+    
+    session.refresh(task)
+    assert (task.title, task.version) == ("Theirs", 2)
+
+
+def test_task_timeline_merges_and_pages(client: TestClient, session: Session):
+    """Test the timeline interleaves comments and activity and pages by cursor"""
+    task = Task(title="History")
+    session.add(task)
+    session.commit()
+    start = datetime(2026, 3, 1)
+    for i in range(4):
+        # Even-numbered comments share their timestamp with an activity row
+        session.add(ActivityLog(task_id=task.id, action="updated", description=f"Log {i}", performed_by="system", created_at=start + timedelta(hours=2 * i)))
+        session.add(Comment(content=f"Comment {i}", author="Ann", task_id=task.id, created_at=start + timedelta(hours=2 * i + i % 2)))
+    session.commit()
+    
+    def walk(order: str):
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 3, "order": order, **({"cursor": cursor} if cursor else {})}
+            page = client.get(f"/tasks/{task.id}/timeline", params=params).json()
+            seen.extend(item.get("content") or item["description"] for item in page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return seen
+    
+    expected = ["Log 0", "Comment 0", "Log 1", "Comment 1", "Log 2", "Comment 2", "Log 3", "Comment 3"]
+    assert walk("asc") == expected
+    assert walk("desc") == expected[::-1]
+    
+    item = client.get(f"/tasks/{task.id}/timeline", params={"limit": 1}).json()["items"][0]
+    assert item["type"] == "activity" and item["task_id"] == task.id
+    assert client.get(f"/tasks/{task.id}/timeline", params={"cursor": "garbage"}).status_code == 400
+    assert client.get("/tasks/99999/timeline").status_code == 404
@@ -0,0 +1,177 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.database import ShardRouter
+from app.migrations import SHARD_ID_SPAN, migrate
+from app.models import ActivityLog, Comment, Label, Task, TaskLabel, TaskTombstone
+from app.services.local_state import reload_workspace
+from app.services.rebalance import RebalanceError, move_workspace
+from app.services.task_index import get_task_index
+
+
+ACME = {"X-Workspace": "acme"}
+
+
+def test_workspaces_are_isolated(client: TestClient):
+    """Test tasks, comments and activity logs are only visible in their own workspace"""
+    task = client.post("/tasks/", json={"title": "Acme task"}, headers=ACME).json()
+    client.post("/tasks/", json={"title": "Default task"})
+    assert task["workspace"] == "acme"
+    
+    assert [t["title"] for t in client.get("/tasks/", headers=ACME).json()] == ["Acme task"]
+    assert [t["title"] for t in client.get("/tasks/").json()] == ["Default task"]
+    assert client.get(f"/tasks/{task['id']}", headers=ACME).status_code == 200
+    assert client.get(f"/tasks/{task['id']}").status_code == 404
+    assert client.patch(f"/tasks/{task['id']}", json={"title": "Hijacked"}).status_code == 404
+    
+    comment = {"content": "Hello", "author": "ann", "task_id": task["id"]}
+    assert client.post("/comments/", json=comment).status_code == 404
+    created = client.post("/comments/", json=comment, headers=ACME).json()
+    assert client.get(f"/comments/{created['id']}").status_code == 404
+    assert client.get("/comments/").json() == []
+    assert all(log["task_id"] != task["id"] for log in client.get("/activity-logs/").json())
+    assert client.get(f"/activity-logs/task/{task['id']}").status_code == 404
+
+
+def test_invalid_workspace_header(client: TestClient):
+    """Test a malformed X-Workspace header is rejected"""
+    response = client.get("/tasks/", headers={"X-Workspace": "no spaces allowed"})
+    assert response.status_code == 400
+
+
+@pytest.fixture(name="shards")
+def shards_fixture(tmp_path):
+    """Create two migrated SQLite shards behind a router without placement caching"""
+    engines = []
+    for number in range(2):
+        shard = create_engine(f"sqlite:///{tmp_path / f'shard{number}.db'}", connect_args={"check_same_thread": False})
+        migrate(shard, number)
+        engines.append(shard)
+    yield ShardRouter(engines, ttl=0)
+    for shard in engines:
+        shard.dispose()
+
+
+def _seed_acme(bind) -> int:
+    with Session(bind) as session:
+        session.add(Label(name="filler"))
+        label = Label(name="urgent", workspace="acme", color="#FF0000")
+        task = Task(title="Move me", workspace="acme", comment_count=1)
+        session.add_all([label, task])
+        session.flush()
+        task.label_ids = [label.id]
+        session.add(TaskLabel(task_id=task.id, label_id=label.id))
+        session.add(Comment(content="Hi", author="ann", task_id=task.id))
+        session.add(ActivityLog(task_id=task.id, action="created", description="Task created", performed_by="system"))
+        session.add(Task(title="Stays", workspace="default"))
+        session.add(TaskTombstone(task_id=999, workspace="acme"))
+        session.commit()
+        return task.id
+
+
+def test_move_workspace_between_shards(shards: ShardRouter):
+    """Test a move copies every row of the workspace and removes it from the source"""
+    source, target = shards.engines
+    task_id = _seed_acme(source)
+    assert shards.placement("acme").shard == 0
+    
+    result = move_workspace(shards, "acme", 1, grace=0, sleep=lambda seconds: None)
+    
+    assert result["tasks"] == 1
+    assert shards.placement("acme").shard == 1
+    assert shards.placement("acme").state == "active"
+    with Session(source) as session:
+        assert session.exec(select(Task.title)).all() == ["Stays"]
+        assert session.exec(select(TaskTombstone)).all() == []
+        assert session.exec(select(Label.name)).all() == ["filler"]
+    with Session(target) as session:
+        task = session.get(Task, task_id)
+        label = session.exec(select(Label).where(Label.name == "urgent")).one()
+        assert (label.workspace, label.color) == ("acme", "#FF0000")
+        assert session.exec(select(Label.name)).all() == ["urgent"]
+        assert task.workspace == "acme"
+        assert task.label_ids == [label.id]
+        assert [link.label_id for link in task.task_labels] == [label.id]
+        assert [c.content for c in task.comments] == ["Hi"]
+        assert task.comment_count == 1
+        assert [log.action for log in task.activity_logs] == ["created"]
+        assert session.exec(select(TaskTombstone.task_id)).all() == [999]
+
+
+def test_move_aborts_on_id_collision(shards: ShardRouter):
+    """Test a move whose IDs are taken on the target is rolled back"""
+    source, target = shards.engines
+    task_id = _seed_acme(source)
+    with Session(target) as session:
+        session.add(Task(id=task_id, title="Taken", workspace="other"))
+        session.commit()
+    
+    with pytest.raises(RebalanceError):
+        move_workspace(shards, "acme", 1, grace=0, sleep=lambda seconds: None)
+    
+    assert shards.placement("acme").shard == 0
+    assert shards.placement("acme").state == "active"
+    with Session(target) as session:
+        assert session.exec(select(Task.title)).all() == ["Taken"]
+    with Session(source) as session:
+        assert session.get(Task, task_id).title == "Move me"
+
+
+def test_shards_allocate_disjoint_ids(shards: ShardRouter):
+    """Test rows created on each shard never collide when a workspace moves"""
+    source, target = shards.engines
+    task_id = _seed_acme(source)
+    with Session(target) as session:
+        local = Task(title="Local", workspace="other")
+        session.add(local)
+        session.commit()
+        assert local.id == SHARD_ID_SPAN + 1
+    
+    move_workspace(shards, "acme", 1, grace=0, sleep=lambda seconds: None)
+    
+    with Session(target) as session:
+        assert session.get(Task, task_id).title == "Move me"
+        assert session.get(Task, SHARD_ID_SPAN + 1).title == "Local"
+
+
+def test_workers_rebuild_state_after_move(shards: ShardRouter):
+    """Test a worker that did not run the move rebuilds its index once it sees the new placement"""
+    task_id = _seed_acme(shards.engines[0])
+    # Engines of their own stand in for another process's state
+    worker_engines = [create_engine(shard.url) for shard in shards.engines]
+    worker = ShardRouter(worker_engines, ttl=0, on_move=reload_workspace)
+    assert worker.placement("acme").shard == 0
+    source_index, target_index = (get_task_index(shard) for shard in worker_engines)
+    assert source_index.workspace_tasks("acme") == [task_id]
+    
+    move_workspace(shards, "acme", 1, grace=0, sleep=lambda seconds: None)
+    assert target_index.workspace_tasks("acme") == []
+    
+    assert worker.placement("acme").shard == 1
+    assert target_index.workspace_tasks("acme") == [task_id]
+    assert source_index.workspace_tasks("acme") == []
+    for shard in worker_engines:
+        shard.dispose()
+
+
+def test_move_keeps_source_written_after_catch_up(shards: ShardRouter):
+    """Test a write reaching the source after the final catch-up stops the move before deleting anything"""
+    source, target = shards.engines
+    task_id = _seed_acme(source)
+    sleeps = []
+    
+    def stale_worker_write(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 2:
+            # A worker still routing "acme" to shard 0 after the switch
+            with Session(source) as session:
+                session.add(Comment(content="Late", author="bob", task_id=task_id))
+                session.commit()
+    
+    with pytest.raises(RebalanceError, match="comments"):
+        move_workspace(shards, "acme", 1, grace=0, sleep=stale_worker_write)
+    
+    with Session(source) as session:
+        assert session.get(Task, task_id).title == "Move me"
+        assert len(session.exec(select(Comment).where(Comment.task_id == task_id)).all()) == 2